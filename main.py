@@ -2,7 +2,6 @@
 # dependencies = [
 #  "pygame-ce",
 #  "pytmx",
-#  "pathfinding",
 #  "pygbag",
 # ]
 # ///
@@ -19,7 +18,9 @@ from typing import Any
 import pygame
 
 import src.utils  # noqa [ to patch utf-8 on top of file without linting errors ]
-from src import client, support, xplat
+from src import client, game_clock, support, xplat
+from src.atlas import AssetAtlas
+from src.dirty_rects import DirtyRectTracker
 from src.enums import (
     CustomCursor,
     GameState,
@@ -40,6 +41,8 @@ from src.groups import AllSprites
 from src.gui.interface.dialog import DialogueManager
 from src.gui.setup import setup_gui
 from src.overlay.fast_forward import FastForward
+from src.preloader import Preloader
+from src.replay import InputRecorder, InputReplay, InputSource, set_input
 from src.savefile import SaveFile
 from src.screens.inventory import InventoryMenu, prepare_checkmark_for_buttons
 from src.screens.level import Level
@@ -57,12 +60,16 @@ from src.settings import (
     DEBUG_MODE_VERSION,
     EMOTE_SIZE,
     GAME_LANGUAGE,
+    INPUT_RECORD,
+    INPUT_REPLAY,
+    IS_WEB,
     RANDOM_SEED,
     SCREEN_HEIGHT,
     SCREEN_WIDTH,
     TB_SIZE,
     TUTORIAL_TB_LEFT,
     TUTORIAL_TB_TOP,
+    USE_DIRTY_RECTS,
     USE_SERVER,
     WORLD_TIME_MULTIPLIER,
     AniFrames,
@@ -117,6 +124,10 @@ class Game:
         self.frames: dict[str, dict] | None = None
         self.previous_frame = ""
         self.fast_forward = FastForward()
+        # only set up when partial redraws are enabled
+        self.dirty_rects: DirtyRectTracker | None = None
+        if USE_DIRTY_RECTS:
+            self.dirty_rects = DirtyRectTracker()
         # assets
         self.tmx_maps: MapDict | None = None
 
@@ -129,12 +140,22 @@ class Game:
         self._cursor: int = CustomCursor.ARROW
         self._cursor_img: pygame.Surface | None = None
 
+        # input of the player, or of a recorded session (see src/replay.py)
+        self.input = InputSource()
+        if INPUT_REPLAY:
+            self.input = InputReplay(INPUT_REPLAY)
+            if self.input.save_path is not None:
+                SaveFile.path = self.input.save_path
+        elif INPUT_RECORD:
+            self.input = InputRecorder(INPUT_RECORD, SaveFile.path)
+        set_input(self.input)
+
         self.save_file = SaveFile.load()
 
         # main setup
         self.running = True
         self.clock = pygame.time.Clock()
-        self.load_assets()
+        self.load_cursors()
 
         # config of all game versions and all rounds: rounds_config[game_version][round_no][feature_name] = value
         self.rounds_config: list[list[dict[str, Any]]] = support.load_data(
@@ -168,7 +189,43 @@ class Game:
             self.all_sprites, f"data/textboxes/{GAME_LANGUAGE}/dialogues.json"
         )
 
+        # screens (apart from the main menu) are set up once all assets are loaded
+        self.level: Level | None = None
+        self.player = None
+        self.tutorial = None
+        self.inventory_menu = None
+        self.shop_menu = None
+        self.settings_menu = None
+        self.round_menu = None
+        self.token_status = False
+        self.main_menu = MainMenu(
+            self.switch_state,
+            self.set_token,
+            self.set_players_name,
+        )
+
+        # dialogue text box positions
+        self.msg_left = SCREEN_WIDTH / 2 - TB_SIZE[0] / 2
+        self.msg_top = SCREEN_HEIGHT - TB_SIZE[1]
+
         # screens
+        self.menus = {
+            GameState.MAIN_MENU: self.main_menu,
+        }
+        self.current_state = GameState.MAIN_MENU
+
+        # intro to game and in-group msg.
+        self.last_intro_txt_rendered = False
+        self.switched_to_tutorial = False
+
+        # assets are loaded in the background, while the main menu is shown
+        self.preloader = Preloader()
+        self.preload_assets()
+
+    def setup_screens(self) -> None:
+        """
+        Set up the level and all screens requiring assets.
+        """
         self.level = Level(
             self.switch_state,
             (self.get_round, self.set_round),
@@ -185,20 +242,9 @@ class Game:
         )
         self.player = self.level.player
 
-        self.tutorial = None
-        self.inventory_menu = None
-        self.shop_menu = None
-        self.settings_menu = None
-        self.round_menu = None
-        self.token_status = False
         self.allocation_task = PlayerTask(
             partial(self.send_telemetry_and_play, "resource_allocation")
         )
-        self.main_menu = MainMenu(
-            self.switch_state,
-            self.set_token,
-            self.set_players_name,
-        )
         self.pause_menu = PauseMenu(self.switch_state)
         self.settings_menu = SettingsMenu(
             self.switch_state,
@@ -259,13 +305,7 @@ class Game:
             "This is a very long Test Message with German characters: üß",
         )
 
-        # dialogue text box positions
-        self.msg_left = SCREEN_WIDTH / 2 - TB_SIZE[0] / 2
-        self.msg_top = SCREEN_HEIGHT - TB_SIZE[1]
-
-        # screens
-        self.menus = {
-            GameState.MAIN_MENU: self.main_menu,
+        self.menus |= {
             GameState.PAUSE: self.pause_menu,
             GameState.SETTINGS: self.settings_menu,
             GameState.SHOP: self.shop_menu,
@@ -277,17 +317,12 @@ class Game:
             GameState.SOCIAL_IDENTITY_ASSESSMENT: self.social_identity_assessment_menu,
             GameState.NOTIFICATION_MENU: self.notification_menu,
         }
-        self.current_state = GameState.MAIN_MENU
 
         # tutorial
         self.tutorial = Tutorial(
             self.all_sprites, self.player, self.level, self.round_config
         )
 
-        # intro to game and in-group msg.
-        self.last_intro_txt_rendered = False
-        self.switched_to_tutorial = False
-
     def check_hat_condition(self):
         if self.round > 2 and self.game_version in {1, 2}:
             self.player.has_hat = True
@@ -314,12 +349,15 @@ class Game:
         self.switch_state(GameState.PLAY)
 
     def set_players_name(self, players_name: str) -> None:
+        self.preloader.finish()
         self.player.name = players_name
         if players_name:
             self.send_telemetry("players_name", {"players_name": players_name})
 
     def set_token(self, response: dict[str, Any]) -> dict[str, Any]:
         xplat.log("Login successful!")
+        # the level has to be set up before the round can be set
+        self.preloader.finish()
         # `token` is the play token the player entered
         self.token = response["token"]
         # `jwt` is the creds used to send telemetry to the backend
@@ -438,6 +476,7 @@ class Game:
             self.set_round(self.round + 1)
 
     def switch_state(self, state: GameState) -> None:
+        self.preloader.finish()
         self.set_cursor(CustomCursor.ARROW)
         self.current_state = state
         if self.current_state == GameState.SAVE_AND_RESUME:
@@ -466,31 +505,77 @@ class Game:
                 self._cursor = cursor
                 self._cursor_img = self._available_cursors[self._cursor]
 
-    def load_assets(self) -> None:
-        self.tmx_maps = support.tmx_importer("data/maps")
+    def load_cursors(self) -> None:
+        for member in CustomCursor:
+            cursor = pygame.image.load(
+                support.resource_path(f"images/ui/cursor/{member.value}.png")
+            ).convert_alpha()
+            cursor = pygame.transform.scale_by(cursor, 4)
+            self._available_cursors.append(cursor)
+
+        self._cursor_img = self._available_cursors[CustomCursor.ARROW]
 
-        # frames
-        self.emotes = support.animation_importer(
-            "images/ui/emotes/sprout_lands", frame_size=EMOTE_SIZE, resize=EMOTE_SIZE
+    def preload_assets(self) -> None:
+        """
+        Queue everything that has to be loaded before the game can start.
+        Files are read and decoded on other threads, while the surfaces are
+        converted and the screens are set up on the main thread.
+        """
+        tmx_maps = support.tmx_importer("data/maps", "data/map_cache")
+        self.tmx_maps = tmx_maps
+        for map_name in tmx_maps:
+            self.preloader.submit(partial(tmx_maps.prefetch, map_name))
+
+        # frames (cached in the asset atlas, see src/atlas.py)
+        atlas = AssetAtlas(
+            support.resource_path("data/atlas"), support.resource_path("images")
+        )
+        self.preloader.submit(atlas.read)
+
+        # sounds
+        self.preloader.submit(
+            partial(support.sound_importer, "audio", default_volume=0.25),
+            partial(setattr, self, "sounds"),
+        )
+
+        self.preloader.schedule(partial(self.load_assets, atlas))
+        self.preloader.schedule(self.setup_screens)
+
+    def load_assets(self, atlas: AssetAtlas) -> None:
+        # frames (cached in the asset atlas, see src/atlas.py)
+        atlas.load()
+        cached = atlas.cached
+
+        self.emotes = cached(
+            support.animation_importer,
+            "images/ui/emotes/sprout_lands",
+            frame_size=EMOTE_SIZE,
+            resize=EMOTE_SIZE,
         )
 
         self.level_frames = {
-            "animations": support.animation_importer("images", "misc"),
-            "soil": support.import_folder_dict("images/tilesets/soil"),
-            "soil water": support.import_folder_dict("images/tilesets/soil/soil water"),
-            "tomato": support.import_folder("images/tilesets/plants/tomato"),
-            "corn": support.import_folder("images/tilesets/plants/corn"),
-            "beetroot": support.import_folder("images/tilesets/plants/beetroot"),
-            "carrot": support.import_folder("images/tilesets/plants/carrot"),
-            "eggplant": support.import_folder("images/tilesets/plants/eggplant"),
-            "pumpkin": support.import_folder("images/tilesets/plants/pumpkin"),
-            "parsnip": support.import_folder("images/tilesets/plants/parsnip"),
-            "rain drops": support.import_folder("images/rain/drops"),
-            "rain floor": support.import_folder("images/rain/floor"),
-            "objects": support.import_folder_dict("images/objects"),
-            "drops": support.import_folder_dict("images/drops"),
+            "animations": cached(support.animation_importer, "images", "misc"),
+            "soil": cached(support.import_folder_dict, "images/tilesets/soil"),
+            "soil water": cached(
+                support.import_folder_dict, "images/tilesets/soil/soil water"
+            ),
+            "tomato": cached(support.import_folder, "images/tilesets/plants/tomato"),
+            "corn": cached(support.import_folder, "images/tilesets/plants/corn"),
+            "beetroot": cached(
+                support.import_folder, "images/tilesets/plants/beetroot"
+            ),
+            "carrot": cached(support.import_folder, "images/tilesets/plants/carrot"),
+            "eggplant": cached(
+                support.import_folder, "images/tilesets/plants/eggplant"
+            ),
+            "pumpkin": cached(support.import_folder, "images/tilesets/plants/pumpkin"),
+            "parsnip": cached(support.import_folder, "images/tilesets/plants/parsnip"),
+            "rain drops": cached(support.import_folder, "images/rain/drops"),
+            "rain floor": cached(support.import_folder, "images/rain/floor"),
+            "objects": cached(support.import_folder_dict, "images/objects"),
+            "drops": cached(support.import_folder_dict, "images/drops"),
         }
-        self.item_frames = support.import_folder_dict("images/objects/items")
+        self.item_frames = cached(support.import_folder_dict, "images/objects/items")
         cosmetic_surf = pygame.image.load(
             support.resource_path("images/ui/cosmetics.png")
         ).convert_alpha()
@@ -513,22 +598,15 @@ class Game:
         }
         prepare_checkmark_for_buttons(self.frames["checkmark"])
 
-        for member in CustomCursor:
-            cursor = pygame.image.load(
-                support.resource_path(f"images/ui/cursor/{member.value}.png")
-            ).convert_alpha()
-            cursor = pygame.transform.scale_by(cursor, 4)
-            self._available_cursors.append(cursor)
-
-        self._cursor_img = self._available_cursors[CustomCursor.ARROW]
+        setup_entity_assets(atlas)
 
-        setup_entity_assets()
+        # the web version can't persist anything between runs,
+        # its atlas needs to be built in advance (see tools/build_asset_atlas.py)
+        if atlas.has_pending and not IS_WEB:
+            atlas.save()
 
         setup_gui()
 
-        # sounds
-        self.sounds = support.sound_importer("audio", default_volume=0.25)
-
         self.font = support.import_font(30, "font/LycheeSoda.ttf")
 
     def game_paused(self) -> bool:
@@ -613,9 +691,20 @@ class Game:
                 # will be automatically skipped if the level does not have a tutorial (aka is > 1)
                 self.tutorial.start()
 
+    def tick(self, preloading: bool) -> float:
+        """
+        Start a new frame, and advance the game clock.
+
+        :param preloading: Whether the assets are still being loaded
+        :return: Duration of the previous frame, in seconds
+        """
+        milliseconds = self.input.tick(self.clock, preloading)
+        game_clock.advance(milliseconds)
+        return milliseconds / 1000
+
     # events
     def event_loop(self) -> None:
-        for event in pygame.event.get():
+        for event in self.input.get_events():
             if self.handle_event(event):
                 continue
 
@@ -623,7 +712,7 @@ class Game:
                 if self.menus[self.current_state].handle_event(event):
                     continue
 
-            if self.level.handle_event(event):
+            if self.level is not None and self.level.handle_event(event):
                 continue
 
     def handle_event(self, event: pygame.event.Event) -> bool:
@@ -673,21 +762,42 @@ class Game:
 
     async def run(self) -> None:
         pygame.mouse.set_visible(False)
+
+        # show the main menu while the assets are still being loaded
+        while self.input.is_preloading(self.preloader):
+            dt = self.tick(preloading=True)
+            self.preloader.update()
+            self.event_loop()
+
+            self.display_surface.fill("#C0D470")
+            self.main_menu.update(dt)
+            self.preloader.draw()
+            FBLITTER.schedule_blit(self._cursor_img, self.input.get_mouse_pos())
+            FBLITTER.blit_all()
+            pygame.display.update()
+            self.input.end_frame(None)
+            await asyncio.sleep(0)
+
         is_first_frame = True
-        while self.running:
-            dt = self.clock.tick() / 1000
+        while self.running and not self.input.finished:
+            dt = self.tick(preloading=False)
 
             self.event_loop()
 
             is_game_paused = self.game_paused()
-
-            self.display_surface.fill("#C0D470")
+            is_partial_frame = is_game_paused and not is_first_frame
+            if self.dirty_rects:
+                # only partially presented frames need to know what was drawn
+                FBLITTER.dirty_rect_tracker = (
+                    self.dirty_rects if is_partial_frame else None
+                )
 
             if not is_game_paused or is_first_frame:
+                # while paused, the previous frame covers the whole screen anyway
+                self.display_surface.fill("#C0D470")
                 if self.level.cutscene_animation.active:
-                    event = pygame.key.get_pressed()
                     if (
-                        event[pygame.K_RSHIFT]
+                        self.input.is_key_pressed(pygame.K_RSHIFT)
                         and self.game_version == DEBUG_MODE_VERSION
                     ):
                         # fast-forward
@@ -697,9 +807,13 @@ class Game:
                 else:
                     self.level.update(dt, self.current_state == GameState.PLAY)
 
-            if is_game_paused and not is_first_frame:
+            if is_partial_frame:
+                # only restores the regions drawn to in the last frame, which are known already
                 self.display_surface.blit(self.previous_frame, (0, 0))
-                self.menus[self.current_state].update(dt)
+                menu = self.menus[self.current_state]
+                menu.update(dt)
+                if self.dirty_rects and menu.draws_on_display_surface:
+                    self.dirty_rects.add_full()
             else:
                 # prevents events to happen during minigame
                 if (
@@ -911,9 +1025,8 @@ class Game:
                     self.current_state == GameState.PLAY
                     and self.game_version == DEBUG_MODE_VERSION
                 ):
-                    event = pygame.key.get_pressed()
                     self.fast_forward.draw_option(self.display_surface)
-                    if event[pygame.K_RSHIFT]:
+                    if self.input.is_key_pressed(pygame.K_RSHIFT):
                         self.fast_forward.draw_overlay(self.display_surface)
             else:
                 self.all_sprites.update(dt)
@@ -937,16 +1050,25 @@ class Game:
             ):
                 self.tutorial.update(is_game_paused)
 
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = self.input.get_mouse_pos()
             if not is_game_paused or is_first_frame:
                 self.previous_frame = self.display_surface.copy()
             FBLITTER.schedule_blit(self._cursor_img, mouse_pos)
             FBLITTER.blit_all()
 
+            if self.dirty_rects:
+                self.dirty_rects.present(full=not is_partial_frame)
+            else:
+                pygame.display.update()
             is_first_frame = False
-            pygame.display.update()
+            self.input.end_frame(
+                [round(value) for value in self.player.hitbox_rect.center]
+            )
             await asyncio.sleep(0)
 
+        # only reached once a replayed session is over
+        self.input.close()
+
 
 if __name__ == "__main__":
     game = Game()
@@ -0,0 +1,277 @@
+"""Texture atlas persisting the (already scaled) frames imported at startup.
+
+Decoding and upscaling every image on each start is slow, especially on the web
+and on older machines. The first run on desktop packs all frames imported
+through AssetAtlas.cached into a few atlas pages, which are written to disk
+together with a JSON index. The following runs only have to load those pages.
+
+The atlas gets rebuilt whenever the content of the source images changes.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import warnings
+from collections.abc import Callable
+from typing import Any
+
+import pygame
+
+from src.exceptions import AssetAtlasWarning
+from src.settings import IS_WEB, SCALE_FACTOR
+from src.support import resource_path
+
+ATLAS_VERSION = 1
+"""Increase whenever the atlas format or the frames returned by an importer change."""
+
+ATLAS_PAGE_WIDTH = 2048
+ATLAS_MAX_PAGE_HEIGHT = 4096
+
+_INDEX_FILE_NAME = "index.json"
+
+type AtlasFrames = pygame.Surface | list[AtlasFrames] | dict[str, AtlasFrames]
+"""Anything the importers return: frames, nested in lists and str-keyed dicts."""
+
+type _Placement = list[int]
+"""[page, x, y, width, height] of a frame in the atlas."""
+
+
+def _normalise_arg(arg):
+    # absolute paths depend on where the game is installed (see resource_path)
+    if isinstance(arg, str) and os.path.isabs(arg):
+        return os.path.relpath(arg, resource_path("")).replace(os.sep, "/")
+    return arg
+
+
+def _get_importer_key(importer: Callable, args: tuple, kwargs: dict) -> str:
+    args = [_normalise_arg(arg) for arg in args]
+    kwargs = {key: _normalise_arg(arg) for key, arg in kwargs.items()}
+    return f"{importer.__module__}.{importer.__qualname__}:" + json.dumps(
+        [args, kwargs], sort_keys=True
+    )
+
+
+def _get_source_hash(source_path: str) -> str:
+    digest = hashlib.sha1(f"{ATLAS_VERSION}:{SCALE_FACTOR}".encode())
+    for folder_path, folder_names, file_names in os.walk(source_path):
+        folder_names.sort()
+        for file_name in sorted(file_names):
+            full_path = os.path.join(folder_path, file_name)
+            digest.update(os.path.relpath(full_path, source_path).encode())
+            with open(full_path, "rb") as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _flatten(frames: AtlasFrames) -> list[pygame.Surface]:
+    if isinstance(frames, pygame.Surface):
+        return [frames]
+    if isinstance(frames, dict):
+        frames = frames.values()
+    return [surf for item in frames for surf in _flatten(item)]
+
+
+def _encode(frames: AtlasFrames, placements: dict[int, _Placement]):
+    if isinstance(frames, pygame.Surface):
+        return placements[id(frames)]
+    if isinstance(frames, dict):
+        return {key: _encode(item, placements) for key, item in frames.items()}
+    return [_encode(item, placements) for item in frames]
+
+
+def _decode(encoded, pages: list[pygame.Surface]) -> AtlasFrames:
+    if isinstance(encoded, dict):
+        return {key: _decode(item, pages) for key, item in encoded.items()}
+    if encoded and isinstance(encoded[0], int):
+        page, x, y, width, height = encoded
+        return pages[page].subsurface(x, y, width, height).convert_alpha()
+    return [_decode(item, pages) for item in encoded]
+
+
+def _pack(surfaces: list[pygame.Surface]) -> tuple[list[tuple[int, int]], dict]:
+    """
+    Places the given surfaces on shelves (rows) of atlas pages.
+
+    :return: List of page sizes, and the placement of each surface by its id
+    """
+    page_sizes = []
+    placements = {}
+    page = x = y = shelf_height = 0
+    for surf in sorted(surfaces, key=lambda s: s.get_height(), reverse=True):
+        width, height = surf.get_size()
+        if x + width > ATLAS_PAGE_WIDTH:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if y + height > ATLAS_MAX_PAGE_HEIGHT and y:
+            page_sizes.append((ATLAS_PAGE_WIDTH, y))
+            page, x, y, shelf_height = page + 1, 0, 0, 0
+        placements[id(surf)] = [page, x, y, width, height]
+        x += width
+        shelf_height = max(shelf_height, height)
+    page_sizes.append((ATLAS_PAGE_WIDTH, y + shelf_height))
+    return page_sizes, placements
+
+
+class AssetAtlas:
+    def __init__(self, atlas_path: str, source_path: str):
+        """
+        :param atlas_path: Folder the atlas index and pages are stored in
+        :param source_path: Folder containing every image the cached importers
+                            read from. Used to tell whether the atlas is outdated
+        """
+        self.atlas_path = atlas_path
+        self.source_path = source_path
+        self._source_hash: str | None = None
+
+        # frames available from the atlas on disk, and frames imported this
+        # run which are still missing from it
+        self._frames: dict[str, AtlasFrames] = {}
+        self._pending: dict[str, AtlasFrames] = {}
+
+        # index and pages read from disk, until their frames are decoded
+        self._index: dict | None = None
+        self._pages: list[pygame.Surface] | None = None
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def _get_source_hash(self) -> str:
+        if self._source_hash is None:
+            self._source_hash = _get_source_hash(self.source_path)
+        return self._source_hash
+
+    def _load_page(self, file_name: str, size: tuple[int, int]) -> pygame.Surface:
+        full_path = os.path.join(self.atlas_path, file_name)
+        if file_name.endswith(".png"):
+            return pygame.image.load(full_path)
+        with open(full_path, "rb") as file:
+            if IS_WEB:
+                buffer = file.read()
+            else:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return pygame.image.frombuffer(buffer, size, "RGBA")
+
+    def read(self) -> bool:
+        """
+        Reads the atlas index and pages from disk, if they are present and
+        up-to-date. As this does not require the display, it can be done on
+        another thread (see src/preloader.py).
+
+        :return: Whether the atlas could be read
+        """
+        index_path = os.path.join(self.atlas_path, _INDEX_FILE_NAME)
+        if not os.path.exists(index_path):
+            return False
+
+        try:
+            with open(index_path, "r") as file:
+                index = json.load(file)
+            if index["source_hash"] != self._get_source_hash():
+                return False
+            self._pages = [
+                self._load_page(page["file"], page["size"]) for page in index["pages"]
+            ]
+        except (OSError, ValueError, KeyError, pygame.error) as e:
+            warnings.warn(f"Could not load asset atlas: {e}", AssetAtlasWarning)
+            return False
+        self._index = index
+        return True
+
+    def load(self) -> bool:
+        """
+        Loads the atlas from disk (unless it has already been read), if it is
+        present and up-to-date.
+
+        Frames are copied out of the atlas pages (instead of referencing them
+        as subsurfaces), since blitting subsurfaces is noticeably slower.
+
+        :return: Whether the atlas could be loaded
+        """
+        if self._pages is None and not self.read():
+            return False
+
+        try:
+            self._frames = {
+                key: _decode(encoded, self._pages)
+                for key, encoded in self._index["frames"].items()
+            }
+        except (ValueError, KeyError, pygame.error) as e:
+            warnings.warn(f"Could not load asset atlas: {e}", AssetAtlasWarning)
+            self._frames = {}
+            return False
+        finally:
+            self._index = self._pages = None
+        return True
+
+    def cached(self, importer: Callable[..., AtlasFrames], *args: Any, **kwargs: Any):
+        """
+        Returns what importer(*args, **kwargs) would return, taking the frames
+        from the atlas if possible. Arguments must be JSON-serialisable.
+        """
+        key = _get_importer_key(importer, args, kwargs)
+        if key in self._frames:
+            return self._frames[key]
+        frames = importer(*args, **kwargs)
+        self._pending[key] = frames
+        return frames
+
+    def save(self, page_format: str = "rgba"):
+        """
+        (Re)writes the atlas, containing every frame currently known to it.
+
+        :param page_format: "rgba" for raw pages, which can be memory-mapped
+                            when loading, or "png" for much smaller files
+                            (used for the web version)
+        """
+        frames = self._frames | self._pending
+        surfaces = _flatten(list(frames.values()))
+        page_sizes, placements = _pack(surfaces)
+
+        pages = [pygame.Surface(size, pygame.SRCALPHA) for size in page_sizes]
+        for page in pages:
+            page.fill((0, 0, 0, 0))
+        for surf in surfaces:
+            page, x, y, _, _ = placements[id(surf)]
+            # copy the pixels as they are, without blending them with the page
+            pages[page].blit(surf, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+
+        index = {
+            "version": ATLAS_VERSION,
+            "source_hash": self._get_source_hash(),
+            "pages": [],
+            "frames": {key: _encode(item, placements) for key, item in frames.items()},
+        }
+        index_path = os.path.join(self.atlas_path, _INDEX_FILE_NAME)
+        try:
+            os.makedirs(self.atlas_path, exist_ok=True)
+            # the index is removed first and written last,
+            # so that it never refers to pages which aren't completely written
+            if os.path.exists(index_path):
+                os.remove(index_path)
+
+            for i, page in enumerate(pages):
+                file_name = f"page_{i}.{page_format}"
+                full_path = os.path.join(self.atlas_path, file_name)
+                if page_format == "png":
+                    pygame.image.save(page, full_path)
+                else:
+                    with open(full_path, "wb") as file:
+                        file.write(pygame.image.tobytes(page, "RGBA"))
+                index["pages"].append({"file": file_name, "size": page.get_size()})
+
+            with open(index_path + ".tmp", "w") as file:
+                json.dump(index, file)
+            os.replace(index_path + ".tmp", index_path)
+
+            # remove pages of previous builds (e.g. in another format)
+            page_files = {page["file"] for page in index["pages"]}
+            for file_name in os.listdir(self.atlas_path):
+                if file_name.startswith("page_") and file_name not in page_files:
+                    os.remove(os.path.join(self.atlas_path, file_name))
+        except OSError as e:
+            warnings.warn(f"Could not save asset atlas: {e}", AssetAtlasWarning)
+            return
+
+        self._frames = frames
+        self._pending = {}
@@ -13,13 +13,23 @@ from .zoom_area import ZoomArea
 
 
 class ZoomManager:
-    def __init__(self):
+    def __init__(self, render_visible_area_only: bool = True):
+        """
+        :param render_visible_area_only: If True, only the part of the display
+                                         which remains visible after zooming is
+                                         scaled up, instead of the entire display
+        """
         self._zoom_areas: list[ZoomArea] = []
         self.current_zoom_area: ZoomArea | None = None
         self.zoom_state: ZoomState = ZoomState.NOT_ZOOMING
         self.zoom_speed = 1
         self.zoom_factor = 0
 
+        self.render_visible_area_only = render_visible_area_only
+        # Surface the zoomed display is rendered onto. It is reused as long as
+        # its size does not change, to avoid allocating a new one every frame
+        self._zoom_target: pygame.Surface | None = None
+
     @staticmethod
     def _check_za_not_intersecting(areas: Iterable[ZoomArea]):
         areas_save = list(areas)
@@ -85,9 +95,38 @@ class ZoomManager:
 
         self._zoom_progress(dt, (self.zoom_state == ZoomState.ZOOMING_OUT))
 
+    def _get_zoom_target(self, size: tuple[int, int]) -> pygame.Surface:
+        if self._zoom_target is None or self._zoom_target.get_size() != size:
+            self._zoom_target = pygame.Surface(size)
+        return self._zoom_target
+
     def apply_zoom(self):
+        if not self.zoom_factor:
+            # nothing is zoomed, the display can stay as it is
+            return
+
         surf = pygame.display.get_surface()
         surf_rect = surf.get_frect()
-        zoomed_area = pygame.transform.scale_by(surf, self.zoom_factor + 1)
+        scale = self.zoom_factor + 1
+
+        if self.render_visible_area_only:
+            # only the area in the centre of the display will still be visible
+            # after zooming, so only this area is scaled up to the display size
+            visible_rect = pygame.FRect(
+                0, 0, surf_rect.width / scale, surf_rect.height / scale
+            )
+            visible_rect.center = surf_rect.center
+            zoomed_area = pygame.transform.scale(
+                surf.subsurface(pygame.Rect(visible_rect)),
+                surf.get_size(),
+                self._get_zoom_target(surf.get_size()),
+            )
+            FBLITTER.schedule_blit(zoomed_area, (0, 0))
+            return
+
+        zoomed_size = (int(surf_rect.width * scale), int(surf_rect.height * scale))
+        zoomed_area = pygame.transform.scale(
+            surf, zoomed_size, self._get_zoom_target(zoomed_size)
+        )
         zoomed_rect = zoomed_area.get_frect(center=surf_rect.center)
         FBLITTER.schedule_blit(zoomed_area, zoomed_rect)
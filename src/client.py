@@ -3,12 +3,18 @@ from typing import Callable
 
 from src import xplat
 from src.settings import (
+    IS_WEB,
     # API_KEY,
     # PORT,
     # SERVER_IP,
     SERVER_URL,
+    TELEMETRY_BATCH_INTERVAL,
+    TELEMETRY_BATCH_SIZE,
+    TELEMETRY_QUEUE_SIZE,
     USE_SERVER,
 )
+from src.support import resource_path
+from src.telemetry import TelemetryTransport
 
 # if USE_SERVER and sys.platform not in ("emscripten", "wasm"):
 #     import requests  # type: ignore[import-untyped]
@@ -22,6 +28,23 @@ BAD_PLAY_TOKEN_2 = "zzz"
 
 DUMMY_TELEMETRY_DATA = {"self_assessment": "ok"}
 
+_telemetry_transport: TelemetryTransport | None = None
+
+
+def get_telemetry_transport() -> TelemetryTransport:
+    """Transport telemetry is sent with, on desktop (created on first use)."""
+    global _telemetry_transport
+    if _telemetry_transport is None:
+        _telemetry_transport = TelemetryTransport(
+            f"{SERVER_URL}/telemetry",
+            TELEMETRY_QUEUE_SIZE,
+            # next to the save file, as events are kept there across sessions
+            resource_path("data/telemetry"),
+            TELEMETRY_BATCH_SIZE,
+            TELEMETRY_BATCH_INTERVAL,
+        )
+    return _telemetry_transport
+
 
 def authn(play_token: str, post_login_callback: Callable[[dict], None]) -> None:
     if USE_SERVER:
@@ -54,8 +77,14 @@ def send_telemetry(encoded_jwt: str, payload: dict) -> None:
     # TODO: If needed, we can restructure this to do async callbacks
     # as well, in case we need to react to this telemetry being sent.
     xplat.log(f"Sending telemetry: {payload}")
-    url = f"{SERVER_URL}/telemetry"
     headers = {
         "Authorization": f"Bearer {encoded_jwt}",
     }
-    asyncio.create_task(xplat.post_request(url, headers, payload))
+    if IS_WEB:
+        # the browser already sends requests in the background
+        url = f"{SERVER_URL}/telemetry"
+        asyncio.create_task(xplat.post_request(url, headers, payload))
+    else:
+        # posting on the main thread would stall the game until the server
+        # responded (see src/telemetry.py)
+        get_telemetry_transport().send(headers, payload)
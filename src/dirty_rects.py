@@ -0,0 +1,72 @@
+from typing import Sequence
+
+import pygame
+
+from src.utils import RectLike
+
+
+class DirtyRectTracker:
+    """Presents only the regions of the display surface that were drawn to
+    since the last presented frame.
+
+    While attached to the FBLITTER (FBLITTER.dirty_rect_tracker), everything
+    it draws onto the display surface is reported automatically. Anything
+    drawn directly onto the display surface has to be reported via add,
+    or via add_full if the region isn't known."""
+
+    def __init__(self):
+        self._rects: list[pygame.Rect] = []
+        self._last_rects: list[pygame.Rect] = []
+        self._full = False
+        # nothing was presented so far
+        self._last_full = True
+
+    def invalidate(self):
+        """Make the next call to present update the whole display."""
+        self._last_full = True
+
+    def add(self, rect: RectLike):
+        """Report a region of the display surface drawn to in the current frame."""
+        self._rects.append(pygame.Rect(rect))
+
+    def add_blits(self, blit_seq: Sequence[tuple[pygame.Surface, RectLike]]):
+        """Report the regions covered by a sequence of blits, as passed to fblits."""
+        rects = self._rects
+        for surf, pos in blit_seq:
+            rects.append(pygame.Rect(pos[0], pos[1], *surf.get_size()))
+
+    def add_full(self):
+        """Report that the current frame was drawn to in unknown regions."""
+        self._full = True
+
+    @staticmethod
+    def _drop_covered(rects: list[pygame.Rect]) -> list[pygame.Rect]:
+        """
+        :return: The given rects, without those lying entirely within another one
+                 (most regions get reported again in the following frame).
+        """
+        kept = []
+        for rect in sorted(rects, key=lambda rect: rect.w * rect.h, reverse=True):
+            if not any(other.contains(rect) for other in kept):
+                kept.append(rect)
+        return kept
+
+    def present(self, full: bool = False):
+        """Update the display, limiting the update to the regions reported
+        in this frame and in the last one (whatever was drawn there before has
+        been covered since).
+
+        :param full: Update the whole display (used while the game is running,
+                     since nearly every pixel changes then anyway). What was
+                     drawn in such frames isn't known, so the next one is
+                     updated fully as well."""
+        full = full or self._full
+        if full or self._last_full:
+            pygame.display.update()
+        else:
+            pygame.display.update(self._drop_covered(self._rects + self._last_rects))
+
+        self._last_rects = self._rects
+        self._rects = []
+        self._last_full = full
+        self._full = False
@@ -403,6 +403,16 @@ class EntityState(StrEnum):
 class AIState(IntEnum):
     IDLE = 0
     MOVING = 1
+    # waiting for a requested path (see AIBehaviour.request_path_to_tile)
+    WAITING = 2
+
+
+class DiagonalMovement(IntEnum):
+    """Whether paths may move diagonally between two tiles."""
+
+    NEVER = 0
+    # only if both tiles orthogonally adjacent to the two tiles are walkable
+    ONLY_WHEN_NO_OBSTACLE = 1
 
 
 class Layer(IntEnum):
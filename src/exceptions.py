@@ -28,3 +28,11 @@ class GameMapWarning(DevWarning):
 
 class CameraWarning(DevWarning):
     """Camera-related warning category."""
+
+
+class AssetAtlasWarning(DevWarning):
+    """Asset atlas-related warning category."""
+
+
+class ReplayWarning(DevWarning):
+    """Warning category of recorded and replayed sessions."""
@@ -1,13 +1,103 @@
-from typing import Sequence
+from functools import lru_cache
+from typing import Callable, Sequence
 
 import pygame
 
 # from pygame.typing import ColorLike, Point, RectLike
 from src.colors import SL_ORANGE_BRIGHT, SL_ORANGE_DARK, SL_ORANGE_DARKER
+from src.dirty_rects import DirtyRectTracker
 from src.settings import SCREEN_HEIGHT, SCREEN_WIDTH
 from src.support import get_translated_string
 from src.utils import Point, RectLike, ColorLike
 
+_RASTER_CACHE_SIZE = 512
+"""Maximum number of rasterized rects kept around for reuse."""
+
+_BOX_PADDING = 12
+_BOX_OUTER_LINE_WIDTH = 3
+_BOX_INNER_LINE_WIDTH = 8
+
+type _DrawCommand = Callable[[pygame.Surface], object]
+type _BlitList = list[tuple[pygame.Surface, RectLike]]
+
+
+def _hashable_color(color: ColorLike):
+    if isinstance(color, (str, int, tuple)):
+        return color
+    return tuple(pygame.Color(color))
+
+
+@lru_cache(maxsize=_RASTER_CACHE_SIZE)
+def _rasterize_rect(
+    size: tuple[float, float],
+    color: ColorLike,
+    width: int,
+    border_radius: int,
+    border_top_left_radius: int,
+    border_top_right_radius: int,
+    border_bottom_left_radius: int,
+    border_bottom_right_radius: int,
+) -> pygame.Surface:
+    """Surfaces returned from here are shared, they must not be modified."""
+    computed_surf = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.rect(
+        computed_surf,
+        color,
+        pygame.Rect((0, 0), size),
+        width,
+        border_radius,
+        border_top_left_radius,
+        border_top_right_radius,
+        border_bottom_left_radius,
+        border_bottom_right_radius,
+    )
+    return computed_surf
+
+
+@lru_cache(maxsize=_RASTER_CACHE_SIZE)
+def _rasterize_box(size: tuple[int, int]) -> pygame.Surface:
+    """Renders the box used by FBLITTER.draw_box, with the background having the given size.
+    The background's topleft is at (_BOX_OUTER_LINE_WIDTH + _BOX_INNER_LINE_WIDTH, _BOX_INNER_LINE_WIDTH).
+    Surfaces returned from here are shared, they must not be modified."""
+    outer_line_width = _BOX_OUTER_LINE_WIDTH
+    inner_line_width = _BOX_INNER_LINE_WIDTH
+    rect = pygame.Rect((outer_line_width + inner_line_width, inner_line_width), size)
+    computed_surf = pygame.Surface(
+        (
+            rect.w + inner_line_width * 2 + outer_line_width * 2,
+            rect.h + inner_line_width * 2 + outer_line_width,
+        ),
+        pygame.SRCALPHA,
+    )
+
+    # border shadow
+    pygame.draw.rect(
+        computed_surf,
+        SL_ORANGE_DARKER,
+        pygame.Rect(
+            rect.x - inner_line_width - outer_line_width,
+            rect.y - inner_line_width + outer_line_width,
+            rect.w + inner_line_width * 2 + outer_line_width * 2,
+            rect.h + inner_line_width * 2,
+        ),
+        border_radius=16,
+    )
+    # border
+    pygame.draw.rect(
+        computed_surf,
+        SL_ORANGE_DARK,
+        pygame.Rect(
+            rect.x - inner_line_width,
+            rect.y - inner_line_width,
+            rect.w + inner_line_width * 2,
+            rect.h + inner_line_width * 2,
+        ),
+        border_radius=16,
+    )
+    # background
+    pygame.draw.rect(computed_surf, SL_ORANGE_BRIGHT, rect, border_radius=12)
+    return computed_surf
+
 
 class _FBlitterType:
     """Singleton type allowing for uniform fast blitting across every other file."""
@@ -24,8 +114,20 @@ class _FBlitterType:
             (SCREEN_WIDTH, SCREEN_HEIGHT)
         )
         pygame.display.set_caption(get_translated_string("game_title"))
-        self._current_blit_list = []
-        self._default_blit_list = []
+        # Everything to draw is kept in an ordered command buffer (one per target surface).
+        # It consists of lists of blits, performed in a single fblits call each,
+        # and of drawing commands (primitives, special blits) in between them.
+        # The last element is always the list new blits get added to.
+        self._current_blit_list: _BlitList = []
+        self._current_commands: list[_BlitList | _DrawCommand] = [
+            self._current_blit_list
+        ]
+        self._default_blit_list: _BlitList = []
+        self._default_commands: list[_BlitList | _DrawCommand] = [
+            self._default_blit_list
+        ]
+        # if set, every region drawn onto the display surface is reported to it
+        self.dirty_rect_tracker: DirtyRectTracker | None = None
 
     @property
     def is_on_display_surf(self):
@@ -42,17 +144,60 @@ class _FBlitterType:
         if self.is_on_display_surf and surf is self._default_surf:
             return
         self.current_surf = surf
-        self._current_blit_list.clear()
+        self._current_blit_list = []
+        self._current_commands = [self._current_blit_list]
+
+    def _run_commands(
+        self,
+        commands: list[_BlitList | _DrawCommand],
+        tracker: DirtyRectTracker | None = None,
+    ):
+        surf = self.current_surf
+        for command in commands:
+            if command.__class__ is list:
+                if command:
+                    surf.fblits(command)
+                    if tracker:
+                        tracker.add_blits(command)
+            else:
+                # drawing functions and blit return the affected rect
+                rect = command(surf)
+                if tracker and rect is not None:
+                    tracker.add(rect)
 
     def _blit_all_internal(self):
         if self.is_on_display_surf:
-            self.current_surf.fblits(self._default_blit_list)
-            self._default_blit_list.clear()
+            commands = self._default_commands
+            self._default_blit_list = []
+            self._default_commands = [self._default_blit_list]
+            self._run_commands(commands, self.dirty_rect_tracker)
             return True
-        self.current_surf.fblits(self._current_blit_list)
-        self._current_blit_list.clear()
+        commands = self._current_commands
+        self._current_blit_list = []
+        self._current_commands = [self._current_blit_list]
+        self._run_commands(commands)
         return False
 
+    def _schedule_command(self, command: _DrawCommand):
+        """Add a drawing command to the buffer, after everything scheduled so far."""
+        if self.is_on_display_surf:
+            commands, blit_list = self._default_commands, self._default_blit_list
+        else:
+            commands, blit_list = self._current_commands, self._current_blit_list
+
+        if not blit_list:
+            # group consecutive commands instead of separating them by empty blit lists
+            commands.insert(-1, command)
+            return
+
+        commands.append(command)
+        blit_list = []
+        commands.append(blit_list)
+        if self.is_on_display_surf:
+            self._default_blit_list = blit_list
+        else:
+            self._current_blit_list = blit_list
+
     def blit_all(self):
         """Blits everything saved for the current surface and then resets the current surface to the default display surface.
 
@@ -60,8 +205,9 @@ class _FBlitterType:
         return self._blit_all_internal() or self.reset_to_default_surf()
 
     def blit_with_special_flags(self, surf: pygame.Surface, pos: RectLike, flags: int):
-        self._blit_all_internal()
-        self.current_surf.blit(surf, pos, special_flags=flags)
+        self._schedule_command(
+            lambda target: target.blit(surf, pos, special_flags=flags)
+        )
 
     def schedule_blit(self, surf: pygame.Surface, pos: RectLike):
         if self.is_on_display_surf:
@@ -89,11 +235,9 @@ class _FBlitterType:
         """Allows for pygame.draw.rect to be executed while still performing fast blitting.
         See pygame.draw.rect for documentation.
         (The surface parameter is the current surface set in the fblitter.)"""
-        computed_surf = pygame.Surface(rect.size, pygame.SRCALPHA)
-        pygame.draw.rect(
-            computed_surf,
-            color,
-            pygame.Rect((0, 0), rect.size),
+        computed_surf = _rasterize_rect(
+            tuple(rect.size),
+            _hashable_color(color),
             width,
             border_radius,
             border_top_left_radius,
@@ -103,10 +247,16 @@ class _FBlitterType:
         )
         self.schedule_blit(computed_surf, rect)
 
+    # The primitives below are drawn when the scheduled blits get performed,
+    # in the order they were scheduled in. Their arguments are copied,
+    # so they can safely be modified once the primitive was scheduled.
+
     def draw_polygon(self, color: ColorLike, points: Sequence[Point], width=0):
         """See pygame.draw.polygon for reference."""
-        self._blit_all_internal()
-        pygame.draw.polygon(self.current_surf, color, points, width)
+        points = tuple(map(tuple, points))
+        self._schedule_command(
+            lambda surf: pygame.draw.polygon(surf, color, points, width)
+        )
 
     def draw_circle(
         self,
@@ -114,23 +264,25 @@ class _FBlitterType:
         center: Point,
         radius: int | float,
         width=0,
-        draw_top_right=None,
-        draw_top_left=None,
-        draw_bottom_left=None,
-        draw_bottom_right=None,
+        draw_top_right=False,
+        draw_top_left=False,
+        draw_bottom_left=False,
+        draw_bottom_right=False,
     ):
         """See pygame.draw.circle for reference."""
-        self._blit_all_internal()
-        pygame.draw.circle(
-            self.current_surf,
-            color,
-            center,
-            radius,
-            width,
-            draw_top_right,
-            draw_top_left,
-            draw_bottom_left,
-            draw_bottom_right,
+        center = tuple(center)
+        self._schedule_command(
+            lambda surf: pygame.draw.circle(
+                surf,
+                color,
+                center,
+                radius,
+                width,
+                draw_top_right,
+                draw_top_left,
+                draw_bottom_left,
+                draw_bottom_right,
+            )
         )
 
     def draw_aacircle(
@@ -139,29 +291,33 @@ class _FBlitterType:
         center: Point,
         radius: int | float,
         width=0,
-        draw_top_right=None,
-        draw_top_left=None,
-        draw_bottom_left=None,
-        draw_bottom_right=None,
+        draw_top_right=False,
+        draw_top_left=False,
+        draw_bottom_left=False,
+        draw_bottom_right=False,
     ):
         """See pygame.draw.aacircle for reference."""
-        self._blit_all_internal()
-        pygame.draw.aacircle(
-            self.current_surf,
-            color,
-            center,
-            radius,
-            width,
-            draw_top_right,
-            draw_top_left,
-            draw_bottom_left,
-            draw_bottom_right,
+        center = tuple(center)
+        self._schedule_command(
+            lambda surf: pygame.draw.aacircle(
+                surf,
+                color,
+                center,
+                radius,
+                width,
+                draw_top_right,
+                draw_top_left,
+                draw_bottom_left,
+                draw_bottom_right,
+            )
         )
 
     def draw_ellipse(self, color: ColorLike, rect: pygame.Rect, width=0):
         """See pygame.draw.ellipse for reference."""
-        self._blit_all_internal()
-        pygame.draw.ellipse(self.current_surf, color, rect, width)
+        rect = pygame.FRect(rect)
+        self._schedule_command(
+            lambda surf: pygame.draw.ellipse(surf, color, rect, width)
+        )
 
     def draw_arc(
         self,
@@ -172,67 +328,59 @@ class _FBlitterType:
         width=1,
     ):
         """See pygame.draw.arc for reference."""
-        self._blit_all_internal()
-        pygame.draw.arc(self.current_surf, color, rect, start_angle, stop_angle, width)
+        rect = pygame.FRect(rect)
+        self._schedule_command(
+            lambda surf: pygame.draw.arc(
+                surf, color, rect, start_angle, stop_angle, width
+            )
+        )
 
     def draw_line(self, color: ColorLike, start_pos: Point, end_pos: Point, width=1):
         """See pygame.draw.line for reference."""
-        self._blit_all_internal()
-        pygame.draw.line(self.current_surf, color, start_pos, end_pos, width)
+        start_pos, end_pos = tuple(start_pos), tuple(end_pos)
+        self._schedule_command(
+            lambda surf: pygame.draw.line(surf, color, start_pos, end_pos, width)
+        )
 
     def draw_lines(
         self, color: ColorLike, closed: bool, points: Sequence[Point], width=1
     ):
         """See pygame.draw.lines for reference."""
-        self._blit_all_internal()
-        pygame.draw.lines(self.current_surf, color, closed, points, width)
+        points = tuple(map(tuple, points))
+        self._schedule_command(
+            lambda surf: pygame.draw.lines(surf, color, closed, points, width)
+        )
 
     def draw_aaline(self, color: ColorLike, start_pos: Point, end_pos: Point, width=1):
         """See pygame.draw.aaline for reference."""
-        self._blit_all_internal()
-        pygame.draw.aaline(self.current_surf, color, start_pos, end_pos, width)
+        start_pos, end_pos = tuple(start_pos), tuple(end_pos)
+        self._schedule_command(
+            lambda surf: pygame.draw.aaline(surf, color, start_pos, end_pos, width)
+        )
 
     def draw_aalines(self, color: ColorLike, closed: bool, points: Sequence[Point]):
         """See pygame.draw.aalines for reference."""
-        self._blit_all_internal()
-        pygame.draw.aalines(self.current_surf, color, closed, points)
+        points = tuple(map(tuple, points))
+        self._schedule_command(
+            lambda surf: pygame.draw.aalines(surf, color, closed, points)
+        )
 
     def draw_box(self, pos: Point, size: Point):
         """Draws a box. Used in the cow herding overlay."""
-        padding = 12
-        outer_line_width = 3
-        inner_line_width = 8
+        padding = _BOX_PADDING
         rect = pygame.Rect(
             pos[0] - size[0] / 2 - padding,
             pos[1] - size[1] / 2 - padding,
             size[0] + padding * 2,
             size[1] + padding * 2,
         )
-
-        # border shadow
-        self.draw_rect(
-            SL_ORANGE_DARKER,
-            pygame.Rect(
-                rect.x - inner_line_width - outer_line_width,
-                rect.y - inner_line_width + outer_line_width,
-                rect.w + inner_line_width * 2 + outer_line_width * 2,
-                rect.h + inner_line_width * 2,
-            ),
-            border_radius=16,
-        )
-        # border
-        self.draw_rect(
-            SL_ORANGE_DARK,
-            pygame.Rect(
-                rect.x - inner_line_width,
-                rect.y - inner_line_width,
-                rect.w + inner_line_width * 2,
-                rect.h + inner_line_width * 2,
+        self.schedule_blit(
+            _rasterize_box(rect.size),
+            (
+                rect.x - _BOX_INNER_LINE_WIDTH - _BOX_OUTER_LINE_WIDTH,
+                rect.y - _BOX_INNER_LINE_WIDTH,
             ),
-            border_radius=16,
         )
-        # background
-        self.draw_rect(SL_ORANGE_BRIGHT, rect, border_radius=12)
 
 
 FBLITTER = _FBlitterType()  # noqa
@@ -0,0 +1,33 @@
+"""Time as seen by the game.
+
+Everything that depends on time (timers, the in-game clock, animations...)
+reads it from here instead of pygame.time.get_ticks or time.time. The clock is
+only advanced by Game.run, once per frame, by the duration of the frame. This
+way, a replayed session (see src/replay.py) sees exactly the same time as the
+recorded one, however fast it is replayed.
+"""
+
+_ticks = 1
+# starts at 1, as Timers treat a start time of 0 as not started
+
+
+def get_ticks() -> int:
+    """
+    :return: Milliseconds since the game started, as of the current frame
+    """
+    return _ticks
+
+
+def get_time() -> float:
+    """
+    :return: Seconds since the game started, as of the current frame
+    """
+    return _ticks / 1000
+
+
+def advance(milliseconds: int):
+    """
+    Advance the clock by the duration of a frame.
+    """
+    global _ticks
+    _ticks += milliseconds
@@ -1,8 +1,23 @@
+from itertools import count
+
 import pygame
 
 from src.camera import Camera
 from src.enums import Layer
 from src.fblitter import FBLITTER
+from src.settings import SCALED_TILE_SIZE, SCREEN_HEIGHT, SCREEN_WIDTH
+
+# Layers on which sprites can overlap each other depending on their position,
+# and thus have to be drawn in the order of their hitbox's bottom
+Y_SORTED_LAYERS = frozenset((Layer.PLANT, Layer.MAIN))
+
+# Layers containing sprites which can be positioned in screen space
+# (e.g. dialogue text boxes), and that should therefore never be culled
+_UNCULLED_LAYERS = frozenset((Layer.TEXT_BOX,))
+
+# Additional space around the screen in which sprites are still drawn, so that
+# camera quakes and parts of sprites drawn outside their rect don't pop in
+_CULLING_MARGIN = SCALED_TILE_SIZE
 
 
 class PersistentSpriteGroup(pygame.sprite.Group):
@@ -36,29 +51,218 @@ class PersistentSpriteGroup(pygame.sprite.Group):
         """
         super().empty()
 
+    def non_persistent_sprites(self) -> list[pygame.sprite.Sprite]:
+        """
+        :return: All Sprites which would be removed when calling Group.empty,
+                 in the order of the Group
+        """
+        persistent = set(self._persistent_sprites)
+        return [sprite for sprite in self if sprite not in persistent]
+
+
+class SpatialSpriteGroup(PersistentSpriteGroup):
+    _cells: dict[tuple[int, int], set[pygame.sprite.Sprite]]
+    _sprite_cells: dict[pygame.sprite.Sprite, tuple[int, int, int, int]]
+    _sprite_order: dict[pygame.sprite.Sprite, int]
+    _unregistered: dict[pygame.sprite.Sprite, None]
 
-# TODO : we could replace this with pygame.sprite.LayeredUpdates, as that
-#  is a subclass of pygame.sprite.Group that natively supports layers
+    def __init__(self, *sprites):
+        """
+        This PersistentSpriteGroup subclass indexes the hitboxes of its Sprites
+        in a uniform grid of map tiles, so that all Sprites near a certain area
+        can be retrieved without iterating over the entire Group.
+
+        Sprites are only registered in the grid the next time it is queried, as
+        most Sprites set their hitbox after having been added to their Groups.
+        Sprites moving after that have to be re-registered by calling
+        SpatialSpriteGroup.update_sprite.
+        """
+        self._cells = {}
+        self._sprite_cells = {}
+        self._sprite_order = {}
+        self._unregistered = {}
+        self._order_counter = count()
+        super().__init__(*sprites)
+
+    @staticmethod
+    def _get_cell_span(rect: pygame.Rect | pygame.FRect):
+        return (
+            int(rect.left // SCALED_TILE_SIZE),
+            int(rect.top // SCALED_TILE_SIZE),
+            int(rect.right // SCALED_TILE_SIZE),
+            int(rect.bottom // SCALED_TILE_SIZE),
+        )
+
+    def _register(self, sprite: pygame.sprite.Sprite):
+        span = self._get_cell_span(sprite.hitbox_rect)
+        self._sprite_cells[sprite] = span
+        for x in range(span[0], span[2] + 1):
+            for y in range(span[1], span[3] + 1):
+                self._cells.setdefault((x, y), set()).add(sprite)
+
+    def _unregister(self, sprite: pygame.sprite.Sprite):
+        span = self._sprite_cells.pop(sprite)
+        for x in range(span[0], span[2] + 1):
+            for y in range(span[1], span[3] + 1):
+                self._cells[(x, y)].discard(sprite)
+
+    def _register_pending(self):
+        for sprite in self._unregistered:
+            self._register(sprite)
+        self._unregistered.clear()
+
+    def add_internal(self, sprite: pygame.sprite.Sprite, layer=None):
+        super().add_internal(sprite, layer)
+        # Group order is kept track of, so that queries return Sprites in the
+        # same order in which they would be iterated over
+        self._sprite_order[sprite] = next(self._order_counter)
+        self._unregistered[sprite] = None
+
+    def remove_internal(self, sprite: pygame.sprite.Sprite):
+        super().remove_internal(sprite)
+        del self._sprite_order[sprite]
+        if sprite in self._unregistered:
+            del self._unregistered[sprite]
+        else:
+            self._unregister(sprite)
+
+    def update_sprite(self, sprite: pygame.sprite.Sprite):
+        """
+        Update the grid cells the given Sprite is registered in.
+        Should be called whenever the hitbox of a Sprite in this Group moved.
+        """
+        span = self._sprite_cells.get(sprite)
+        if span is None or span == self._get_cell_span(sprite.hitbox_rect):
+            return
+        self._unregister(sprite)
+        self._register(sprite)
+
+    def sprites_near(
+        self,
+        rect: pygame.Rect | pygame.FRect,
+        after: pygame.sprite.Sprite | None = None,
+    ) -> list[pygame.sprite.Sprite]:
+        """
+        :param rect: Area to search Sprites in
+        :param after: [Optional] Only Sprites that come after this Sprite in
+                      the Group's order will be returned
+        :return: All Sprites whose hitbox is located in a grid cell the given
+                 rect intersects with, in the order of the Group
+        """
+        self._register_pending()
+
+        span = self._get_cell_span(rect)
+        near = set()
+        for x in range(span[0], span[2] + 1):
+            for y in range(span[1], span[3] + 1):
+                cell = self._cells.get((x, y))
+                if cell:
+                    near.update(cell)
+
+        order = self._sprite_order
+        if after is not None:
+            after_index = order[after]
+            return sorted(
+                (sprite for sprite in near if order[sprite] > after_index),
+                key=order.__getitem__,
+            )
+        return sorted(near, key=order.__getitem__)
 
 
 class AllSprites(PersistentSpriteGroup):
+    _layer_buckets: dict[int | None, dict[pygame.sprite.Sprite, None]]
+    _sprite_layers: dict[pygame.sprite.Sprite, int | None]
+
     def __init__(self, *sprites):
+        """
+        Group containing every Sprite that should be drawn on the screen.
+
+        Sprites are kept in one bucket per z-Layer, so that drawing does not
+        require iterating over all Sprites once per Layer. Only Sprites
+        intersecting with the camera's view are drawn, and only the Sprites of
+        the Layers in Y_SORTED_LAYERS are sorted by their hitbox's bottom.
+        """
+        # buckets have to exist before calling the parent constructor,
+        # as it already adds the given sprites
+        self._layer_buckets = {layer: {} for layer in Layer}
+        self._sprite_layers = {}
         super().__init__(*sprites)
         self.display_surface = pygame.display.get_surface()
         self.offset = pygame.Vector2()
         self.cam_surf = pygame.Surface(self.display_surface.get_size())
+        self.view_rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def _add_to_bucket(self, sprite: pygame.sprite.Sprite):
+        # Sprite.z is not yet set while a Sprite is being initialised, in which
+        # case it will be moved to the right bucket during the next draw call
+        layer = getattr(sprite, "z", None)
+        self._layer_buckets.setdefault(layer, {})[sprite] = None
+        self._sprite_layers[sprite] = layer
+
+    def add_internal(self, sprite: pygame.sprite.Sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self._add_to_bucket(sprite)
+
+    def remove_internal(self, sprite: pygame.sprite.Sprite):
+        super().remove_internal(sprite)
+        del self._layer_buckets[self._sprite_layers.pop(sprite)][sprite]
 
     def update_blocked(self, dt: float):
         for sprite in self:
             getattr(sprite, "update_blocked", sprite.update)(dt)
 
-    def draw(self, camera: Camera, game_paused: bool):
-        sorted_sprites = sorted(self.sprites(), key=lambda spr: spr.hitbox_rect.bottom)
+    def update_view_rect(self, camera: Camera):
+        """
+        Update the area of the map that is currently visible on the screen.
+        """
+        self.view_rect.update(
+            -camera.state.left - _CULLING_MARGIN,
+            -camera.state.top - _CULLING_MARGIN,
+            SCREEN_WIDTH + _CULLING_MARGIN * 2,
+            SCREEN_HEIGHT + _CULLING_MARGIN * 2,
+        )
+
+    def get_visible_sprites(self) -> dict[int, list[pygame.sprite.Sprite]]:
+        """
+        :return: All Sprites intersecting with the current view_rect, sorted
+                 into lists by their z-Layer
+        """
+        view_rect = self.view_rect
+        visible = {layer: [] for layer in Layer}
+        moved_sprites = []
 
-        for layer in Layer:
-            for sprite in sorted_sprites:
-                # including game_paused condition to prevent drawing overlaps between tutorial text boxes and menus
-                if sprite.z == layer and not game_paused:
+        for layer, bucket in self._layer_buckets.items():
+            target = visible.get(layer)
+            culled = layer not in _UNCULLED_LAYERS
+            for sprite in bucket:
+                if sprite.z != layer:
+                    moved_sprites.append(sprite)
+                elif target is not None and (
+                    not culled or view_rect.colliderect(sprite.rect)
+                ):
+                    target.append(sprite)
+
+        # Sprites whose z-Layer changed since they were added to their bucket
+        for sprite in moved_sprites:
+            del self._layer_buckets[self._sprite_layers[sprite]][sprite]
+            self._add_to_bucket(sprite)
+            target = visible.get(sprite.z)
+            if target is not None and (
+                sprite.z in _UNCULLED_LAYERS or view_rect.colliderect(sprite.rect)
+            ):
+                target.append(sprite)
+
+        for layer in Y_SORTED_LAYERS:
+            visible[layer].sort(key=lambda spr: spr.hitbox_rect.bottom)
+
+        return visible
+
+    def draw(self, camera: Camera, game_paused: bool):
+        # including game_paused condition to prevent drawing overlaps between tutorial text boxes and menus
+        if not game_paused:
+            self.update_view_rect(camera)
+            for sprites in self.get_visible_sprites().values():
+                for sprite in sprites:
                     sprite.draw(self.display_surface, camera.apply(sprite), camera)
 
         FBLITTER.reset_to_default_surf()
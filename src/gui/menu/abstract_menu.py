@@ -2,11 +2,11 @@ from abc import ABC, abstractmethod
 
 import pygame
 from pygame.math import Vector2 as vector
-from pygame.mouse import get_pressed as mouse_buttons
 
 from src.enums import CustomCursor
 from src.events import SET_CURSOR, post_event
 from src.fblitter import FBLITTER
+from src.replay import get_mouse_buttons as mouse_buttons
 from src.settings import SCREEN_HEIGHT, SCREEN_WIDTH
 from src.support import get_translated_string, resource_path
 
@@ -19,6 +19,10 @@ class AbstractMenu(ABC):
     Most of the time, you will override GeneralMenu instead
     (which is a subclass of this) when making new menus and screens here."""
 
+    # Whether the menu draws directly onto the display surface, instead of only
+    # through the FBLITTER. Partial display updates can't tell where it drew then.
+    draws_on_display_surface = False
+
     def __init__(self, title, size, center=vector()):
         self.title = title
         self.size = size
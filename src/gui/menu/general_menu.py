@@ -2,11 +2,11 @@ from collections.abc import Callable
 
 import pygame
 from pygame.math import Vector2 as vector
-from pygame.mouse import get_pressed as mouse_buttons
 
 from src.enums import GameState
 from src.gui.menu.abstract_menu import AbstractMenu
 from src.gui.menu.components import Button
+from src.replay import get_mouse_buttons as mouse_buttons
 
 
 class GeneralMenu(AbstractMenu):
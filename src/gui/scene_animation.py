@@ -1,8 +1,8 @@
-import time
 from typing import Callable, Iterable
 
 import pygame
 
+from src import game_clock
 from src.camera.camera_target import CameraTarget
 from src.settings import DEFAULT_ANIMATION_NAME
 
@@ -67,7 +67,7 @@ class SceneAnimation:
         return self.pause_start_time is not None
 
     def pause_not_finished(self):
-        elapsed_pause_time = time.time() - self.pause_start_time
+        elapsed_pause_time = game_clock.get_time() - self.pause_start_time
         pause_duration = self.targets[self.current_index].pause
         return elapsed_pause_time < pause_duration
 
@@ -83,7 +83,7 @@ class SceneAnimation:
 
         if distance_to_target <= current_target.speed * dt:
             self.rect.center = self.current_pos = target_pos
-            self.pause_start_time = time.time()
+            self.pause_start_time = game_clock.get_time()
         else:
             direction = direction.normalize()
             self.current_pos += direction * current_target.speed * dt
@@ -0,0 +1,179 @@
+"""Lazy loading and caching of the game's .tmx maps.
+
+Parsing a .tmx file (and the tilesets it references) with pytmx is slow,
+so maps are only loaded the first time they are needed, and parsed maps are
+cached on disk (without their images), keyed by the hash of their source files.
+"""
+
+import hashlib
+import os
+import pickle
+import re
+import warnings
+from collections.abc import Iterator, Mapping
+
+import pytmx  # type:ignore [import-untyped]
+from pytmx.util_pygame import pygame_image_loader  # type:ignore [import-untyped]
+
+from src.exceptions import GameMapWarning
+from src.settings import IS_WEB
+
+MAP_CACHE_VERSION = 1
+"""Increase whenever the cache format changes, or when updating pytmx."""
+
+_TILESET_SOURCE_PATTERN = re.compile(rb'<tileset[^>]*\ssource="([^"]+)"')
+
+
+def _new_element(cls: type):
+    # pytmx elements look up unknown attributes in their properties,
+    # which causes infinite recursions if done before their __dict__ is restored
+    return cls.__new__(cls)
+
+
+def _set_element_state(element, state: dict):
+    element.__dict__.update(state)
+    return element
+
+
+class _TiledMapPickler(pickle.Pickler):
+    """Pickles pytmx elements without the images they reference."""
+
+    def reducer_override(self, obj):
+        if isinstance(obj, (pytmx.TiledElement, pytmx.TiledClassType)):
+            state = obj.__dict__
+            if isinstance(obj, pytmx.TiledMap):
+                state = state | {"images": []}
+            list_items = iter(obj) if isinstance(obj, list) else None
+            return (
+                _new_element,
+                (type(obj),),
+                state,
+                list_items,
+                None,
+                _set_element_state,
+            )
+        return NotImplemented
+
+
+def _get_source_hash(tmx_file: str) -> str:
+    """
+    :return: Hash of the given .tmx file and of the tilesets it references
+    """
+    digest = hashlib.sha1(f"{MAP_CACHE_VERSION}:{pytmx.__version__}".encode())
+    with open(tmx_file, "rb") as file:
+        data = file.read()
+    digest.update(data)
+    for source in _TILESET_SOURCE_PATTERN.findall(data):
+        tileset_file = os.path.join(os.path.dirname(tmx_file), source.decode())
+        with open(tileset_file, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class MapCache(Mapping[str, pytmx.TiledMap]):
+    def __init__(self, tmx_path: str, cache_path: str | None = None):
+        """
+        Behaves like a dict of all maps in the given folder, but maps are only
+        loaded the first time they are accessed.
+
+        :param tmx_path: Folder containing the .tmx files
+        :param cache_path: Folder parsed maps are cached in,
+                           None to always parse the .tmx files
+        """
+        self.cache_path = cache_path
+        self._files = {}
+        for folder_path, _, file_names in os.walk(tmx_path):
+            for file_name in file_names:
+                full_path = os.path.join(folder_path, file_name)
+                self._files[file_name.split(".")[0]] = full_path
+        self._maps: dict[str, pytmx.TiledMap] = {}
+        # maps which were read in advance, but whose images are not loaded yet
+        self._prefetched: dict[str, pytmx.TiledMap | None] = {}
+
+    def __getitem__(self, map_name: str) -> pytmx.TiledMap:
+        if map_name not in self._maps:
+            self._maps[map_name] = self._load(map_name, self._files[map_name])
+        return self._maps[map_name]
+
+    def __contains__(self, map_name) -> bool:
+        return map_name in self._files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _get_cache_file(self, map_name: str, source_hash: str) -> str:
+        return os.path.join(self.cache_path, f"{map_name}-{source_hash}.pickle")
+
+    def prefetch(self, map_name: str):
+        """
+        Reads the given map in advance, so that only its images have to be
+        loaded when it is first accessed. As this does not require the display,
+        it can be done on another thread (see src/preloader.py), as long as the
+        map isn't accessed at the same time.
+        """
+        if map_name not in self._maps and map_name not in self._prefetched:
+            self._prefetched[map_name] = self._read(map_name, self._files[map_name])
+
+    def _read(self, map_name: str, tmx_file: str) -> pytmx.TiledMap | None:
+        """
+        :return: The map (without its images) from the cache if possible,
+                 otherwise parsed from its .tmx file and added to the cache.
+                 None if the map can't be loaded without its images
+        """
+        if self.cache_path is None:
+            return None
+
+        source_hash = _get_source_hash(tmx_file)
+        cache_file = self._get_cache_file(map_name, source_hash)
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, "rb") as file:
+                    tilemap = pickle.load(file)
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                warnings.warn(
+                    f"Could not load cached map {map_name}: {e}", GameMapWarning
+                )
+            else:
+                tilemap.filename = tmx_file
+                return tilemap
+
+        # without an image loader, pytmx only keeps track of which images to load
+        tilemap = pytmx.TiledMap(tmx_file)
+        if any(isinstance(layer, pytmx.TiledImageLayer) for layer in tilemap.layers):
+            # reloading the images of image layers registers new gids for them,
+            # so their images have to be loaded while parsing the map
+            return None
+        # the web version can't persist anything between runs
+        if not IS_WEB:
+            self._save(map_name, tilemap, cache_file)
+        return tilemap
+
+    def _load(self, map_name: str, tmx_file: str) -> pytmx.TiledMap:
+        if map_name in self._prefetched:
+            tilemap = self._prefetched.pop(map_name)
+        else:
+            tilemap = self._read(map_name, tmx_file)
+        if tilemap is None:
+            return pytmx.util_pygame.load_pygame(tmx_file)
+
+        tilemap.image_loader = pygame_image_loader
+        tilemap.reload_images()
+        return tilemap
+
+    def _save(self, map_name: str, tilemap: pytmx.TiledMap, cache_file: str):
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            with open(cache_file + ".tmp", "wb") as file:
+                _TiledMapPickler(file, pickle.HIGHEST_PROTOCOL).dump(tilemap)
+            os.replace(cache_file + ".tmp", cache_file)
+
+            # remove outdated versions of this map
+            for file_name in os.listdir(self.cache_path):
+                full_path = os.path.join(self.cache_path, file_name)
+                if file_name.startswith(f"{map_name}-") and full_path != cache_file:
+                    os.remove(full_path)
+        except (OSError, pickle.PicklingError) as e:
+            warnings.warn(f"Could not cache map {map_name}: {e}", GameMapWarning)
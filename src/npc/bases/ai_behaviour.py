@@ -1,17 +1,27 @@
+import math
 import random
 import warnings
 from abc import ABC
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
+from itertools import count
 
 import pygame
-from pathfinding.core.grid import Grid  # type: ignore[import-untyped]
 
 from src.enums import AIState
 from src.npc.bases.ai_behaviour_base import AIBehaviourBase
 from src.npc.behaviour.ai_behaviour_tree_base import ContextType, NodeWrapper
+from src.npc.path_finding import PathfindingGrid, TileOccupancy
+from src.npc.path_scheduler import PathRequest
 from src.npc.path_scripting import AIScriptedPath
 from src.settings import SCALED_TILE_SIZE
 
+TICK_STAGGER_SLOTS = 8
+"""Number of evenly spaced points in time during the tick interval of a
+continuous behaviour tree, which the Entities running it are distributed on (in
+the order they get the tree), so that they don't all run it in the same frame."""
+
+_tick_slots = count()
+
 
 class AIBehaviour(AIBehaviourBase, ABC):
     def __init__(self, behaviour_tree_context: ContextType):  # noqa
@@ -26,6 +36,7 @@ class AIBehaviour(AIBehaviourBase, ABC):
         self.pf_state_duration = 1 + random.random() * 3
 
         self.pf_path = []
+        self._pf_request: PathRequest | None = None
 
         self._script = None
 
@@ -55,12 +66,23 @@ class AIBehaviour(AIBehaviourBase, ABC):
     @continuous_behaviour_tree.setter
     def continuous_behaviour_tree(self, value: NodeWrapper | None):
         self._continuous_behaviour_tree = value
+        # time until the tree is run next
+        self._continuous_tick_time = 0
+        if value is not None:
+            slot = next(_tick_slots) % TICK_STAGGER_SLOTS
+            self._continuous_tick_time = value.tick_interval * slot / TICK_STAGGER_SLOTS
 
     def on_path_abortion(self, func: Callable[[], None]):
         self.__on_path_abortion_funcs.append(func)
         return
 
+    def _cancel_pf_request(self):
+        if self._pf_request is not None:
+            self._pf_request.cancel()
+            self._pf_request = None
+
     def abort_path(self):
+        self._cancel_pf_request()
         self.pf_state = AIState.IDLE
         self.direction.update((0, 0))
         self.pf_state_duration = 1 + random.random() * 1
@@ -76,6 +98,7 @@ class AIBehaviour(AIBehaviourBase, ABC):
         return
 
     def complete_path(self):
+        self._cancel_pf_request()
         self.pf_state = AIState.IDLE
         self.direction.update((0, 0))
         self.pf_state_duration = 2 + random.random() * 3
@@ -135,81 +158,191 @@ class AIBehaviour(AIBehaviourBase, ABC):
             return
 
         if self._script.next_state == AIState.IDLE:
-            if self.pf_state == AIState.MOVING:
+            if self.pf_state != AIState.IDLE:
                 self.abort_path()
             self.pf_state_duration = waypoint.waiting_duration
             self._script.next_state = AIState.MOVING
         else:
-            self.create_path_to_tile(waypoint.pos)
+            self.request_path_to_tile(waypoint.pos)
             self.speed = waypoint.speed
             self._script.next_state = AIState.IDLE
             self._script.index += 1
 
-    def create_path_to_tile(self, coord: tuple[int, int], pf_grid: Grid = None) -> bool:
+    def _get_pf_start_tile(self, pf_grid: PathfindingGrid) -> tuple[int, int] | None:
+        """
+        :return: Tile the Entity is currently standing on,
+                 None if it is outside the pathfinding grid
+        """
+        # current NPC position on the tilemap
+        tile_coord = (
+            pygame.Vector2(self.hitbox_rect.centerx, self.hitbox_rect.centery)
+            / SCALED_TILE_SIZE
+        )
+        start = (int(tile_coord.x), int(tile_coord.y))
+        if not pf_grid.inside(*start):
+            # FIXME: Occurs when NPCs get stuck inside each other at the edge
+            #  of the map and one of them gets pushed out of the walkable area
+            warnings.warn(f"NPC is at invalid location {tile_coord}")
+            return None
+        return start
+
+    def _set_pf_path(self, path: list[tuple[int, int]]) -> bool:
+        # The first position in the path will always be removed as it is the
+        # same coordinate the NPC is already standing on. Otherwise, if the NPC
+        # is just standing a little bit off the center of its current
+        # coordinate, it may turn around quickly once it reaches it, if the
+        # second coordinate of the path points in the same direction as where
+        # the NPC was just standing.
+        self.pf_path = [(x + 0.5, y + 0.5) for x, y in path[1:]]
+
+        if not self.pf_path:
+            return False
+
+        return True
+
+    def create_path_to_tile(
+        self,
+        coord: tuple[int, int],
+        pf_grid: PathfindingGrid = None,
+        pf_occupancy: TileOccupancy = None,
+    ) -> bool:
         """
         Initiates the AI-controlled Entity to move to the specified tile.
 
         Note: Path generation has a high performance impact,
         calling it too often at once will cause the game to stutter
+        (see request_path_to_tile)
 
         :param coord: Coordinate of the tile the Entity should move to.
         :param pf_grid: (Optional) pathfinding grid to use. Defaults to self.pf_grid
+        :param pf_occupancy: (Optional) tiles covered by entities the path
+                             should avoid
         :return: Whether the path has successfully been created.
         """
 
         if pf_grid is None:
             pf_grid = self.pf_grid
 
-        if not pf_grid.walkable(coord[0], coord[1]):
+        if not pf_grid.walkable(coord[0], coord[1]) or (
+            pf_occupancy is not None and pf_occupancy.occupied(coord[0], coord[1])
+        ):
             return False
 
-        # current NPC position on the tilemap
-        tile_coord = (
-            pygame.Vector2(self.hitbox_rect.centerx, self.hitbox_rect.centery)
-            / SCALED_TILE_SIZE
-        )
-
+        self._cancel_pf_request()
         self.pf_state = AIState.MOVING
         self.pf_state_duration = 0
 
-        pf_grid.cleanup()
-
-        try:
-            start = pf_grid.node(int(tile_coord.x), int(tile_coord.y))
-        except IndexError as e:
-            # FIXME: Occurs when NPCs get stuck inside each other at the edge
-            #  of the map and one of them gets pushed out of the walkable area
-            warnings.warn(f"NPC is at invalid location {tile_coord}\nFull error: {e}")
+        start = self._get_pf_start_tile(pf_grid)
+        if start is None:
             return False
-        end = pf_grid.node(*[int(i) for i in coord])
+        end = (int(coord[0]), int(coord[1]))
 
-        path_raw = self.pf_finder.find_path(start, end, pf_grid)
+        return self._set_pf_path(
+            self.pf_finder.find_path(start, end, pf_grid, pf_occupancy)
+        )
 
-        # The first position in the path will always be removed as it is the
-        # same coordinate the NPC is already standing on. Otherwise, if the NPC
-        # is just standing a little bit off the center of its current
-        # coordinate, it may turn around quickly once it reaches it, if the
-        # second coordinate of the path points in the same direction as where
-        # the NPC was just standing.
-        self.pf_path = [(i.x + 0.5, i.y + 0.5) for i in path_raw[0][1:]]
+    def request_path_to_tile(
+        self,
+        coord: tuple[int, int],
+        pf_grid: PathfindingGrid = None,
+        pf_occupancy: TileOccupancy = None,
+        on_path: Callable[[], None] = None,
+        on_no_path: Callable[[], bool] = None,
+    ) -> bool:
+        """
+        Like create_path_to_tile, but the path is searched by the pf_scheduler
+        (spread over the next frames), while the Entity is waiting for it.
+        If no path can be found, the path gets aborted (unless on_no_path
+        requested another one).
 
-        if not self.pf_path:
+        :param coord: Coordinate of the tile the Entity should move to.
+        :param pf_grid: (Optional) pathfinding grid to use. Defaults to self.pf_grid
+        :param pf_occupancy: (Optional) tiles covered by entities the path
+                             should avoid
+        :param on_path: (Optional) called once the path has been found,
+                        before the Entity starts moving along it
+        :param on_no_path: (Optional) called if no path has been found.
+                           Returns whether another path has been requested
+                           instead, in which case the Entity keeps waiting
+        :return: Whether the path has successfully been requested.
+        """
+        if pf_grid is None:
+            pf_grid = self.pf_grid
+
+        if not pf_grid.walkable(coord[0], coord[1]) or (
+            pf_occupancy is not None and pf_occupancy.occupied(coord[0], coord[1])
+        ):
             return False
 
+        start = self._get_pf_start_tile(pf_grid)
+        if start is None:
+            return False
+        end = (int(coord[0]), int(coord[1]))
+
+        self._cancel_pf_request()
+        self.pf_state = AIState.WAITING
+        self.pf_state_duration = 0
+        self.pf_path = []
+
+        def on_complete(path: list[tuple[int, int]]):
+            self._pf_request = None
+            if not self._set_pf_path(path):
+                if on_no_path is None or not on_no_path():
+                    self.abort_path()
+                return
+            self.pf_state = AIState.MOVING
+            if on_path is not None:
+                on_path()
+
+        self._pf_request = self.pf_scheduler.submit(
+            self.pf_finder, start, end, pf_grid, on_complete, pf_occupancy
+        )
         return True
 
+    def create_path_to_any_tile(
+        self,
+        coords: Iterable[tuple[int, int]],
+        max_cost: float = math.inf,
+        pf_grid: PathfindingGrid = None,
+        pf_occupancy: TileOccupancy = None,
+    ) -> bool:
+        """
+        Initiates the AI-controlled Entity to move to the first of the given
+        tiles it can reach. All tiles are checked with a single search, which
+        is much faster than calling create_path_to_tile for each of them.
+
+        :param coords: Coordinates of the tiles the Entity may move to,
+                       by descending preference
+        :param max_cost: (Optional) maximum length of the paths searched,
+                         diagonal steps counting as sqrt(2)
+        :param pf_grid: (Optional) pathfinding grid to use. Defaults to self.pf_grid
+        :param pf_occupancy: (Optional) tiles covered by entities the path
+                             should avoid
+        :return: Whether the path has successfully been created.
+        """
+        if pf_grid is None:
+            pf_grid = self.pf_grid
+
+        self._cancel_pf_request()
+        self.pf_state = AIState.MOVING
+        self.pf_state_duration = 0
+
+        start = self._get_pf_start_tile(pf_grid)
+        if start is None:
+            return False
+
+        return self._set_pf_path(
+            self.pf_finder.find_path_to_any(
+                start, coords, pf_grid, max_cost, pf_occupancy
+            )
+        )
+
     def create_step_to_coord(self, coord: tuple[float, float]) -> bool:
         self.pf_path.append((coord[0] / SCALED_TILE_SIZE, coord[1] / SCALED_TILE_SIZE))
         return True
 
     def move(self, dt: float):
-        self.hitbox_rect.update(
-            (
-                self.rect.x + self._current_hitbox.x,
-                self.rect.y + self._current_hitbox.y,
-            ),
-            self._current_hitbox.size,
-        )
+        self._move_hitbox_to_rect()
 
         if self.pf_state == AIState.IDLE:
             self.update_idle(dt)
@@ -305,6 +438,13 @@ class AIBehaviour(AIBehaviourBase, ABC):
 
     def update(self, dt: float):
         if self.continuous_behaviour_tree is not None:
-            self.continuous_behaviour_tree.run(self.behaviour_tree_context)
+            self._continuous_tick_time -= dt
+            if self._continuous_tick_time <= 0:
+                self._continuous_tick_time = max(
+                    self._continuous_tick_time
+                    + self.continuous_behaviour_tree.tick_interval,
+                    0,
+                )
+                self.continuous_behaviour_tree.run(self.behaviour_tree_context)
 
         super().update(dt)
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from typing import ClassVar
 
-from pathfinding.core.grid import Grid
-from pathfinding.finder.a_star import AStarFinder
-
 from src.enums import AIState
 from src.npc.behaviour.ai_behaviour_tree_base import NodeWrapper
+from src.npc.path_finding import AStarFinder, PathfindingGrid, TileOccupancy
+from src.npc.path_scheduler import PathScheduler
 from src.npc.path_scripting import AIScriptedPath
 from src.sprites.entities.entity import Entity
 
@@ -20,8 +19,9 @@ class AIBehaviourBase(Entity, ABC):
        where 1 stands for a walkable tile, and 0 stands for a
        non-walkable tile. Each list entry represents one row of the tilemap."""
 
-    pf_grid: ClassVar[Grid | None]
+    pf_grid: ClassVar[PathfindingGrid | None]
     pf_finder: ClassVar[AStarFinder | None]
+    pf_scheduler: ClassVar[PathScheduler | None]
     pf_state: AIState
     pf_state_duration: float
 
@@ -61,7 +61,33 @@ class AIBehaviourBase(Entity, ABC):
         pass
 
     @abstractmethod
-    def create_path_to_tile(self, coord: tuple[int, int], pf_grid: Grid) -> bool:
+    def create_path_to_tile(
+        self,
+        coord: tuple[int, int],
+        pf_grid: PathfindingGrid,
+        pf_occupancy: TileOccupancy,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def request_path_to_tile(
+        self,
+        coord: tuple[int, int],
+        pf_grid: PathfindingGrid,
+        pf_occupancy: TileOccupancy,
+        on_path: Callable[[], None],
+        on_no_path: Callable[[], bool],
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def create_path_to_any_tile(
+        self,
+        coords: Iterable[tuple[int, int]],
+        max_cost: float,
+        pf_grid: PathfindingGrid,
+        pf_occupancy: TileOccupancy,
+    ) -> bool:
         pass
 
     @abstractmethod
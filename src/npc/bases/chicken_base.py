@@ -4,20 +4,21 @@ from abc import ABC
 from typing import ClassVar
 
 import pygame
-from pathfinding.core.grid import Grid
-from pathfinding.finder.a_star import AStarFinder
 
 from src.npc.bases.ai_behaviour import AIBehaviour
 from src.npc.bases.animal import Animal
 from src.npc.behaviour.ai_behaviour_tree_base import ContextType
+from src.npc.path_finding import AStarFinder, PathfindingGrid
+from src.npc.path_scheduler import PathScheduler
 from src.settings import Coordinate
 from src.sprites.setup import EntityAsset
 
 
 class ChickenBase(Animal, AIBehaviour, ABC):
     pf_matrix: ClassVar[list[list[int]] | None] = None
-    pf_grid: ClassVar[Grid | None] = None
+    pf_grid: ClassVar[PathfindingGrid | None] = None
     pf_finder: ClassVar[AStarFinder | None] = None
+    pf_scheduler: ClassVar[PathScheduler | None] = None
 
     def __init__(
         self,
@@ -5,13 +5,13 @@ from collections.abc import Callable
 from typing import ClassVar
 
 import pygame
-from pathfinding.core.grid import Grid
-from pathfinding.finder.a_star import AStarFinder
 
 from src.enums import FarmingTool, StudyGroup
 from src.gui.interface.emotes import NPCEmoteManager
 from src.npc.bases.ai_behaviour import AIBehaviour
 from src.npc.behaviour.ai_behaviour_tree_base import ContextType
+from src.npc.path_finding import AStarFinder, PathfindingGrid
+from src.npc.path_scheduler import PathScheduler
 from src.overlay.soil import SoilArea
 from src.settings import Coordinate
 from src.sprites.entities.character import Character
@@ -20,8 +20,9 @@ from src.sprites.setup import EntityAsset
 
 class NPCBase(Character, AIBehaviour, ABC):
     pf_matrix: ClassVar[list[list[int]] | None] = None
-    pf_grid: ClassVar[Grid | None] = None
+    pf_grid: ClassVar[PathfindingGrid | None] = None
     pf_finder: ClassVar[AStarFinder | None] = None
+    pf_scheduler: ClassVar[PathScheduler | None] = None
 
     soil_area: SoilArea
     tree_sprites: pygame.sprite.Group
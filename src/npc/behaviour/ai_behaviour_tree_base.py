@@ -1,9 +1,24 @@
+"""Behaviour trees of AI-controlled Entities.
+
+Trees are built from the nodes below, but are not run node by node. The first
+time a tree is run, it is compiled (see compile_tree) into a flat list of
+instructions, each calling a leaf function and jumping to another instruction
+depending on its result.
+
+With PROFILE_BEHAVIOUR_TREES enabled, calls, successes and time spent are
+recorded for every leaf of a compiled tree, and printed when the game exits.
+"""
+
 from __future__ import annotations
 
+import atexit
 import random
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Callable, TypeVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, TypeVar
+
+from src.settings import PROFILE_BEHAVIOUR_TREES
 
 
 @dataclass
@@ -27,9 +42,22 @@ class Node(ABC):
 @dataclass
 class NodeWrapper:
     root_node: Node
+    tick_interval: float = 0
+    """Time (in seconds) between two runs of the tree by the same Entity, when
+    it is run continuously (see AIBehaviour.update). 0 to run it every frame."""
+
+    _program: CompiledTree | None = field(default=None, init=False, repr=False)
 
     def run(self, context: Context):
-        self.root_node.run(context)
+        if self._program is None:
+            name = type(self).__name__
+            if hasattr(self, "name"):
+                # NodeWrapper used as value of an Enum
+                name += f".{self.name}"
+            self._program = compile_tree(
+                self.root_node, name if PROFILE_BEHAVIOUR_TREES else None
+            )
+        self._program.run(context)
 
 
 class Composite(Node, ABC):
@@ -72,8 +100,12 @@ def weighted_shuffle(children: list[tuple[int, Node]]) -> list[Node]:
     https://softwareengineering.stackexchange.com/a/344274
     https://utopia.duth.gr/%7Epefraimi/research/data/2007EncOfAlg.pdf
     """
+    # children with the greatest keys come first, so that the probability of
+    # each child to be the first one is proportional to its weight
     order = sorted(
-        range(len(children)), key=lambda i: random.random() ** (1.0 / children[i][0])
+        range(len(children)),
+        key=lambda i: random.random() ** (1.0 / children[i][0]),
+        reverse=True,
     )
     return [children[i][1] for i in order]
 
@@ -156,3 +188,224 @@ class Action(Leaf):
 
     def run(self, context: ContextType | None):
         return self.action_func(context)
+
+
+# region compiled trees
+# targets of the last instructions, which end the program
+_SUCCESS = -1
+_FAILURE = -2
+
+type _Instruction = tuple[Callable[[Any], Any], int, int]
+"""(function called with the context, instruction to continue with if it
+returns a truthy value, instruction to continue with otherwise)."""
+
+
+class _AliasTable:
+    def __init__(self, weights: list[float]):
+        """
+        Samples indices with probabilities proportional to the given weights in
+        constant time (Vose's alias method).
+        """
+        count_ = len(weights)
+        total = sum(weights)
+        scaled = [weight * count_ / total for weight in weights]
+        self.probabilities = [1.0] * count_
+        self.aliases = list(range(count_))
+
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+
+    def sample(self) -> int:
+        index = int(random.random() * len(self.probabilities))
+        if random.random() < self.probabilities[index]:
+            return index
+        return self.aliases[index]
+
+
+class _RandomSelect:
+    def __init__(self, children: list[tuple[int, CompiledTree]]):
+        """
+        Compiled RandomSelector. Tries its children in a weighted random order,
+        like weighted_shuffle would give.
+        """
+        self.weights = [weight for weight, _ in children]
+        self.children = [child for _, child in children]
+        self.alias_table = _AliasTable(self.weights)
+
+    def __call__(self, context: ContextType | None) -> bool:
+        remaining = len(self.children)
+        remaining_weight = sum(self.weights)
+        tried = set()
+        while remaining:
+            if remaining_weight * 2 >= sum(self.weights):
+                # sampling from all children, and rejecting those that were
+                # already tried, is still fast
+                index = self.alias_table.sample()
+                if index in tried:
+                    continue
+            else:
+                target = random.random() * remaining_weight
+                for index, weight in enumerate(self.weights):
+                    if index in tried:
+                        continue
+                    target -= weight
+                    if target < 0:
+                        break
+
+            if self.children[index].run(context):
+                return True
+            tried.add(index)
+            remaining -= 1
+            remaining_weight -= self.weights[index]
+        return False
+
+
+@dataclass
+class LeafProfile:
+    name: str
+    calls: int = 0
+    successes: int = 0
+    time: float = 0
+    """Cumulative time (in seconds) spent in the leaf."""
+
+
+_profiles: list[tuple[str, list[LeafProfile]]] = []
+"""Leaves of all profiled trees, by tree name."""
+
+
+def _profile(func: Callable[[Any], Any], profile: LeafProfile) -> Callable:
+    def profiled(context: ContextType | None):
+        start = time.perf_counter()
+        result = func(context)
+        profile.time += time.perf_counter() - start
+        profile.calls += 1
+        if result:
+            profile.successes += 1
+        return result
+
+    return profiled
+
+
+class CompiledTree:
+    def __init__(self, instructions: list[_Instruction], entry: int):
+        self.instructions = instructions
+        self.entry = entry
+
+    def run(self, context: ContextType | None) -> bool:
+        """
+        :return: Whether the tree succeeded
+        """
+        instructions = self.instructions
+        index = self.entry
+        while index >= 0:
+            func, on_success, on_failure = instructions[index]
+            index = on_success if func(context) else on_failure
+        return index == _SUCCESS
+
+
+def _get_leaf_name(node: Node) -> str:
+    func = getattr(node, "condition_func", None) or getattr(node, "action_func", None)
+    if func is not None:
+        return f"{type(node).__name__}({func.__name__})"
+    return type(node).__name__
+
+
+def compile_tree(root_node: Node, profile_name: str | None = None) -> CompiledTree:
+    """
+    Compile the tree below the given node into a flat list of instructions.
+    Sequences, Selectors and Inverters only decide which instruction follows
+    another, and don't remain part of the compiled tree.
+
+    :param profile_name: [Optional] Name the leaves of the tree are profiled
+                         under. Not profiled if None
+    :return: Compiled tree, which returns the same results as root_node.run
+    """
+    instructions: list[_Instruction] = []
+    profiles: list[LeafProfile] = []
+
+    def emit(node: Node, on_success: int, on_failure: int) -> int:
+        """
+        :return: Index of the first instruction of the node
+        """
+        # children are compiled last to first, so that the instruction
+        # following each of them is already known
+        if type(node) is Sequence:
+            entry = on_success
+            for child in reversed(node.children):
+                entry = emit(child, entry, on_failure)
+            return entry
+        if type(node) is Selector:
+            entry = on_failure
+            for child in reversed(node.children):
+                entry = emit(child, on_success, entry)
+            return entry
+        if type(node) is Inverter:
+            return emit(node.child, on_failure, on_success)
+
+        if type(node) is Condition:
+            func = node.condition_func
+        elif type(node) is Action:
+            func = node.action_func
+        elif type(node) is RandomSelector:
+            func = _RandomSelect(
+                [
+                    (weight, compile_tree(child, profile_name))
+                    for weight, child in node.children
+                ]
+            )
+        else:
+            func = node.run
+
+        if profile_name is not None:
+            profiles.append(LeafProfile(_get_leaf_name(node)))
+            func = _profile(func, profiles[-1])
+        instructions.append((func, on_success, on_failure))
+        return len(instructions) - 1
+
+    entry = emit(root_node, _SUCCESS, _FAILURE)
+    if profile_name is not None:
+        _profiles.append((profile_name, profiles))
+    return CompiledTree(instructions, entry)
+
+
+def get_profile_report() -> str:
+    """
+    :return: Table of the profiled leaves of all trees, by descending time
+    """
+    leaves: dict[tuple[str, str], LeafProfile] = {}
+    for tree_name, profiles in _profiles:
+        for profile in profiles:
+            total = leaves.setdefault(
+                (tree_name, profile.name), LeafProfile(profile.name)
+            )
+            total.calls += profile.calls
+            total.successes += profile.successes
+            total.time += profile.time
+
+    lines = [
+        f"{'tree':<40} {'leaf':<48} {'calls':>8} {'success':>8} "
+        f"{'total ms':>10} {'mean us':>9}"
+    ]
+    for (tree_name, _), profile in sorted(
+        leaves.items(), key=lambda item: item[1].time, reverse=True
+    ):
+        if not profile.calls:
+            continue
+        lines.append(
+            f"{tree_name:<40} {profile.name:<48} {profile.calls:>8} "
+            f"{profile.successes / profile.calls:>8.0%} "
+            f"{profile.time * 1000:>10.2f} "
+            f"{profile.time / profile.calls * 1000000:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+if PROFILE_BEHAVIOUR_TREES:
+    atexit.register(lambda: print(get_profile_report()))
+# endregion
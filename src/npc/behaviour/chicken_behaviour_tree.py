@@ -3,8 +3,6 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
 
-from pathfinding.core.grid import Grid
-
 from src.npc.bases.chicken_base import ChickenBase
 from src.npc.behaviour.ai_behaviour_tree_base import (
     Action,
@@ -12,13 +10,14 @@ from src.npc.behaviour.ai_behaviour_tree_base import (
     NodeWrapper,
     Selector,
 )
+from src.npc.path_finding import PathfindingGrid
 from src.npc.utils import pf_wander
 
 
 @dataclass
 class ChickenIndividualContext(Context):
     chicken: ChickenBase
-    range_grid: Grid = None
+    range_grid: PathfindingGrid = None
 
 
 def wander(context: ChickenIndividualContext) -> bool:
@@ -3,8 +3,6 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
 
-from pathfinding.core.grid import Grid
-
 from src.npc.bases.cow_base import CowBase
 from src.npc.behaviour.ai_behaviour_tree_base import (
     Action,
@@ -14,6 +12,7 @@ from src.npc.behaviour.ai_behaviour_tree_base import (
     Selector,
     Sequence,
 )
+from src.npc.path_finding import PathfindingGrid
 from src.npc.setup import AIData
 from src.npc.utils import pf_wander
 from src.settings import SCALED_TILE_SIZE
@@ -22,7 +21,7 @@ from src.settings import SCALED_TILE_SIZE
 @dataclass
 class CowIndividualContext(Context):
     cow: CowBase
-    range_grid: Grid = None
+    range_grid: PathfindingGrid = None
 
 
 def wander(context: CowIndividualContext) -> bool:
@@ -30,13 +29,17 @@ def wander(context: CowIndividualContext) -> bool:
 
 
 # region flee behaviour
+FLEE_TICK_INTERVAL = 0.1
+"""Time (in seconds) between two checks whether a cow should flee."""
+
+
 def player_nearby(context: CowIndividualContext) -> bool:
     distance_threshold = 2.5 * SCALED_TILE_SIZE
-    current_distance = (
-        (AIData.player.rect.center[0] - context.cow.rect.center[0]) ** 2
-        + (AIData.player.rect.center[1] - context.cow.rect.center[1]) ** 2
-    ) ** 0.5
-    return current_distance < distance_threshold
+    # compare squared distances, as this runs for every cow very often
+    player_x, player_y = AIData.player.rect.center
+    cow_x, cow_y = context.cow.rect.center
+    dx, dy = player_x - cow_x, player_y - cow_y
+    return dx * dx + dy * dy < distance_threshold * distance_threshold
 
 
 def flee_from_player(context: CowIndividualContext) -> bool:
@@ -56,4 +59,7 @@ class CowConditionalBehaviourTree(NodeWrapper, Enum):
 
 
 class CowContinuousBehaviourTree(NodeWrapper, Enum):
-    Flee = Selector(Sequence(Condition(player_nearby), Action(flee_from_player)))
+    Flee = (
+        Selector(Sequence(Condition(player_nearby), Action(flee_from_player))),
+        FLEE_TICK_INTERVAL,
+    )
@@ -3,7 +3,8 @@ from __future__ import annotations
 import random
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Callable
+from itertools import chain, islice
+from typing import Callable, Iterable
 
 import pygame
 
@@ -38,15 +39,49 @@ def walk_to_pos(
     context: NPCIndividualContext,
     target_position: tuple[int, int],
     on_path_completion: Callable[[], None] = None,
+    extra_step: tuple[float, float] = None,
 ):
     """
-    :return: True if path has successfully been created, otherwise False
+    :param extra_step: (Optional) coordinate the NPC steps to after arriving
+                       at the target position (e.g. the edge of a tree)
+    :return: True if path has successfully been requested, otherwise False
     """
 
-    if target_position in NPCSharedContext.targets:
-        return False
+    def _on_path_completion(_: tuple[int, int]):
+        if on_path_completion is not None:
+            on_path_completion()
+
+    return walk_to_any_pos(
+        context, (target_position,), _on_path_completion, extra_step=extra_step
+    )
+
+
+def walk_to_any_pos(
+    context: NPCIndividualContext,
+    target_positions: Iterable[tuple[int, int]],
+    on_path_completion: Callable[[tuple[int, int]], None] = None,
+    extra_step: tuple[float, float] = None,
+):
+    """
+    Makes the NPC walk to the first of the given positions it can reach.
+    The paths are requested one after another: only once no path to a position
+    has been found, the path to the next one is requested.
+    :param target_positions: Positions the NPC may walk to, by descending
+                             preference
+    :param on_path_completion: (Optional) called with the position the NPC
+                               arrived at
+    :param extra_step: (Optional) coordinate the NPC steps to after arriving
+                       at the target position (e.g. the edge of a tree)
+    :return: True if a path has successfully been requested, otherwise False
+    """
+    positions = iter(target_positions)
+    target_position: tuple[int, int] | None = None
 
-    if pf_move_to(context.npc, target_position):
+    # direction the NPC faces after arriving, along the last step of its path
+    facing = (0, 0)
+
+    def on_path():
+        nonlocal facing
         if len(context.npc.pf_path) > 1:
             facing = (
                 context.npc.pf_path[-1][0] - context.npc.pf_path[-2][0],
@@ -62,23 +97,45 @@ def walk_to_pos(
 
         facing = (facing[0], 0) if abs(facing[0]) > abs(facing[1]) else (0, facing[1])
 
-        NPCSharedContext.targets.add(target_position)
+        # the path replaces any previous one, so the step is only added now
+        if extra_step is not None:
+            context.npc.create_step_to_coord(extra_step)
 
-        @context.npc.on_path_completion
-        def _():
-            context.npc.direction.update(facing)
-            context.npc.get_facing_direction()
-            context.npc.direction.update((0, 0))
+    def request_next_path() -> bool:
+        nonlocal target_position
+        if target_position is not None:
+            NPCSharedContext.targets.discard(target_position)
+            target_position = None
+
+        for position in positions:
+            if position in NPCSharedContext.targets:
+                continue
+            if pf_move_to(
+                context.npc, position, on_path=on_path, on_no_path=request_next_path
+            ):
+                target_position = position
+                NPCSharedContext.targets.add(position)
+                return True
+        return False
+
+    if not request_next_path():
+        return False
+
+    @context.npc.on_path_completion
+    def _():
+        context.npc.direction.update(facing)
+        context.npc.get_facing_direction()
+        context.npc.direction.update((0, 0))
 
-            if on_path_completion is not None:
-                on_path_completion()
+        if on_path_completion is not None:
+            on_path_completion(target_position)
 
-        @context.npc.on_stop_moving
-        def _():
+    @context.npc.on_stop_moving
+    def _():
+        if target_position is not None:
             NPCSharedContext.targets.discard(target_position)
 
-        return True
-    return False
+    return True
 
 
 def wander(context: NPCIndividualContext) -> bool:
@@ -116,17 +173,17 @@ def harvest_plant(context: NPCIndividualContext) -> bool:
 
     tile_coord = context.npc.get_tile_pos()
 
-    loop_count = 0
-    for pos in near_tiles(tile_coord, radius, shuffle=True):
-        if pos in harvestable_tiles:
-            path_created = walk_to_pos(context, pos)
-            if path_created:
-                return True
-            loop_count += 1
-            if loop_count > 5:
-                break
-
-    return False
+    return walk_to_any_pos(
+        context,
+        islice(
+            (
+                pos
+                for pos in near_tiles(tile_coord, radius, shuffle=True)
+                if pos in harvestable_tiles
+            ),
+            6,
+        ),
+    )
 
 
 def will_create_new_farmland(context: NPCIndividualContext) -> bool:
@@ -190,36 +247,23 @@ def create_new_farmland(context: NPCIndividualContext) -> bool:
         range(len(w_coords)), key=lambda i: random.random() ** (1.0 / w_coords[i][0])
     )
 
-    def on_path_completion():
+    def on_path_completion(pos: tuple[int, int]):
         context.npc.tool_active = True
         context.npc.current_tool = FarmingTool.HOE
         context.npc.tool_index = context.npc.current_tool.value - 1
         context.npc.frame_index = 0
 
-    loop_count = 0
-    for pos in order:
-        path_created = walk_to_pos(
-            context, w_coords[pos][1], on_path_completion=on_path_completion
-        )
-        if path_created:
-            return True
-        loop_count += 1
-        if loop_count > 5:
-            break
-
-    loop_count = 0
-    for pos in sorted(
-        untilled_tiles,
-        key=lambda tile: distance(tile, tile_coord),
-    ):
-        path_created = walk_to_pos(context, pos, on_path_completion=on_path_completion)
-        if path_created:
-            return True
-        loop_count += 1
-        if loop_count > 5:
-            break
-
-    return False
+    return walk_to_any_pos(
+        context,
+        chain(
+            islice((w_coords[pos][1] for pos in order), 6),
+            islice(
+                sorted(untilled_tiles, key=lambda tile: distance(tile, tile_coord)),
+                6,
+            ),
+        ),
+        on_path_completion=on_path_completion,
+    )
 
 
 def will_plant_tilled_farmland(context: NPCIndividualContext) -> bool:
@@ -256,7 +300,7 @@ def plant_adjacent_or_random_seed(context: NPCIndividualContext) -> bool:
 
     tile_coord = context.npc.get_tile_pos()
 
-    def on_path_completion():
+    def on_path_completion(pos: tuple[int, int]):
         seed_type: FarmingTool | None = None
 
         # NPCs will only plant a seed from an adjacent tile if every seed
@@ -307,28 +351,24 @@ def plant_adjacent_or_random_seed(context: NPCIndividualContext) -> bool:
 
     # FIXME: Since path generation has a high performance impact the maximum loop count
     #  is limited to 10. Removing this can cause the game to stutter
-    loop_count = 0
-    for pos in near_tiles(tile_coord, radius, shuffle=True):
-        if pos in unplanted_tiles:
-            path_created = walk_to_pos(
-                context, pos, on_path_completion=on_path_completion
-            )
-            if path_created:
-                return True
-            loop_count += 1
-            if loop_count > 5:
-                break
-
-    loop_count = 0
-    for pos in sorted(unplanted_tiles, key=lambda tile: distance(tile, tile_coord)):
-        path_created = walk_to_pos(context, pos, on_path_completion=on_path_completion)
-        if path_created:
-            return True
-        loop_count += 1
-        if loop_count > 5:
-            break
-
-    return False
+    return walk_to_any_pos(
+        context,
+        chain(
+            islice(
+                (
+                    pos
+                    for pos in near_tiles(tile_coord, radius, shuffle=True)
+                    if pos in unplanted_tiles
+                ),
+                6,
+            ),
+            islice(
+                sorted(unplanted_tiles, key=lambda tile: distance(tile, tile_coord)),
+                6,
+            ),
+        ),
+        on_path_completion=on_path_completion,
+    )
 
 
 def water_farmland(context: NPCIndividualContext) -> bool:
@@ -346,34 +386,30 @@ def water_farmland(context: NPCIndividualContext) -> bool:
 
     tile_coord = context.npc.get_tile_pos()
 
-    def on_path_completion():
+    def on_path_completion(pos: tuple[int, int]):
         context.npc.tool_active = True
         context.npc.current_tool = FarmingTool.WATERING_CAN
         context.npc.tool_index = context.npc.current_tool.value - 1
         context.npc.frame_index = 0
 
-    loop_count = 0
-    for pos in near_tiles(tile_coord, radius):
-        if pos in unwatered_tiles:
-            path_created = walk_to_pos(
-                context, pos, on_path_completion=on_path_completion
-            )
-            if path_created:
-                return True
-            loop_count += 1
-            if loop_count > 5:
-                break
-
-    loop_count = 0
-    for pos in sorted(unwatered_tiles, key=lambda tile: distance(tile, tile_coord)):
-        path_created = walk_to_pos(context, pos, on_path_completion=on_path_completion)
-        if path_created:
-            return True
-        loop_count += 1
-        if loop_count > 5:
-            break
-
-    return False
+    return walk_to_any_pos(
+        context,
+        chain(
+            islice(
+                (
+                    pos
+                    for pos in near_tiles(tile_coord, radius)
+                    if pos in unwatered_tiles
+                ),
+                6,
+            ),
+            islice(
+                sorted(unwatered_tiles, key=lambda tile: distance(tile, tile_coord)),
+                6,
+            ),
+        ),
+        on_path_completion=on_path_completion,
+    )
 
 
 # endregion
@@ -483,16 +519,16 @@ def chop_tree(context: NPCIndividualContext) -> bool:
                     int(tree.hitbox_rect.center[1] / SCALED_TILE_SIZE),
                 )
                 tup = direction_to_vector(direction)
+                tree_edge_coord = offset_edge_midpoint(
+                    direction, tree.hitbox_rect, context.npc.hitbox_rect.size
+                )
                 path_created = walk_to_pos(
                     context,
                     (tree_pos[0] + tup[0], tree_pos[1] + tup[1]),
                     on_path_completion=on_path_completion(tree, direction),
+                    extra_step=tree_edge_coord,
                 )
                 if path_created:
-                    tree_edge_coord = offset_edge_midpoint(
-                        direction, tree.hitbox_rect, context.npc.hitbox_rect.size
-                    )
-                    context.npc.create_step_to_coord(tree_edge_coord)
                     return True
 
         first_iteration = False
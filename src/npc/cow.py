@@ -1,10 +1,10 @@
 import pygame
-from pathfinding.core.grid import Grid
 
 from src.enums import Layer
 from src.npc.bases.cow_base import CowBase
 from src.npc.behaviour.cow_behaviour_tree import CowIndividualContext
-from src.npc.utils import pf_move_to
+from src.npc.path_finding import PathfindingGrid
+from src.npc.utils import pf_move_to_any
 from src.settings import Coordinate
 from src.sprites.setup import EntityAsset
 from src.support import get_sorted_flight_vectors
@@ -35,12 +35,12 @@ class Cow(CowBase):
         self.speed = 150
         self.fleeing = False
 
-    def flee_from_pos(self, pos: tuple[int, int], pf_grid: Grid = None) -> bool:
+    def flee_from_pos(
+        self, pos: tuple[int, int], pf_grid: PathfindingGrid = None
+    ) -> bool:
         """
         Aborts the current path of the cow and makes it flee into the opposite
         direction of the given position.
-        FIXME: When a Cow is locked in a position they can't flee from, they'll still
-         check every path if it is possible, decreasing the frame rate by quite a bit
         :param pos: Position on the Tilemap that should be fled from
         :param pf_grid: (Optional) pathfinding grid to use. Defaults to self.pf_grid
         :return: Whether the path has successfully been created.
@@ -59,9 +59,13 @@ class Cow(CowBase):
                 radius=5,
             )
 
-            for coordinate in flight_vectors:
-                x_coord = tile_coord[0] + coordinate.x - 5
-                y_coord = tile_coord[1] + coordinate.y - 5
-                if pf_move_to(self, (x_coord, y_coord), 5, pf_grid=pf_grid):
-                    return True
+            return pf_move_to_any(
+                self,
+                (
+                    (tile_coord[0] + coordinate.x - 5, tile_coord[1] + coordinate.y - 5)
+                    for coordinate in flight_vectors
+                ),
+                5,
+                pf_grid=pf_grid,
+            )
         return False
@@ -0,0 +1,385 @@
+"""Hierarchical pathfinding (HPA*) for long paths on large maps.
+
+The grid is divided into square clusters. Wherever two neighbouring clusters
+share walkable border tiles, transitions between them are added to an abstract
+graph, whose edges inside a cluster are the lengths of the shortest paths
+between its transitions. This graph only has to be built once per grid.
+
+Long paths are first searched on the (much smaller) abstract graph, and then
+refined by searching the actual path inside each cluster it passes through.
+Paths found this way are not always the shortest possible ones, but rarely
+more than a few tiles longer.
+"""
+
+import weakref
+from heapq import heappop, heappush
+from itertools import pairwise
+
+from src.enums import DiagonalMovement
+from src.npc.path_finding import (
+    SQRT2,
+    AStarFinder,
+    PathfindingGrid,
+    PathSearch,
+    SearchState,
+    TileOccupancy,
+)
+
+HPA_CLUSTER_SIZE = 10
+"""Width and height (in tiles) of the clusters the grid is divided into."""
+
+HPA_MIN_GRID_SIZE = 2500
+"""Minimum number of tiles of a grid to use hierarchical pathfinding on.
+Searching smaller grids (e.g. the ranges of the minigame) directly is faster."""
+
+HPA_MIN_DISTANCE = 2 * HPA_CLUSTER_SIZE
+"""Minimum distance (in tiles) between start and end of a path to search it
+hierarchically. Shorter paths are searched directly."""
+
+# border segments of at least this many tiles get two transitions (one at each
+# end) instead of a single one in their middle
+_LONG_SEGMENT_LENGTH = 6
+
+# ids of the start and end of a path in the abstract graph
+# (all other nodes are identified by their tile index)
+_START = -1
+_END = -2
+
+type _Area = tuple[int, int, int, int]
+"""Tiles (first x, first y, last x + 1, last y + 1) of a cluster."""
+
+
+def _local_search(
+    grid: PathfindingGrid,
+    start_index: int,
+    area: _Area,
+    diagonal: bool,
+    occupancy: TileOccupancy | None = None,
+    end_index: int = -1,
+):
+    """
+    Dijkstra search from the given tile, which never leaves the given area.
+    The costs of all reached tiles are afterwards found in the search state of
+    the grid (see PathfindingGrid), for tiles closed by this search.
+
+    :param end_index: [Optional] Tile to stop the search at
+    """
+    width = grid.width
+    get_neighbours = grid._get_neighbours
+    opened, closed = grid._opened, grid._closed
+    g_costs, parents = grid._g, grid._parent
+    push_orders = grid._push_order
+    search_id = grid._new_search()
+    area_x0, area_y0, area_x1, area_y1 = area
+
+    opened[start_index] = search_id
+    g_costs[start_index] = 0
+    parents[start_index] = -1
+    push_orders[start_index] = 0
+
+    open_list = [(0, 0, start_index)]
+    push_count = 0
+    neighbours = []
+    while open_list:
+        _, order, index = heappop(open_list)
+        if order != push_orders[index]:
+            continue
+        closed[index] = search_id
+        if index == end_index:
+            return
+
+        x, y = index % width, index // width
+        get_neighbours(index, diagonal, neighbours, occupancy)
+
+        g = g_costs[index]
+        for neighbour in neighbours:
+            n_x, n_y = neighbour % width, neighbour // width
+            if (
+                closed[neighbour] == search_id
+                or not area_x0 <= n_x < area_x1
+                or not area_y0 <= n_y < area_y1
+            ):
+                continue
+            cost = g + (1 if n_x == x or n_y == y else SQRT2)
+
+            if opened[neighbour] != search_id:
+                opened[neighbour] = search_id
+            elif cost >= g_costs[neighbour]:
+                continue
+
+            g_costs[neighbour] = cost
+            parents[neighbour] = index
+            push_count += 1
+            push_orders[neighbour] = push_count
+            heappush(open_list, (cost, push_count, neighbour))
+
+
+class AbstractGraph:
+    def __init__(self, grid: PathfindingGrid, diagonal: bool):
+        """
+        Transitions between the clusters of the given grid, and the costs of
+        moving between them.
+        """
+        self.grid = grid
+        self.diagonal = diagonal
+        self.version = grid.version
+
+        # transitions (tile indices) in each cluster, by cluster index
+        self._transitions: dict[int, list[int]] = {}
+        # costs of moving from a transition to other transitions
+        self._edges: dict[int, dict[int, float]] = {}
+
+        self._add_transitions()
+        self._add_cluster_edges()
+
+    def get_cluster(self, index: int) -> int:
+        clusters_per_row = -(-self.grid.width // HPA_CLUSTER_SIZE)
+        return (
+            index // self.grid.width // HPA_CLUSTER_SIZE * clusters_per_row
+            + index % self.grid.width // HPA_CLUSTER_SIZE
+        )
+
+    def get_cluster_area(self, index: int) -> _Area:
+        """
+        :return: Area of the cluster containing the given tile
+        """
+        x0 = index % self.grid.width // HPA_CLUSTER_SIZE * HPA_CLUSTER_SIZE
+        y0 = index // self.grid.width // HPA_CLUSTER_SIZE * HPA_CLUSTER_SIZE
+        return (
+            x0,
+            y0,
+            min(x0 + HPA_CLUSTER_SIZE, self.grid.width),
+            min(y0 + HPA_CLUSTER_SIZE, self.grid.height),
+        )
+
+    def _add_transition(self, index: int, other_index: int):
+        for a, b in ((index, other_index), (other_index, index)):
+            if a not in self._edges:
+                self._edges[a] = {}
+                self._transitions.setdefault(self.get_cluster(a), []).append(a)
+            self._edges[a][b] = 1
+
+    def _add_border_transitions(self, border: list[tuple[int, int]]):
+        """
+        :param border: Pairs of neighbouring tiles along the border between
+                       two clusters
+        """
+        walkable = self.grid._walkable
+        segment = []
+        for pair in [*border, None]:
+            if pair is not None and walkable[pair[0]] and walkable[pair[1]]:
+                segment.append(pair)
+                continue
+            if len(segment) >= _LONG_SEGMENT_LENGTH:
+                self._add_transition(*segment[0])
+                self._add_transition(*segment[-1])
+            elif segment:
+                self._add_transition(*segment[len(segment) // 2])
+            segment = []
+
+    def _add_transitions(self):
+        width, height = self.grid.width, self.grid.height
+        for border_x in range(HPA_CLUSTER_SIZE, width, HPA_CLUSTER_SIZE):
+            for y0 in range(0, height, HPA_CLUSTER_SIZE):
+                self._add_border_transitions(
+                    [
+                        (y * width + border_x - 1, y * width + border_x)
+                        for y in range(y0, min(y0 + HPA_CLUSTER_SIZE, height))
+                    ]
+                )
+        for border_y in range(HPA_CLUSTER_SIZE, height, HPA_CLUSTER_SIZE):
+            for x0 in range(0, width, HPA_CLUSTER_SIZE):
+                self._add_border_transitions(
+                    [
+                        ((border_y - 1) * width + x, border_y * width + x)
+                        for x in range(x0, min(x0 + HPA_CLUSTER_SIZE, width))
+                    ]
+                )
+
+    def _search_cluster_costs(
+        self, index: int, transitions: list[int]
+    ) -> dict[int, float]:
+        """
+        :return: Costs of moving from the given tile to each of the given
+                 transitions of its cluster, if they can be reached
+        """
+        grid = self.grid
+        _local_search(grid, index, self.get_cluster_area(index), self.diagonal)
+        return {
+            transition: grid._g[transition]
+            for transition in transitions
+            if grid._closed[transition] == grid._search_id
+        }
+
+    def _add_cluster_edges(self):
+        for transitions in self._transitions.values():
+            for transition in transitions:
+                costs = self._search_cluster_costs(transition, transitions)
+                del costs[transition]
+                self._edges[transition].update(costs)
+
+    def _heuristic(self, index: int, end: tuple[int, int]) -> float:
+        dx = abs(index % self.grid.width - end[0])
+        dy = abs(index // self.grid.width - end[1])
+        if not self.diagonal:
+            return dx + dy
+        return (SQRT2 - 1) * min(dx, dy) + max(dx, dy)
+
+    def _search_abstract_path(
+        self, start: tuple[int, int], end: tuple[int, int]
+    ) -> list[int]:
+        """
+        :return: Tiles of the transitions the path passes through (including
+                 start and end tile), empty if there is no path
+        """
+        width = self.grid.width
+        start_index = start[1] * width + start[0]
+        end_index = end[1] * width + end[0]
+
+        end_cluster = self.get_cluster(end_index)
+        start_edges = self._search_cluster_costs(
+            start_index, self._transitions.get(self.get_cluster(start_index), [])
+        )
+        end_edges = self._search_cluster_costs(
+            end_index, self._transitions.get(end_cluster, [])
+        )
+
+        g_costs = {_START: 0}
+        parents = {_START: None}
+        closed = set()
+        open_list = [(0, 0, _START)]
+        push_count = 0
+        while open_list:
+            _, _, node = heappop(open_list)
+            if node in closed:
+                continue
+            closed.add(node)
+            if node == _END:
+                break
+
+            edges = start_edges if node == _START else self._edges[node]
+            g = g_costs[node]
+            neighbours = [*edges.items()]
+            if node in end_edges:
+                neighbours.append((_END, end_edges[node]))
+            for neighbour, edge_cost in neighbours:
+                cost = g + edge_cost
+                if neighbour in closed or cost >= g_costs.get(neighbour, cost + 1):
+                    continue
+                g_costs[neighbour] = cost
+                parents[neighbour] = node
+                push_count += 1
+                h = 0 if neighbour == _END else self._heuristic(neighbour, end)
+                heappush(open_list, (cost + h, push_count, neighbour))
+        else:
+            return []
+
+        path = []
+        node = _END
+        while node is not None:
+            path.append({_START: start_index, _END: end_index}.get(node, node))
+            node = parents[node]
+        path.reverse()
+        return path
+
+    def _refine(
+        self, abstract_path: list[int], occupancy: TileOccupancy | None
+    ) -> list[tuple[int, int]] | None:
+        """
+        :return: Tiles of the complete path along the given transitions,
+                 None if it is blocked by occupied tiles
+        """
+        grid = self.grid
+        path = [(abstract_path[0] % grid.width, abstract_path[0] // grid.width)]
+        for index, next_index in pairwise(abstract_path):
+            if index == next_index:
+                continue
+            if self.get_cluster(index) != self.get_cluster(next_index):
+                # step over the border between two clusters
+                x, y = next_index % grid.width, next_index // grid.width
+                if occupancy is not None and occupancy.occupied(x, y):
+                    return None
+                path.append((x, y))
+                continue
+
+            _local_search(
+                grid,
+                index,
+                self.get_cluster_area(index),
+                self.diagonal,
+                occupancy,
+                next_index,
+            )
+            if grid._closed[next_index] != grid._search_id:
+                return None
+            path.extend(grid._get_path(next_index)[1:])
+        return path
+
+    def find_path(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        occupancy: TileOccupancy | None = None,
+    ) -> list[tuple[int, int]] | None:
+        """
+        :return: Tiles of the path, including start and end tile. Empty if there
+                 is no path between both tiles, None if the path found on the
+                 abstract graph is blocked by occupied tiles
+        """
+        abstract_path = self._search_abstract_path(start, end)
+        if not abstract_path:
+            return []
+        return self._refine(abstract_path, occupancy)
+
+
+class HierarchicalAStarFinder(AStarFinder):
+    """
+    AStarFinder searching long paths on large grids hierarchically (HPA*).
+    All other paths are searched directly, as well as paths whose hierarchical
+    refinement is blocked by occupied tiles.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._graphs: weakref.WeakKeyDictionary[PathfindingGrid, AbstractGraph]
+        self._graphs = weakref.WeakKeyDictionary()
+
+    def get_abstract_graph(self, grid: PathfindingGrid) -> AbstractGraph:
+        """
+        :return: The abstract graph of the given grid, which is built the first
+                 time it is needed (and again after the grid changed)
+        """
+        graph = self._graphs.get(grid)
+        if graph is None or graph.version != grid.version:
+            graph = AbstractGraph(
+                grid, self.diagonal_movement == DiagonalMovement.ONLY_WHEN_NO_OBSTACLE
+            )
+            self._graphs[grid] = graph
+        return graph
+
+    def prepare(self, grid: PathfindingGrid):
+        """
+        Build the abstract graph of the given grid in advance (e.g. while a map
+        is loaded), if paths on it may be searched hierarchically.
+        """
+        if grid.width * grid.height >= HPA_MIN_GRID_SIZE:
+            self.get_abstract_graph(grid)
+
+    def _search_path(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        grid: PathfindingGrid,
+        occupancy: TileOccupancy | None,
+        state: SearchState,
+    ) -> PathSearch:
+        if (
+            grid.width * grid.height >= HPA_MIN_GRID_SIZE
+            and max(abs(start[0] - end[0]), abs(start[1] - end[1])) >= HPA_MIN_DISTANCE
+        ):
+            # hierarchical searches are never interrupted,
+            # so they always use the search state of the grid
+            path = self.get_abstract_graph(grid).find_path(start, end, occupancy)
+            if path is not None:
+                return path
+        return (yield from super()._search_path(start, end, grid, occupancy, state))
@@ -0,0 +1,610 @@
+"""A* pathfinding on the tile grid of a map, as well as a Dijkstra search for
+paths to any of several tiles.
+
+Each tile is stored as one byte of a flat walkability array, and the state of a
+search (costs, parents, opened and closed tiles) is kept in flat lists that are
+tagged with the id of the search that last touched them. Starting a new search
+therefore only requires increasing that id, instead of resetting every tile.
+
+Paths are identical to the ones python-pathfinding's AStarFinder would create
+on the same matrix.
+
+Tiles covered by moving entities are kept track of separately by a
+TileOccupancy, which searches can be given to avoid those tiles, so that the
+grid itself never has to be modified.
+
+Finders can share a PathCache, so that paths which are requested repeatedly
+(e.g. by NPCs walking between their soil area and the same few places) are
+only searched once per version of the grid.
+
+AStarFinder.iter_find_path runs a search as a generator, which can be
+interrupted every few steps and resumed later (see src/npc/path_scheduler.py).
+"""
+
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Generator, Iterable, Sequence
+from heapq import heappop, heappush
+from itertools import count, pairwise
+
+import pygame
+
+from src.enums import DiagonalMovement
+from src.settings import SCALED_TILE_SIZE
+
+SQRT2 = math.sqrt(2)
+
+type _Footprint = tuple[int, int, int, int]
+"""Tiles (first x, first y, last x + 1, last y + 1) covered by a hitbox."""
+
+type _PathKey = tuple[int, tuple[int, int], tuple[int, int], DiagonalMovement]
+"""(grid id, start tile, end tile, diagonal movement) of a cached path."""
+
+type PathSearch = Generator[None, None, list[tuple[int, int]]]
+"""Search yielding every few steps, which returns the path it found."""
+
+SEARCH_SLICE_SIZE = 64
+"""Number of tiles a PathSearch expands between two yields."""
+
+_grid_ids = count()
+
+
+def complete_search(search: PathSearch) -> list[tuple[int, int]]:
+    """
+    Run the given search without interruption.
+
+    :return: The path it found
+    """
+    try:
+        while True:
+            next(search)
+    except StopIteration as e:
+        return e.value
+
+
+class SearchState:
+    def __init__(self, width: int, height: int):
+        """
+        State of searches on grids of the given size, by tile index
+        (y * width + x). Values are only valid for tiles whose _opened entry
+        equals the current _search_id.
+
+        Every PathfindingGrid holds the state of its own searches. Searches
+        which are interrupted need a separate one, as other searches might run
+        on the same grid in the meantime.
+        """
+        self.width = width
+        self.height = height
+
+        size = width * height
+        self._search_id = 0
+        self._opened = [0] * size
+        self._closed = [0] * size
+        self._g = [0.0] * size
+        self._h = [0.0] * size
+        self._parent = [-1] * size
+        self._push_order = [0] * size
+
+    def _new_search(self) -> int:
+        self._search_id += 1
+        return self._search_id
+
+    def _get_path(self, index: int) -> list[tuple[int, int]]:
+        """
+        :return: Tiles from the start of the last search to the given tile
+        """
+        path = []
+        while index != -1:
+            path.append((index % self.width, index // self.width))
+            index = self._parent[index]
+        path.reverse()
+        return path
+
+
+class PathfindingGrid(SearchState):
+    def __init__(self, matrix: list[list[int]]):
+        """
+        :param matrix: Rows of the tilemap, where values of 1 (or greater) stand
+                       for walkable tiles, and 0 for non-walkable tiles
+        """
+        height = len(matrix)
+        width = len(matrix[0]) if height else 0
+        super().__init__(width, height)
+
+        self.id = next(_grid_ids)
+        # increased whenever the walkability of a tile changes
+        self.version = 0
+
+        self._walkable = bytearray(
+            value >= 1 for row in matrix for value in row[:width]
+        )
+        self._unoccupied = [0] * (width * height)
+
+    def inside(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def walkable(self, x: int, y: int) -> bool:
+        """
+        :return: Whether the tile is inside the grid and walkable
+        """
+        return self.inside(x, y) and bool(self._walkable[y * self.width + x])
+
+    def set_walkable(self, x: int, y: int, walkable: bool):
+        """
+        :raise IndexError: If the tile is outside the grid
+        """
+        if not self.inside(x, y):
+            raise IndexError(f"Tile {(x, y)} is outside the pathfinding grid")
+        index = y * self.width + x
+        if self._walkable[index] != walkable:
+            self._walkable[index] = walkable
+            self.version += 1
+
+    def _get_neighbours(
+        self,
+        index: int,
+        diagonal: bool,
+        neighbours: list[int],
+        occupancy: "TileOccupancy | None",
+    ):
+        """
+        Replaces the content of neighbours with the walkable and unoccupied
+        neighbours of the given tile, in the order python-pathfinding visits
+        them in.
+        """
+        width = self.width
+        walkable = self._walkable
+        occupied = self._unoccupied if occupancy is None else occupancy._counts
+        x = index % width
+        neighbours.clear()
+        north = (
+            index >= width and walkable[index - width] and not occupied[index - width]
+        )
+        if north:
+            neighbours.append(index - width)
+        east = x < width - 1 and walkable[index + 1] and not occupied[index + 1]
+        if east:
+            neighbours.append(index + 1)
+        south = (
+            index < len(walkable) - width
+            and walkable[index + width]
+            and not occupied[index + width]
+        )
+        if south:
+            neighbours.append(index + width)
+        west = x > 0 and walkable[index - 1] and not occupied[index - 1]
+        if west:
+            neighbours.append(index - 1)
+        if diagonal:
+            if (
+                north
+                and west
+                and walkable[index - width - 1]
+                and not occupied[index - width - 1]
+            ):
+                neighbours.append(index - width - 1)
+            if (
+                north
+                and east
+                and walkable[index - width + 1]
+                and not occupied[index - width + 1]
+            ):
+                neighbours.append(index - width + 1)
+            if (
+                south
+                and east
+                and walkable[index + width + 1]
+                and not occupied[index + width + 1]
+            ):
+                neighbours.append(index + width + 1)
+            if (
+                south
+                and west
+                and walkable[index + width - 1]
+                and not occupied[index + width - 1]
+            ):
+                neighbours.append(index + width - 1)
+
+
+class PathCache:
+    def __init__(self, max_size: int):
+        """
+        Least recently used cache of the paths found by AStarFinder.find_path.
+        Paths found on an older version of their grid are discarded.
+
+        As the tiles covered by moving entities change all the time, they are
+        not part of the key. A cached path is only used as long as none of its
+        tiles (nor the corners its diagonal steps cut) are currently occupied,
+        though it might not be the shortest one anymore when entities that
+        were in the way have moved since.
+
+        :param max_size: Maximum number of cached paths
+        """
+        self.max_size = max_size
+        self._paths: OrderedDict[_PathKey, tuple[int, list[tuple[int, int]], float]]
+        self._paths = OrderedDict()
+
+        # statistics, for profiling
+        self.hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+        """Time (in seconds) the searches for all cache hits originally took."""
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: Share of requested paths that were taken from the cache
+        """
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0
+
+    def get(
+        self,
+        key: _PathKey,
+        grid: PathfindingGrid,
+        occupancy: "TileOccupancy | None",
+    ) -> list[tuple[int, int]] | None:
+        """
+        :return: The cached path, or None if there is no valid one
+        """
+        entry = self._paths.get(key)
+        if entry is not None:
+            version, path, search_time = entry
+            if version != grid.version:
+                del self._paths[key]
+            elif occupancy is None or not self._is_blocked(path, occupancy):
+                self._paths.move_to_end(key)
+                self.hits += 1
+                self.saved_time += search_time
+                return path
+        self.misses += 1
+        return None
+
+    @staticmethod
+    def _is_blocked(path: list[tuple[int, int]], occupancy: "TileOccupancy") -> bool:
+        for (x0, y0), (x1, y1) in pairwise(path):
+            if occupancy.occupied(x1, y1):
+                return True
+            # like the search, diagonal steps may not cut corners of
+            # occupied tiles (see PathfindingGrid._get_neighbours)
+            if (
+                x0 != x1
+                and y0 != y1
+                and (occupancy.occupied(x1, y0) or occupancy.occupied(x0, y1))
+            ):
+                return True
+        return False
+
+    def add(
+        self,
+        key: _PathKey,
+        grid: PathfindingGrid,
+        path: list[tuple[int, int]],
+        search_time: float,
+    ):
+        self._paths[key] = (grid.version, path, search_time)
+        self._paths.move_to_end(key)
+        while len(self._paths) > self.max_size:
+            self._paths.popitem(last=False)
+
+    def clear(self):
+        self._paths.clear()
+
+
+class AStarFinder:
+    def __init__(
+        self,
+        diagonal_movement: DiagonalMovement = DiagonalMovement.NEVER,
+        cache: PathCache | None = None,
+    ):
+        """
+        Finds shortest paths using the A* algorithm. Uses the manhattan
+        heuristic without and the octile heuristic with diagonal movement.
+
+        :param diagonal_movement: Whether paths may move diagonally
+        :param cache: [Optional] Cache for the paths found by find_path
+        """
+        self.diagonal_movement = diagonal_movement
+        self.cache = cache
+
+    def find_path(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        grid: PathfindingGrid,
+        occupancy: "TileOccupancy | None" = None,
+    ) -> list[tuple[int, int]]:
+        """
+        :param start: Tile the path starts on (does not have to be walkable)
+        :param end: Tile the path should end on
+        :param grid: Grid to search the path on
+        :param occupancy: [Optional] Tiles occupied by entities, which the path
+                          should not cross
+        :return: Tiles of the path, including start and end tile.
+                 Empty if there is no path between both tiles
+        :raise IndexError: If start or end are outside the grid
+        """
+        return complete_search(self.iter_find_path(start, end, grid, occupancy))
+
+    def iter_find_path(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        grid: PathfindingGrid,
+        occupancy: "TileOccupancy | None" = None,
+        state: SearchState | None = None,
+    ) -> PathSearch:
+        """
+        Like find_path, but returns the search as a generator, which yields
+        every SEARCH_SLICE_SIZE steps and returns the path.
+
+        :param state: [Optional] Search state to use instead of the one of the
+                      grid. Required if other searches might run on the grid
+                      before this one is finished
+        :raise IndexError: If start or end are outside the grid
+        """
+        if not (grid.inside(*start) and grid.inside(*end)):
+            raise IndexError(f"Path from {start} to {end} leaves the grid")
+        return self._iter_find_path(start, end, grid, occupancy, state or grid)
+
+    def _iter_find_path(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        grid: PathfindingGrid,
+        occupancy: "TileOccupancy | None",
+        state: SearchState,
+    ) -> PathSearch:
+        if self.cache is None:
+            return (yield from self._search_path(start, end, grid, occupancy, state))
+
+        key = (grid.id, start, end, self.diagonal_movement)
+        path = self.cache.get(key, grid, occupancy)
+        if path is not None:
+            return path
+
+        # only count the time spent searching, not the time between the slices
+        search = self._search_path(start, end, grid, occupancy, state)
+        search_time = 0
+        while path is None:
+            slice_start = time.perf_counter()
+            try:
+                next(search)
+            except StopIteration as e:
+                path = e.value
+            search_time += time.perf_counter() - slice_start
+            if path is None:
+                yield
+
+        # whether there is no path might depend on the occupied tiles,
+        # which aren't part of the key
+        if path:
+            self.cache.add(key, grid, path, search_time)
+        return path
+
+    def _search_path(
+        self,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        grid: PathfindingGrid,
+        occupancy: "TileOccupancy | None",
+        state: SearchState,
+    ) -> PathSearch:
+        width = grid.width
+        get_neighbours = grid._get_neighbours
+        opened, closed = state._opened, state._closed
+        g_costs, h_costs, parents = state._g, state._h, state._parent
+        push_orders = state._push_order
+        search_id = state._new_search()
+        diagonal = self.diagonal_movement == DiagonalMovement.ONLY_WHEN_NO_OBSTACLE
+        octile_factor = SQRT2 - 1
+
+        end_x, end_y = end
+        end_index = end_y * width + end_x
+        start_index = start[1] * width + start[0]
+        opened[start_index] = search_id
+        g_costs[start_index] = 0
+        h_costs[start_index] = 0
+        parents[start_index] = -1
+        push_orders[start_index] = 0
+
+        # open list entries are (f, push order, tile index). Tiles reached with
+        # a lower cost are pushed again, and only their latest entry is used
+        open_list = [(0, 0, start_index)]
+        push_count = 0
+        neighbours = []
+        steps = 0
+        while open_list:
+            _, order, index = heappop(open_list)
+            if order != push_orders[index]:
+                continue
+            closed[index] = search_id
+            if index == end_index:
+                break
+
+            steps += 1
+            if steps == SEARCH_SLICE_SIZE:
+                steps = 0
+                yield
+
+            x, y = index % width, index // width
+            get_neighbours(index, diagonal, neighbours, occupancy)
+
+            g = g_costs[index]
+            for neighbour in neighbours:
+                if closed[neighbour] == search_id:
+                    continue
+                n_x, n_y = neighbour % width, neighbour // width
+                cost = g + (1 if n_x == x or n_y == y else SQRT2)
+
+                if opened[neighbour] != search_id:
+                    opened[neighbour] = search_id
+                    dx, dy = abs(n_x - end_x), abs(n_y - end_y)
+                    if not diagonal:
+                        h_costs[neighbour] = dx + dy
+                    elif dx < dy:
+                        h_costs[neighbour] = octile_factor * dx + dy
+                    else:
+                        h_costs[neighbour] = octile_factor * dy + dx
+                elif cost >= g_costs[neighbour]:
+                    continue
+
+                g_costs[neighbour] = cost
+                parents[neighbour] = index
+                push_count += 1
+                push_orders[neighbour] = push_count
+                heappush(open_list, (cost + h_costs[neighbour], push_count, neighbour))
+        else:
+            return []
+        return state._get_path(end_index)
+
+    def find_path_to_any(
+        self,
+        start: tuple[int, int],
+        ends: Iterable[tuple[int, int]],
+        grid: PathfindingGrid,
+        max_cost: float = math.inf,
+        occupancy: "TileOccupancy | None" = None,
+    ) -> list[tuple[int, int]]:
+        """
+        Searches paths to all given tiles at once (Dijkstra), instead of running
+        a separate search for each of them.
+
+        :param start: Tile the paths start on (does not have to be walkable)
+        :param ends: Tiles the path may end on, by descending preference
+        :param grid: Grid to search the path on
+        :param max_cost: Maximum cost (length, diagonal steps costing sqrt(2))
+                         of the path. The search does not go any further
+        :param occupancy: [Optional] Tiles occupied by entities, which the path
+                          should not cross
+        :return: Shortest path (including start and end tile) to the first of
+                 the given tiles that is reachable, ignoring the start tile.
+                 Empty if none of them can be reached
+        :raise IndexError: If start is outside the grid
+        """
+        if not grid.inside(*start):
+            raise IndexError(f"Path start {start} is outside the grid")
+
+        width = grid.width
+        get_neighbours = grid._get_neighbours
+        opened, closed = grid._opened, grid._closed
+        g_costs, parents = grid._g, grid._parent
+        push_orders = grid._push_order
+        search_id = grid._new_search()
+        diagonal = self.diagonal_movement == DiagonalMovement.ONLY_WHEN_NO_OBSTACLE
+
+        start_index = start[1] * width + start[0]
+        opened[start_index] = search_id
+        g_costs[start_index] = 0
+        parents[start_index] = -1
+        push_orders[start_index] = 0
+
+        open_list = [(0, 0, start_index)]
+        push_count = 0
+        neighbours = []
+        while open_list:
+            _, order, index = heappop(open_list)
+            if order != push_orders[index]:
+                continue
+            closed[index] = search_id
+
+            x, y = index % width, index // width
+            get_neighbours(index, diagonal, neighbours, occupancy)
+
+            g = g_costs[index]
+            for neighbour in neighbours:
+                if closed[neighbour] == search_id:
+                    continue
+                n_x, n_y = neighbour % width, neighbour // width
+                cost = g + (1 if n_x == x or n_y == y else SQRT2)
+                if cost > max_cost:
+                    continue
+
+                if opened[neighbour] != search_id:
+                    opened[neighbour] = search_id
+                elif cost >= g_costs[neighbour]:
+                    continue
+
+                g_costs[neighbour] = cost
+                parents[neighbour] = index
+                push_count += 1
+                push_orders[neighbour] = push_count
+                heappush(open_list, (cost, push_count, neighbour))
+
+        for x, y in ends:
+            index = y * width + x
+            if (
+                grid.inside(x, y)
+                and index != start_index
+                and closed[index] == search_id
+            ):
+                return grid._get_path(index)
+        return []
+
+
+class TileOccupancy:
+    def __init__(
+        self, width: int, height: int, entities: Sequence[pygame.sprite.Sprite]
+    ):
+        """
+        Keeps track of the tiles covered by the hitboxes of the given (moving)
+        entities. Each entity's footprint is only updated in here once it
+        covers different tiles than before.
+
+        :param width: Width of the tilemap, in tiles
+        :param height: Height of the tilemap, in tiles
+        :param entities: Entities to keep track of. The sequence may be changed
+                         afterwards, changes are applied on the next update
+        """
+        self.width = width
+        self.height = height
+        self.entities = entities
+
+        # number of entities covering each tile, by tile index (y * width + x)
+        self._counts = [0] * (width * height)
+        self._footprints: dict[pygame.sprite.Sprite, _Footprint] = {}
+
+    @staticmethod
+    def _get_footprint(rect: pygame.Rect | pygame.FRect) -> _Footprint:
+        return (
+            int(rect.left / SCALED_TILE_SIZE),
+            int(rect.top / SCALED_TILE_SIZE),
+            math.ceil(rect.right / SCALED_TILE_SIZE),
+            math.ceil(rect.bottom / SCALED_TILE_SIZE),
+        )
+
+    def _add_footprint(self, footprint: _Footprint, count: int):
+        x_min, y_min, x_max, y_max = footprint
+        for y in range(max(y_min, 0), min(y_max, self.height)):
+            for x in range(max(x_min, 0), min(x_max, self.width)):
+                self._counts[y * self.width + x] += count
+
+    def update(self):
+        """
+        Update the footprints of all entities which moved to other tiles (or
+        were added or removed) since the last update.
+        """
+        footprints = self._footprints
+        for entity in self.entities:
+            footprint = self._get_footprint(entity.hitbox_rect)
+            old_footprint = footprints.get(entity)
+            if footprint != old_footprint:
+                if old_footprint is not None:
+                    self._add_footprint(old_footprint, -1)
+                self._add_footprint(footprint, 1)
+                footprints[entity] = footprint
+
+        if len(footprints) > len(self.entities):
+            for entity in footprints.keys() - set(self.entities):
+                self._add_footprint(footprints.pop(entity), -1)
+
+    def occupied(self, x: int, y: int) -> bool:
+        """
+        :return: Whether the tile is covered by any of the entities
+        """
+        return (
+            0 <= x < self.width
+            and 0 <= y < self.height
+            and bool(self._counts[y * self.width + x])
+        )
@@ -0,0 +1,155 @@
+"""Scheduling of path searches requested by AI-controlled Entities.
+
+Instead of searching paths immediately (which causes the game to stutter when
+several NPCs decide where to go in the same frame), requested searches are
+queued and run by PathScheduler.update, which only expands a limited number of
+tiles per frame. Searches that do not finish in time are interrupted and
+resumed in the next frame.
+
+The budget is counted in tiles rather than time, so that the frame in which an
+Entity receives its path (and therefore the whole game) does not depend on how
+fast the machine is, and stays deterministic (see RANDOM_SEED).
+"""
+
+import time
+from collections import deque
+from collections.abc import Callable
+
+from src.npc.path_finding import (
+    SEARCH_SLICE_SIZE,
+    AStarFinder,
+    PathfindingGrid,
+    PathSearch,
+    SearchState,
+    TileOccupancy,
+)
+
+_LATENCY_SAMPLES = 100
+"""Number of recently completed requests the latency statistics include."""
+
+
+class PathRequest:
+    def __init__(
+        self,
+        search: PathSearch,
+        on_complete: Callable[[list[tuple[int, int]]], None],
+    ):
+        """
+        :param search: Search for the requested path
+        :param on_complete: Called with the path once it has been found
+        """
+        self.search = search
+        self.on_complete = on_complete
+        self.cancelled = False
+        self.submit_time = time.perf_counter()
+
+    def cancel(self):
+        """
+        Cancel the request, so that on_complete is never called.
+        """
+        self.cancelled = True
+
+
+class PathScheduler:
+    def __init__(self, budget: int):
+        """
+        Runs the requested path searches one after another, in the order they
+        were requested.
+
+        :param budget: Number of tiles update may expand per frame, rounded up
+                       to whole slices of SEARCH_SLICE_SIZE tiles. Each call
+                       runs at least one slice. Cached paths and hierarchical
+                       searches count as one slice
+        """
+        self.budget = budget
+        self._requests: deque[PathRequest] = deque()
+
+        # searches which are interrupted are run on a separate search state
+        # (only the first request can ever be interrupted)
+        self._state: SearchState | None = None
+
+        # statistics, for profiling
+        self.completed = 0
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        :return: Number of requests still waiting for their path
+        """
+        return sum(not request.cancelled for request in self._requests)
+
+    @property
+    def mean_latency(self) -> float:
+        """
+        :return: Mean time (in milliseconds) between the request and the
+                 completion of the recently completed requests
+        """
+        if not self._latencies:
+            return 0
+        return sum(self._latencies) / len(self._latencies) * 1000
+
+    @property
+    def max_latency(self) -> float:
+        """
+        :return: Longest time (in milliseconds) between the request and the
+                 completion of the recently completed requests
+        """
+        return max(self._latencies, default=0) * 1000
+
+    def _get_state(self, grid: PathfindingGrid) -> SearchState:
+        if self._state is None or (self._state.width, self._state.height) != (
+            grid.width,
+            grid.height,
+        ):
+            self._state = SearchState(grid.width, grid.height)
+        return self._state
+
+    def submit(
+        self,
+        finder: AStarFinder,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        grid: PathfindingGrid,
+        on_complete: Callable[[list[tuple[int, int]]], None],
+        occupancy: TileOccupancy | None = None,
+    ) -> PathRequest:
+        """
+        Request a path search (see AStarFinder.find_path), which is run during
+        one of the next calls of update.
+
+        :param on_complete: Called with the path once it has been found
+        :return: The request, which can still be cancelled
+        :raise IndexError: If start or end are outside the grid
+        """
+        request = PathRequest(
+            finder.iter_find_path(start, end, grid, occupancy, self._get_state(grid)),
+            on_complete,
+        )
+        self._requests.append(request)
+        return request
+
+    def update(self):
+        """
+        Run the requested searches, until all of them are completed or the
+        budget for this frame is used up.
+        """
+        slices = 0
+        while self._requests:
+            request = self._requests[0]
+            if request.cancelled:
+                self._requests.popleft()
+                request.search.close()
+                continue
+
+            try:
+                next(request.search)
+            except StopIteration as e:
+                self._requests.popleft()
+                self.completed += 1
+                self._latencies.append(time.perf_counter() - request.submit_time)
+                request.on_complete(e.value)
+
+            slices += 1
+            if slices * SEARCH_SLICE_SIZE >= self.budget:
+                break
@@ -0,0 +1,275 @@
+"""Path searches requested by AI-controlled Entities, run by worker processes.
+
+Desktop builds can search paths on a pool of processes instead of the main
+thread. The walkability of the grid is shared with the workers through shared
+memory, which is only written to when the searched grid (or its walkability)
+changes, and then only where it differs.
+
+To keep the game deterministic (see RANDOM_SEED), the result of each request is
+delivered exactly one frame after it was requested, in the order the requests
+were made. Only if a worker hasn't finished by then, the main thread waits for
+it. Paths are identical to the ones found on the main thread.
+
+Not available in the web version, which has no processes.
+"""
+
+import atexit
+import multiprocessing
+import time
+import warnings
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+
+from src.enums import DiagonalMovement
+from src.exceptions import PathfindingWarning
+from src.npc.path_finding import AStarFinder, PathfindingGrid, TileOccupancy
+from src.npc.path_scheduler import PathRequest, PathScheduler
+
+type _Footprints = list[tuple[int, int, int, int]]
+"""Tiles covered by each entity (see TileOccupancy)."""
+
+type _SearchArgs = tuple[
+    type[AStarFinder],
+    DiagonalMovement,
+    tuple[int, int],
+    tuple[int, int],
+    _Footprints,
+]
+"""(finder type, diagonal movement, start, end, occupied footprints) of a
+search run by a worker."""
+
+# state of each worker process
+_worker_memory: SharedMemory | None = None
+_worker_snapshot = -1
+_worker_grid: PathfindingGrid | None = None
+_worker_finders: dict[tuple[type[AStarFinder], DiagonalMovement], AStarFinder] = {}
+
+
+def _warm_up():
+    # makes the pool start its worker processes (which takes a while, as they
+    # import the game) before the first path is requested
+    pass
+
+
+def _get_occupancy(width: int, height: int, footprints: _Footprints) -> TileOccupancy:
+    occupancy = TileOccupancy(width, height, [])
+    for footprint in footprints:
+        occupancy._add_footprint(footprint, 1)
+    return occupancy
+
+
+def _worker_find_path(
+    memory_name: str,
+    snapshot: int,
+    width: int,
+    height: int,
+    args: _SearchArgs,
+) -> list[tuple[int, int]]:
+    global _worker_memory, _worker_snapshot, _worker_grid
+
+    if snapshot != _worker_snapshot:
+        if _worker_memory is None or _worker_memory.name != memory_name:
+            if _worker_memory is not None:
+                _worker_memory.close()
+            _worker_memory = SharedMemory(memory_name)
+        if _worker_grid is None or (_worker_grid.width, _worker_grid.height) != (
+            width,
+            height,
+        ):
+            _worker_grid = PathfindingGrid([[0] * width] * height)
+        _worker_grid._walkable[:] = _worker_memory.buf[: width * height]
+        # makes finders discard anything derived from the previous snapshot
+        # (e.g. the abstract graphs of HierarchicalAStarFinders)
+        _worker_grid.version = snapshot
+        _worker_snapshot = snapshot
+
+    finder_type, diagonal_movement, start, end, footprints = args
+    finder = _worker_finders.get((finder_type, diagonal_movement))
+    if finder is None:
+        finder = finder_type(diagonal_movement)
+        _worker_finders[(finder_type, diagonal_movement)] = finder
+
+    return finder.find_path(
+        start, end, _worker_grid, _get_occupancy(width, height, footprints)
+    )
+
+
+class ProcessPathRequest(PathRequest):
+    def __init__(
+        self,
+        result: Future | list[tuple[int, int]],
+        on_complete: Callable[[list[tuple[int, int]]], None],
+        frame: int,
+        finder: AStarFinder,
+        grid: PathfindingGrid,
+        args: _SearchArgs,
+    ):
+        """
+        :param result: Future of the path, or the path if it's already known
+        :param frame: Number of the frame the request was made in
+        :param finder: Finder the path was requested from
+        :param grid: Grid the path is searched on
+        :param args: Arguments of the search run by the worker
+        """
+        super().__init__(None, on_complete)
+        self.result = result
+        self.frame = frame
+        self.finder = finder
+        self.grid = grid
+        self.args = args
+
+
+class ProcessPathScheduler(PathScheduler):
+    def __init__(self, max_workers: int):
+        """
+        Runs the requested path searches on worker processes.
+
+        :param max_workers: Number of worker processes
+        :raise OSError: If the worker processes cannot be started
+        """
+        super().__init__(0)
+        # workers are always started the same way (instead of being forked on
+        # some platforms), so that they don't inherit the state of pygame
+        self._executor = ProcessPoolExecutor(
+            max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        for _ in range(max_workers):
+            self._executor.submit(_warm_up)
+        self._broken = False
+
+        # walkability of the grid that was last searched, as seen by the workers
+        self._memory: SharedMemory | None = None
+        self._snapshot = -1
+        self._snapshot_grid: tuple[int, int] | None = None
+        """(id, version) of the grid in the snapshot."""
+
+        self._frame = 0
+
+        atexit.register(self.close)
+
+    def _update_snapshot(self, grid: PathfindingGrid):
+        size = grid.width * grid.height
+        # the workers must not see the new snapshot before they finished
+        # searching on the previous one
+        wait(
+            request.result
+            for request in self._requests
+            if isinstance(request.result, Future)
+        )
+
+        if self._memory is None or self._memory.size < size:
+            if self._memory is not None:
+                self._memory.close()
+                self._memory.unlink()
+            self._memory = SharedMemory(create=True, size=max(size, 1))
+            self._memory.buf[:size] = grid._walkable
+        else:
+            buffer = self._memory.buf
+            walkable = grid._walkable
+            for index in range(size):
+                if buffer[index] != walkable[index]:
+                    buffer[index] = walkable[index]
+
+        self._snapshot += 1
+        self._snapshot_grid = (grid.id, grid.version)
+
+    def _find_path(self, request: ProcessPathRequest) -> list[tuple[int, int]]:
+        _, _, start, end, footprints = request.args
+        occupancy = _get_occupancy(request.grid.width, request.grid.height, footprints)
+        return request.finder.find_path(start, end, request.grid, occupancy)
+
+    def submit(
+        self,
+        finder: AStarFinder,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        grid: PathfindingGrid,
+        on_complete: Callable[[list[tuple[int, int]]], None],
+        occupancy: TileOccupancy | None = None,
+    ) -> PathRequest:
+        if not (grid.inside(*start) and grid.inside(*end)):
+            raise IndexError(f"Path from {start} to {end} leaves the grid")
+
+        args = (
+            type(finder),
+            finder.diagonal_movement,
+            start,
+            end,
+            [] if occupancy is None else [*occupancy._footprints.values()],
+        )
+
+        result = None
+        if finder.cache is not None:
+            key = (grid.id, start, end, finder.diagonal_movement)
+            result = finder.cache.get(key, grid, occupancy)
+        if result is None and not self._broken:
+            if self._snapshot_grid != (grid.id, grid.version):
+                self._update_snapshot(grid)
+            result = self._executor.submit(
+                _worker_find_path,
+                self._memory.name,
+                self._snapshot,
+                grid.width,
+                grid.height,
+                args,
+            )
+
+        request = ProcessPathRequest(
+            result, on_complete, self._frame, finder, grid, args
+        )
+        if result is None:
+            request.result = self._find_path(request)
+        self._requests.append(request)
+        return request
+
+    def _get_result(self, request: ProcessPathRequest) -> list[tuple[int, int]]:
+        if not isinstance(request.result, Future):
+            return request.result
+
+        try:
+            path = request.result.result()
+        except BrokenProcessPool:
+            warnings.warn(
+                "Path worker processes stopped, searching paths on the main thread",
+                PathfindingWarning,
+            )
+            self._broken = True
+            return self._find_path(request)
+
+        _, diagonal_movement, start, end, _ = request.args
+        if request.finder.cache is not None and path:
+            key = (request.grid.id, start, end, diagonal_movement)
+            # the time the search took is unknown to the main thread
+            request.finder.cache.add(key, request.grid, path, 0)
+        return path
+
+    def update(self):
+        """
+        Complete all requests made in previous frames, waiting for their paths
+        if necessary.
+        """
+        while self._requests and self._requests[0].frame < self._frame:
+            request = self._requests.popleft()
+            if request.cancelled:
+                if isinstance(request.result, Future):
+                    request.result.cancel()
+                continue
+
+            path = self._get_result(request)
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - request.submit_time)
+            request.on_complete(path)
+
+        self._frame += 1
+
+    def close(self):
+        """
+        Stop the worker processes and release the shared memory.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
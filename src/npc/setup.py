@@ -1,17 +1,51 @@
-from pathfinding.core.diagonal_movement import DiagonalMovement
-from pathfinding.core.grid import Grid
-from pathfinding.finder.a_star import AStarFinder
+import warnings
 
+from src.enums import DiagonalMovement
+from src.exceptions import PathfindingWarning
 from src.npc.bases.chicken_base import ChickenBase
 from src.npc.bases.cow_base import CowBase
 from src.npc.bases.npc_base import NPCBase
+from src.npc.hierarchical_path_finding import HierarchicalAStarFinder
+from src.npc.path_finding import (
+    AStarFinder,
+    PathCache,
+    PathfindingGrid,
+    TileOccupancy,
+)
+from src.npc.path_scheduler import PathScheduler
+from src.settings import (
+    HIERARCHICAL_PATHFINDING,
+    PATH_CACHE_SIZE,
+    PATH_SEARCH_BUDGET,
+    PATH_WORKERS,
+)
 from src.sprites.entities.entity import Entity
 from src.sprites.entities.player import Player
 
 
+def _create_path_scheduler() -> PathScheduler:
+    if PATH_WORKERS:
+        # imported here, as processes are not available in the web version
+        from src.npc.process_path_scheduler import ProcessPathScheduler
+
+        try:
+            return ProcessPathScheduler(PATH_WORKERS)
+        except OSError as e:
+            warnings.warn(
+                f"Could not start path worker processes: {e}", PathfindingWarning
+            )
+    return PathScheduler(PATH_SEARCH_BUDGET)
+
+
 class AIData:
     Matrix: list[list[int]] = None
-    Grid: Grid = None
+    Grid: PathfindingGrid = None
+    Occupancy: TileOccupancy = None
+    """Tiles covered by moving_collideable_objects, which paths should avoid."""
+    PathCache: PathCache = None
+    """Paths found by all AI-controlled Entities."""
+    PathScheduler: PathScheduler = None
+    """Runs the path searches requested by all AI-controlled Entities."""
 
     player: Player = None
     moving_collideable_objects: list[Entity] = None
@@ -26,18 +60,29 @@ class AIData:
         moving_collideable_objects: list[Entity] = None,
     ) -> None:
         if not cls.setup:
-            NPCBase.pf_finder = AStarFinder()
+            cls.PathCache = PathCache(PATH_CACHE_SIZE)
+            cls.PathScheduler = _create_path_scheduler()
+            for ai in (NPCBase, ChickenBase, CowBase):
+                ai.pf_scheduler = cls.PathScheduler
+            if HIERARCHICAL_PATHFINDING:
+                NPCBase.pf_finder = HierarchicalAStarFinder(cache=cls.PathCache)
+            else:
+                NPCBase.pf_finder = AStarFinder(cache=cls.PathCache)
             ChickenBase.pf_finder = AStarFinder(
-                diagonal_movement=DiagonalMovement.only_when_no_obstacle
+                diagonal_movement=DiagonalMovement.ONLY_WHEN_NO_OBSTACLE,
+                cache=cls.PathCache,
             )
             CowBase.pf_finder = AStarFinder(
-                diagonal_movement=DiagonalMovement.only_when_no_obstacle
+                diagonal_movement=DiagonalMovement.ONLY_WHEN_NO_OBSTACLE,
+                cache=cls.PathCache,
             )
 
             cls.setup = True
 
         cls.Matrix = pathfinding_matrix
-        cls.Grid = Grid(matrix=cls.Matrix)
+        cls.Grid = PathfindingGrid(cls.Matrix)
+        if isinstance(NPCBase.pf_finder, HierarchicalAStarFinder):
+            NPCBase.pf_finder.prepare(cls.Grid)
 
         for ai in (NPCBase, ChickenBase, CowBase):
             ai.pf_matrix = cls.Matrix
@@ -49,3 +94,7 @@ class AIData:
         if cls.moving_collideable_objects is None:
             cls.moving_collideable_objects = []
         cls.moving_collideable_objects.append(cls.player)
+
+        cls.Occupancy = TileOccupancy(
+            cls.Grid.width, cls.Grid.height, cls.moving_collideable_objects
+        )
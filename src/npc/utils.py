@@ -1,85 +1,27 @@
 import math
 import warnings
-from contextlib import AbstractContextManager, contextmanager
-from typing import Generator
-
-from pathfinding.core.grid import Grid
+from collections.abc import Callable, Iterable
 
 from src.exceptions import PathfindingWarning
 from src.npc.bases.ai_behaviour_base import AIBehaviourBase
+from src.npc.path_finding import PathfindingGrid, TileOccupancy
 from src.npc.setup import AIData
-from src.settings import SCALED_TILE_SIZE, TILE_SIZE
+from src.settings import TILE_SIZE
 from src.support import near_tiles
 
+PF_DETOUR_FACTOR = 3
+"""Paths to any of several tiles (see pf_move_to_any) may be this many times
+longer than the length they are cut to, to get around obstacles."""
 
-# region
-@contextmanager
-def pf_grid_temporary_exclude(positions: set[tuple[int, int]], pf_grid: Grid = None):
-    if pf_grid is None:
-        pf_grid = AIData.Grid
-
-    _old_walkable_values: dict[tuple[int, int], bool] = {}
 
-    try:
-        for x, y in positions:
-            try:
-                _old_walkable_values[(x, y)] = pf_grid.walkable(x, y)
-                pf_grid.node(x, y).walkable = False
-            except IndexError:
-                pass
-        yield
-    finally:
-        for x, y in positions:
-            pf_grid.node(x, y).walkable = _old_walkable_values[(x, y)]
-
-
-@contextmanager
-def pf_exclude_player_position(pf_grid: Grid = None):
-    if pf_grid is None:
-        pf_grid = AIData.Grid
-
-    player_hitbox = AIData.player.hitbox_rect
-    player_x_min = int(player_hitbox.left / SCALED_TILE_SIZE)
-    player_x_max = math.ceil(player_hitbox.right / SCALED_TILE_SIZE)
-    player_y_min = int(player_hitbox.top / SCALED_TILE_SIZE)
-    player_y_max = math.ceil(player_hitbox.bottom / SCALED_TILE_SIZE)
-
-    player_tile_positions = [
-        (x + player_x_min, y + player_y_min)
-        for x in range(player_x_max - player_x_min)
-        for y in range(player_y_max - player_y_min)
-    ]
-
-    with pf_grid_temporary_exclude(set(player_tile_positions), pf_grid=pf_grid) as ctx:
-        yield ctx
-
-
-@contextmanager
-def pathfinding_context(
-    *args, pf_grid: Grid = None
-) -> Generator[AbstractContextManager, None, None]:
-    if pf_grid is None:
-        pf_grid = AIData.Grid
-
-    positions = set()
-    for obj in AIData.moving_collideable_objects:
-        current_hitbox = obj.hitbox_rect
-        x_min = int(current_hitbox.left / SCALED_TILE_SIZE)
-        x_max = math.ceil(current_hitbox.right / SCALED_TILE_SIZE)
-        y_min = int(current_hitbox.top / SCALED_TILE_SIZE)
-        y_max = math.ceil(current_hitbox.bottom / SCALED_TILE_SIZE)
-
-        current_positions = [
-            (x + x_min, y + y_min)
-            for x in range(x_max - x_min)
-            for y in range(y_max - y_min)
-        ]
-
-        for pos in current_positions:
-            positions.add(pos)
-
-    with pf_grid_temporary_exclude(positions, pf_grid=pf_grid) as ctx:
-        yield ctx
+# region
+def pf_get_occupancy() -> TileOccupancy:
+    """
+    :return: Tiles currently covered by moving entities, which paths should
+             avoid (updated for entities that moved since the last call)
+    """
+    AIData.Occupancy.update()
+    return AIData.Occupancy
 
 
 def pf_add_matrix_collision(
@@ -114,25 +56,67 @@ def pf_move_to(
     ai: AIBehaviourBase,
     target_tile: tuple[int, int],
     max_length: int = -1,
-    pf_grid: Grid = None,
+    pf_grid: PathfindingGrid = None,
+    on_path: Callable[[], None] = None,
+    on_no_path: Callable[[], bool] = None,
 ):
     """
-    Makes the Entity move to the given tile.
+    Makes the Entity move to the given tile, once the path to it has been found
+    (see AIBehaviour.request_path_to_tile).
     :param ai: Entity that should move
     :param target_tile: Tile the Entity should move to
     :param max_length: (Optional) maximum length of the created path
     :param pf_grid: (Optional) pathfinding grid to use. Defaults to self.pf_grid
+    :param on_path: (Optional) called once the path has been found
+    :param on_no_path: (Optional) called if no path has been found, returns
+                       whether another path has been requested instead
+    :return: True if path has successfully been requested, otherwise False
+    """
+
+    def _on_path():
+        if 0 < max_length < len(ai.pf_path):
+            ai.pf_path = ai.pf_path[:max_length]
+        if on_path is not None:
+            on_path()
+
+    return ai.request_path_to_tile(
+        target_tile,
+        pf_grid=pf_grid,
+        pf_occupancy=pf_get_occupancy(),
+        on_path=_on_path,
+        on_no_path=on_no_path,
+    )
+
+
+def pf_move_to_any(
+    ai: AIBehaviourBase,
+    target_tiles: Iterable[tuple[int, int]],
+    max_length: int = -1,
+    pf_grid: PathfindingGrid = None,
+) -> bool:
+    """
+    Makes the Entity move to the first of the given tiles it can reach.
+    :param ai: Entity that should move
+    :param target_tiles: Tiles the Entity may move to, by descending preference
+    :param max_length: (Optional) maximum length of the created path. Tiles
+                       that can only be reached with long detours (costing more
+                       than PF_DETOUR_FACTOR times this length) are ignored
+    :param pf_grid: (Optional) pathfinding grid to use. Defaults to self.pf_grid
     :return: True if path has successfully been created, otherwise False
     """
-    with pathfinding_context(pf_grid=pf_grid):
-        if ai.create_path_to_tile(target_tile, pf_grid=pf_grid):
-            if 0 < max_length < len(ai.pf_path):
-                ai.pf_path = ai.pf_path[:max_length]
-            return True
+    max_cost = max_length * PF_DETOUR_FACTOR if max_length > 0 else math.inf
+    if ai.create_path_to_any_tile(
+        target_tiles, max_cost, pf_grid=pf_grid, pf_occupancy=pf_get_occupancy()
+    ):
+        if 0 < max_length < len(ai.pf_path):
+            ai.pf_path = ai.pf_path[:max_length]
+        return True
     return False
 
 
-def pf_wander(ai: AIBehaviourBase, radius: int = 5, pf_grid: Grid = None) -> bool:
+def pf_wander(
+    ai: AIBehaviourBase, radius: int = 5, pf_grid: PathfindingGrid = None
+) -> bool:
     """
     Makes the Entity wander to a random tile in the given radius.
     :param ai: Entity that should wander
@@ -143,7 +127,9 @@ def pf_wander(ai: AIBehaviourBase, radius: int = 5, pf_grid: Grid = None) -> boo
     # current position on the tilemap
     tile_coord = ai.get_tile_pos()
 
-    for pos in near_tiles(tile_coord, radius, shuffle=True):
-        if pf_move_to(ai, pos, max_length=radius, pf_grid=pf_grid):
-            return True
-    return False
+    return pf_move_to_any(
+        ai,
+        near_tiles(tile_coord, radius, shuffle=True),
+        max_length=radius,
+        pf_grid=pf_grid,
+    )
@@ -23,15 +23,10 @@ class BoxKeybindingsLabel:
 
         self.rect.topleft = OVERLAY_POSITIONS["box_info_label"]
 
-    def display(self):
-        if not self.enabled:
-            return
-
-        # colors connected to player state
-        white = "White"
-        gray = "Gray"
-        foreground_color = gray if self.player.blocked else white
+        # rendered label (surf, rect) for each foreground color
+        self._rendered_labels: dict[str, tuple[pygame.Surface, pygame.FRect]] = {}
 
+    def _render(self, foreground_color: str) -> tuple[pygame.Surface, pygame.FRect]:
         # rects and surfs
         pad_y = 2
 
@@ -41,9 +36,22 @@ class BoxKeybindingsLabel:
         box_keybindings_label_rect = box_keybindings_label_surf.get_frect(
             midright=(self.rect.right, self.rect.centery + pad_y)
         )
+        return box_keybindings_label_surf, box_keybindings_label_rect
+
+    def display(self):
+        if not self.enabled:
+            return
+
+        # colors connected to player state
+        white = "White"
+        gray = "Gray"
+        foreground_color = gray if self.player.blocked else white
+
+        if foreground_color not in self._rendered_labels:
+            self._rendered_labels[foreground_color] = self._render(foreground_color)
 
         # display
-        FBLITTER.schedule_blit(box_keybindings_label_surf, box_keybindings_label_rect)
+        FBLITTER.schedule_blit(*self._rendered_labels[foreground_color])
 
 
 class BoxKeybindings:
@@ -69,6 +77,10 @@ class BoxKeybindings:
         self.color = (255, 255, 255)
         self.padding = 8
 
+        # the content of the box never changes,
+        # so everything to blit is only prepared once (when first drawn)
+        self._blit_list: list[tuple[pygame.Surface, pygame.Rect | pygame.FRect]] = []
+
         # prepare texts
         self.setup_text_list()
 
@@ -172,7 +184,11 @@ class BoxKeybindings:
         return translation.split("|") if "|" in translation else [translation]
 
     def load_and_scale_image(self, img_name, target_size):
-        return pygame.transform.scale(import_image(img_name), target_size)
+        # the key images are much larger than the target size already,
+        # scaling them up by SCALE_FACTOR first would only waste time
+        return pygame.transform.scale(
+            import_image(img_name, scale_factor=1), target_size
+        )
 
     def load_and_scale_image_by_factor(self, img_name):
         return pygame.transform.scale_by(import_image(img_name), 1.08)
@@ -184,8 +200,13 @@ class BoxKeybindings:
         if not self.visible:
             return
 
+        if not self._blit_list:
+            self.prepare_blit_list()
+        FBLITTER.schedule_blits(self._blit_list)
+
+    def prepare_blit_list(self):
         # display box
-        FBLITTER.schedule_blit(self.image, self.box_keybindings_rect)
+        self._blit_list = [(self.image, self.box_keybindings_rect)]
 
         start_key_topleft = self.box_keybindings_rect.topleft
         # iterate over text list
@@ -210,28 +231,24 @@ class BoxKeybindings:
 
             # prepare key for draw
             if len(key) > 0:
-                self.draw_key_surface(current_key_topleft, key, display_surface)
+                self.draw_key_surface(current_key_topleft, key)
 
             # prepare description for draw
             if len(description) > 1:
                 current_topleft = current_desc_topleft
                 for description_item in description:
-                    self.draw_description_item(
-                        current_topleft, description_item, display_surface
-                    )
+                    self.draw_description_item(current_topleft, description_item)
                     current_topleft = (current_topleft[0], current_topleft[1] + 18)
             else:
-                self.draw_description_item(
-                    current_desc_topleft, description[0], display_surface
-                )
+                self.draw_description_item(current_desc_topleft, description[0])
 
-    def draw_description_item(self, current_topleft, description_item, display_surface):
+    def draw_description_item(self, current_topleft, description_item):
         text_surf = self.font.render(description_item, False, "Black")
         text_rect = text_surf.get_frect(topleft=current_topleft)
         # display_surface.blit(text_surf, text_rect)
-        FBLITTER.schedule_blit(text_surf, text_rect)
+        self._blit_list.append((text_surf, text_rect))
 
-    def draw_key_surface(self, current_key_topleft, key, display_surface):
+    def draw_key_surface(self, current_key_topleft, key):
         if key in self.key_images.keys():
             key_img = self.key_images[key]
             generic = False
@@ -245,12 +262,12 @@ class BoxKeybindings:
             7,
         )
 
-        FBLITTER.schedule_blit(key_img, key_rect)
+        self._blit_list.append((key_img, key_rect))
         if generic:
             key_surf = self.font.render(key, False, "White")
             key_tmp_rect = key_surf.get_frect()
             key_surf.get_frect(left=key_tmp_rect.left + 10, top=key_rect.top + 10)
-            FBLITTER.schedule_blit(key_surf, key_rect)
+            self._blit_list.append((key_surf, key_rect))
 
     def get_ordered_info(self, info_key) -> dict:
         result = {}
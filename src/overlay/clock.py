@@ -50,6 +50,9 @@ class Clock:
 
         self.rect.topright = OVERLAY_POSITIONS["clock"]
 
+        self._rendered_state: tuple[str, str] | None = None
+        self._surf: pygame.Surface | None = None
+
     def display_analog(self):
         # get time
         time = self.get_time()
@@ -75,37 +78,52 @@ class Clock:
         pygame.draw.line(self.display_surface, "Black", self.center, hour_vector, 5)
         pygame.draw.circle(self.display_surface, "Black", self.center, 4)
 
-    def display_digital(self):
-        # get time
-        time = self.get_time()
-
-        # if hours are less than 10, add a 0 to stay in the hh:mm format
-        hours = str(time[0]).rjust(2, "0")
-
-        # if minutes are less than 10, add a 0 to stay in the hh:mm format
-        minutes = str(time[1]).rjust(2, "0")
+    def _render_digital(self, hours: str, minutes: str) -> pygame.Surface:
+        surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        rect = surf.get_rect()
 
         # rects and surfs
         pady = 2
 
         colon_surf = self.font.render(":", False, "Black")
-        colon_rect = colon_surf.get_frect(
-            center=(self.rect.centerx, self.rect.centery + pady)
-        )
+        colon_rect = colon_surf.get_frect(center=(rect.centerx, rect.centery + pady))
 
         hour_surf = self.font.render(hours, False, "Black")
         hour_rect = hour_surf.get_frect(
-            midright=(self.rect.centerx - colon_rect.width, self.rect.centery + pady)
+            midright=(rect.centerx - colon_rect.width, rect.centery + pady)
         )
 
         minute_surf = self.font.render(minutes, False, "Black")
         minute_rect = minute_surf.get_frect(
-            midleft=(self.rect.centerx + colon_rect.width, self.rect.centery + pady)
+            midleft=(rect.centerx + colon_rect.width, rect.centery + pady)
         )
 
+        pygame.draw.rect(surf, "white", rect, 0, 4)
+        pygame.draw.rect(surf, "black", rect, 4, 4)
+        surf.fblits(
+            (
+                (colon_surf, colon_rect),
+                (hour_surf, hour_rect),
+                (minute_surf, minute_rect),
+            )
+        )
+        return surf
+
+    def display_digital(self):
+        # get time
+        time = self.get_time()
+
+        # if hours are less than 10, add a 0 to stay in the hh:mm format
+        hours = str(time[0]).rjust(2, "0")
+
+        # if minutes are less than 10, add a 0 to stay in the hh:mm format
+        minutes = str(time[1]).rjust(2, "0")
+
+        # only re-render once per (in-game) minute
+        state = (hours, minutes)
+        if state != self._rendered_state:
+            self._rendered_state = state
+            self._surf = self._render_digital(hours, minutes)
+
         # display
-        FBLITTER.draw_rect("white", self.rect, 0, 4)
-        FBLITTER.draw_rect("black", self.rect, 4, 4)
-        FBLITTER.schedule_blit(colon_surf, colon_rect)
-        FBLITTER.schedule_blit(hour_surf, hour_rect)
-        FBLITTER.schedule_blit(minute_surf, minute_rect)
+        FBLITTER.schedule_blit(self._surf, self.rect)
@@ -1,5 +1,4 @@
-import pygame
-
+from src import game_clock
 from src.settings import SECONDS_PER_GAME_MINUTE
 
 
@@ -11,7 +10,7 @@ class GameTime:
         self.game_minute = 0  # game starts at this minute
 
         # gets the creation time in ticks
-        self.last_time = pygame.time.get_ticks()
+        self.last_time = game_clock.get_ticks()
 
     def set_time(self, hours, minutes):
         self.game_hour = hours
@@ -22,7 +21,7 @@ class GameTime:
 
     def update(self):
         # day-night cycle
-        current_time = pygame.time.get_ticks()
+        current_time = game_clock.get_ticks()
 
         # if more than SECONDS_PER_GAME_MINUTE has passed, update clock
         if current_time - self.last_time > SECONDS_PER_GAME_MINUTE * 1000:
@@ -23,21 +23,37 @@ class Money:
 
         self.rect.bottomright = OVERLAY_POSITIONS["money"]
 
-    def display(self):
-        # colors connected to player state
-        black = "Black"
-        gray = "Gray"
-        foreground_color = gray if self.player.blocked else black
+        self._rendered_state: tuple[int, str] | None = None
+        self._surf: pygame.Surface | None = None
+
+    def _render(self, foreground_color: str) -> pygame.Surface:
+        surf = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        rect = surf.get_rect()
 
         # rects and surfs
         pad_y = 2
 
         money_surf = self.font.render(f"${self.player.money}", False, foreground_color)
         money_rect = money_surf.get_frect(
-            midright=(self.rect.right - 20, self.rect.centery + pad_y)
+            midright=(rect.right - 20, rect.centery + pad_y)
         )
 
+        pygame.draw.rect(surf, "white", rect, 0, 4)
+        pygame.draw.rect(surf, foreground_color, rect, 4, 4)
+        surf.blit(money_surf, money_rect)
+        return surf
+
+    def display(self):
+        # colors connected to player state
+        black = "Black"
+        gray = "Gray"
+        foreground_color = gray if self.player.blocked else black
+
+        # only re-render when the displayed amount or color changed
+        state = (self.player.money, foreground_color)
+        if state != self._rendered_state:
+            self._rendered_state = state
+            self._surf = self._render(foreground_color)
+
         # display
-        FBLITTER.draw_rect("white", self.rect, 0, 4)
-        FBLITTER.draw_rect(foreground_color, self.rect, 4, 4)
-        FBLITTER.schedule_blit(money_surf, money_rect)
+        FBLITTER.schedule_blit(self._surf, self.rect)
@@ -143,6 +143,8 @@ class SoilArea:
         self.soil_sprites = pygame.sprite.Group()
         self.water_sprites = pygame.sprite.Group()
         self.plant_sprites = pygame.sprite.Group()
+        # whether the Sprites are currently part of the level's Sprite group
+        self._attached = False
 
         self.tiles = {}
 
@@ -242,6 +244,21 @@ class SoilArea:
                 if tile.planted:
                     self._unwatered_tiles.add(tile.pos)
 
+    def attach_sprites(self):
+        """Adds all Sprites of the area to the level's Sprite group."""
+        self.all_sprites.add(self.soil_sprites, self.plant_sprites, self.water_sprites)
+        self._attached = True
+
+    def detach_sprites(self):
+        """
+        Removes all Sprites of the area from the level's Sprite group.
+        They are still kept in the area's own Sprite groups.
+        """
+        self.all_sprites.remove(
+            self.soil_sprites, self.plant_sprites, self.water_sprites
+        )
+        self._attached = False
+
     # def reset(self):
     #     self.tiles = {}
     #     self.soil_sprites.empty()
@@ -251,10 +268,8 @@ class SoilArea:
     def create_soil_tiles(
         self, layer: TiledTileLayer, previous_soil_data: dict | None = None
     ):
+        self.attach_sprites()
         if self.tiles:
-            self.all_sprites.add(
-                self.soil_sprites, self.plant_sprites, self.water_sprites
-            )
             return
         for x, y, _ in layer.tiles():
             tile = Tile((x, y), ())
@@ -342,7 +357,10 @@ class SoilArea:
                     (),
                     Layer.SOIL_WATER,
                 )
-                water.add(self.all_sprites, self.water_sprites)
+                water.add(self.water_sprites)
+                # e.g. when it starts raining while the area's map is detached
+                if self._attached:
+                    water.add(self.all_sprites)
             return True
         return False
 
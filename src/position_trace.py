@@ -0,0 +1,345 @@
+"""Compact binary traces of the trajectories of the player and NPCs.
+
+Every frame, PositionTraceRecorder.record samples the position (centre of the
+hitbox, rounded to pixels), facing direction and state of each entity into a
+preallocated buffer. Only entities which changed since their previous sample are
+recorded. When the buffer is full (or the trace is closed), its content is
+encoded and appended to the trace file of the current round.
+
+A trace file starts with TRACE_MAGIC and the format version (one byte), followed
+by records. Each record starts with its type (one byte), followed by unsigned
+variable-length integers (7 bits per byte, least significant first):
+
+- map: length, UTF-8 name. Entities are sampled on this map from now on
+- entity: id, length, UTF-8 name
+- state: id, length, UTF-8 name (e.g. "walk")
+- frame: frames since the previous frame record, milliseconds since the
+  previous frame record. The following samples were taken during this frame
+- sample: entity id, x and y relative to the previous sample of the entity
+  (zigzag-encoded, so that small negative numbers stay small), facing direction
+  (see Direction), state id
+
+Positions are relative to (0, 0) for the first sample of an entity on a map.
+read_position_trace decodes a trace (see tools/read_position_trace.py).
+"""
+
+import atexit
+import os
+import time
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO, NamedTuple
+
+from src.npc.bases.npc_base import NPCBase
+from src.sprites.entities.entity import Entity
+
+TRACE_MAGIC = b"PTRC"
+TRACE_VERSION = 1
+TRACE_SUFFIX = ".ptrace"
+
+_MAP = 1
+_ENTITY = 2
+_STATE = 3
+_FRAME = 4
+_SAMPLE = 5
+
+_FIELDS = 6
+"""Number of integers in each row of the buffer."""
+
+
+class TraceSample(NamedTuple):
+    frame: int
+    time: float
+    """Seconds since the start of the trace."""
+    map: str
+    entity: str
+    x: int
+    y: int
+    facing: int
+    state: str
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_text(out: bytearray, text: str):
+    encoded = text.encode("utf-8")
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+def _get_entity_name(entity: Entity) -> str:
+    if isinstance(entity, NPCBase):
+        # the id of the NPC's object in the map
+        return f"npc {entity.npc_id}"
+    return type(entity).__name__.lower()
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class PositionTraceRecorder:
+    def __init__(self, trace_dir: str, buffer_size: int = 1024):
+        """
+        Records the trajectories of entities into one trace file per round.
+
+        :param trace_dir: Directory the traces are stored in
+        :param buffer_size: Number of samples (and names) which are buffered
+                            before they are written to the trace file
+        """
+        self.trace_dir = trace_dir
+        self._session = time.strftime("%Y%m%d_%H%M%S")
+
+        self._buffer = array("i", [0]) * (buffer_size * _FIELDS)
+        self._length = 0
+        """Number of rows used in the buffer."""
+        self._names: list[str] = []
+        """Names referenced by map, entity and state rows in the buffer."""
+        self._file: BinaryIO | None = None
+
+        # state of the trace while recording
+        self._map: str | None = None
+        self._entity_ids: dict[Entity, int] = {}
+        self._state_ids: dict[str, int] = {}
+        self._samples: dict[int, tuple[int, int, int, int]] = {}
+        self._frame = 0
+        self._time = 0.0
+
+        # state of the trace while encoding
+        self._positions: dict[int, tuple[int, int]] = {}
+        self._encoded_frame = 0
+        self._encoded_time = 0
+
+        atexit.register(self.close)
+
+    @property
+    def recording(self) -> bool:
+        """
+        :return: Whether a trace is being recorded
+        """
+        return self._file is not None
+
+    def start_trace(self, name: str):
+        """
+        Close the current trace, and start recording a new one.
+
+        :param name: Name of the trace (e.g. the round), which is part of its
+                     file name
+        """
+        self.close()
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f"{self._session}_{name}{TRACE_SUFFIX}")
+        self._file = open(path, "wb")
+        self._file.write(TRACE_MAGIC + bytes((TRACE_VERSION,)))
+
+        self._map = None
+        self._entity_ids.clear()
+        self._state_ids.clear()
+        self._samples.clear()
+        self._frame = 0
+        self._time = 0.0
+        self._positions.clear()
+        self._encoded_frame = 0
+        self._encoded_time = 0
+
+    def close(self):
+        """
+        Write the buffered samples to the current trace, and close it.
+        """
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    def _append(
+        self, kind: int, a: int, b: int = 0, c: int = 0, d: int = 0, e: int = 0
+    ):
+        if self._length * _FIELDS == len(self._buffer):
+            self.flush()
+        buffer = self._buffer
+        index = self._length * _FIELDS
+        buffer[index] = kind
+        buffer[index + 1] = a
+        buffer[index + 2] = b
+        buffer[index + 3] = c
+        buffer[index + 4] = d
+        buffer[index + 5] = e
+        self._length += 1
+
+    def _append_name(self, kind: int, name: str, name_id: int = 0):
+        # flushing clears the names, so it must happen before taking the index
+        if self._length * _FIELDS == len(self._buffer):
+            self.flush()
+        self._append(kind, name_id, len(self._names))
+        self._names.append(name)
+
+    def record(self, dt: float, map_name: str, entities: Iterable[Entity]):
+        """
+        Sample the given entities, if a trace is being recorded.
+
+        :param dt: Seconds since the previous frame
+        :param map_name: Name of the map the entities are on
+        :param entities: Entities to sample
+        """
+        if self._file is None:
+            return
+        self._frame += 1
+        self._time += dt
+
+        if map_name != self._map:
+            self._map = map_name
+            self._append_name(_MAP, map_name)
+            # the ids of entities are kept, but they are sampled anew
+            self._samples.clear()
+
+        is_frame_recorded = False
+        for entity in entities:
+            entity_id = self._entity_ids.get(entity)
+            if entity_id is None:
+                entity_id = len(self._entity_ids)
+                self._entity_ids[entity] = entity_id
+                self._append_name(_ENTITY, _get_entity_name(entity), entity_id)
+            state_id = self._state_ids.get(entity.state)
+            if state_id is None:
+                state_id = len(self._state_ids)
+                self._state_ids[entity.state] = state_id
+                self._append_name(_STATE, entity.state, state_id)
+
+            x, y = entity.hitbox_rect.center
+            sample = (round(x), round(y), entity.facing_direction, state_id)
+            if self._samples.get(entity_id) == sample:
+                continue
+            self._samples[entity_id] = sample
+
+            if not is_frame_recorded:
+                self._append(_FRAME, self._frame, round(self._time * 1000))
+                is_frame_recorded = True
+            self._append(_SAMPLE, entity_id, *sample)
+
+    def flush(self):
+        """
+        Encode the buffered samples, and write them to the current trace.
+        """
+        if self._file is None or not self._length:
+            return
+
+        out = bytearray()
+        buffer = self._buffer
+        positions = self._positions
+        for index in range(0, self._length * _FIELDS, _FIELDS):
+            kind = buffer[index]
+            out.append(kind)
+            if kind == _SAMPLE:
+                entity_id, x, y = buffer[index + 1 : index + 4]
+                previous_x, previous_y = positions.get(entity_id, (0, 0))
+                positions[entity_id] = (x, y)
+                _write_varint(out, entity_id)
+                _write_varint(out, _zigzag(x - previous_x))
+                _write_varint(out, _zigzag(y - previous_y))
+                out.append(buffer[index + 4])
+                _write_varint(out, buffer[index + 5])
+            elif kind == _FRAME:
+                frame, time_ms = buffer[index + 1 : index + 3]
+                _write_varint(out, frame - self._encoded_frame)
+                _write_varint(out, time_ms - self._encoded_time)
+                self._encoded_frame = frame
+                self._encoded_time = time_ms
+            elif kind == _MAP:
+                _write_text(out, self._names[buffer[index + 2]])
+                positions.clear()
+            else:
+                _write_varint(out, buffer[index + 1])
+                _write_text(out, self._names[buffer[index + 2]])
+
+        self._file.write(out)
+        self._file.flush()
+        self._length = 0
+        self._names.clear()
+
+
+def read_position_trace(path: str) -> Iterator[TraceSample]:
+    """
+    Decode a trace written by PositionTraceRecorder.
+
+    :param path: Path of the trace file
+    :return: The samples of the trace, in the order they were recorded. An
+             entity without a sample in a frame hasn't changed since its
+             previous sample
+    :raise ValueError: If the file is not a trace (of a supported version)
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[: len(TRACE_MAGIC)] != TRACE_MAGIC:
+        raise ValueError(f"{path} is not a position trace")
+    if data[len(TRACE_MAGIC)] != TRACE_VERSION:
+        raise ValueError(f"Unsupported position trace version {data[4]} of {path}")
+
+    position = len(TRACE_MAGIC) + 1
+
+    def read_varint() -> int:
+        nonlocal position
+        value = shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def read_text() -> str:
+        nonlocal position
+        length = read_varint()
+        position += length
+        return data[position - length : position].decode("utf-8")
+
+    map_name = ""
+    entities: dict[int, str] = {}
+    states: dict[int, str] = {}
+    positions: dict[int, tuple[int, int]] = {}
+    frame = time_ms = 0
+    while position < len(data):
+        kind = data[position]
+        position += 1
+        if kind == _SAMPLE:
+            entity_id = read_varint()
+            previous_x, previous_y = positions.get(entity_id, (0, 0))
+            x = previous_x + _unzigzag(read_varint())
+            y = previous_y + _unzigzag(read_varint())
+            positions[entity_id] = (x, y)
+            facing = data[position]
+            position += 1
+            yield TraceSample(
+                frame,
+                time_ms / 1000,
+                map_name,
+                entities[entity_id],
+                x,
+                y,
+                facing,
+                states[read_varint()],
+            )
+        elif kind == _FRAME:
+            frame += read_varint()
+            time_ms += read_varint()
+        elif kind == _MAP:
+            map_name = read_text()
+            positions.clear()
+        elif kind == _ENTITY:
+            entity_id = read_varint()
+            entities[entity_id] = read_text()
+        elif kind == _STATE:
+            state_id = read_varint()
+            states[state_id] = read_text()
+        else:
+            raise ValueError(f"Unknown record type {kind} in {path}")
@@ -0,0 +1,139 @@
+"""Loading of the game's assets behind the first screens.
+
+Work that doesn't need the display (reading and decoding files) is submitted to
+a thread pool, while everything that does (converting surfaces, setting up the
+screens...) is run on the main thread, a few steps per frame.
+"""
+
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import pygame
+
+from src.fblitter import FBLITTER
+from src.settings import IS_WEB, SCREEN_HEIGHT, SCREEN_WIDTH
+
+PRELOAD_FRAME_BUDGET = 1 / 60
+"""Time (in seconds) Preloader.update may spend on main thread steps per frame.
+Single steps taking longer than this are still run completely."""
+
+_LOADING_BAR_RECT = pygame.Rect(0, 0, 400, 16)
+_LOADING_BAR_RECT.midbottom = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 40)
+
+type _Task = tuple[Future | Callable[[], Any] | None, Callable[..., None] | None]
+"""(result of the loading part, main thread part) of a task."""
+
+
+class Preloader:
+    def __init__(self, max_workers: int | None = None):
+        """
+        Runs loading tasks in the order they were added. The main thread part
+        of a task only runs once every previous task has completely finished.
+
+        :param max_workers: Maximum number of threads files are loaded on
+        """
+        # threads are not available in the web version, where everything is
+        # loaded on the main thread instead (still spread over several frames)
+        self._executor = None
+        if not IS_WEB:
+            self._executor = ThreadPoolExecutor(
+                max_workers, thread_name_prefix="preloader"
+            )
+
+        self._tasks: deque[_Task] = deque()
+        self._task_count = 0
+        self._finished_count = 0
+
+    @property
+    def done(self) -> bool:
+        return not self._tasks
+
+    @property
+    def progress(self) -> float:
+        """
+        :return: Share of all added tasks that are finished (between 0 and 1)
+        """
+        if not self._task_count:
+            return 1
+        return self._finished_count / self._task_count
+
+    def submit(
+        self,
+        load: Callable[[], Any],
+        then: Callable[[Any], None] | None = None,
+    ):
+        """
+        Add a task, whose first part is run on another thread.
+
+        :param load: Loads something without requiring the display
+                     (e.g. decoding an image without converting it)
+        :param then: [Optional] Called on the main thread with the return value
+                     of load
+        """
+        if self._executor is not None:
+            self._tasks.append((self._executor.submit(load), then))
+        else:
+            self._tasks.append((load, then))
+        self._task_count += 1
+
+    def schedule(self, step: Callable[[], None]):
+        """
+        Add a task which is only run on the main thread.
+        """
+        self._tasks.append((None, step))
+        self._task_count += 1
+
+    def _run_next(self, block: bool) -> bool:
+        """
+        :param block: Whether to wait for the loading part of the next task
+        :return: Whether the next task could be run
+        """
+        load, then = self._tasks[0]
+        if isinstance(load, Future) and not block and not load.done():
+            return False
+        self._tasks.popleft()
+
+        if load is None:
+            then()
+        else:
+            # Future.result re-raises any exception raised while loading
+            result = load.result() if isinstance(load, Future) else load()
+            if then is not None:
+                then(result)
+
+        self._finished_count += 1
+        if self.done and self._executor is not None:
+            self._executor.shutdown(wait=False)
+        return True
+
+    def update(self, time_budget: float = PRELOAD_FRAME_BUDGET):
+        """
+        Run as many finished tasks as possible in the given time.
+        """
+        start = time.perf_counter()
+        while self._tasks and time.perf_counter() - start < time_budget:
+            if not self._run_next(block=False):
+                break
+
+    def finish(self):
+        """
+        Run all remaining tasks, waiting for them if necessary.
+        """
+        while self._tasks:
+            self._run_next(block=True)
+
+    def draw(self):
+        """
+        Draw a loading bar showing the current progress.
+        """
+        if self.done:
+            return
+        fill_rect = _LOADING_BAR_RECT.copy()
+        fill_rect.width = round(_LOADING_BAR_RECT.width * self.progress)
+        FBLITTER.draw_rect((210, 204, 255), _LOADING_BAR_RECT, border_radius=8)
+        if fill_rect.width:
+            FBLITTER.draw_rect((141, 133, 201), fill_rect, border_radius=8)
+        FBLITTER.draw_rect((255, 255, 255), _LOADING_BAR_RECT, 2, border_radius=8)
@@ -0,0 +1,351 @@
+"""Recording and replaying the input of sessions.
+
+To benchmark and regression-test whole rounds, a session can be recorded (see
+INPUT_RECORD) and replayed (see INPUT_REPLAY) headlessly, e.g. with
+SDL_VIDEODRIVER=dummy, and as fast as the game can run.
+
+Given the same RANDOM_SEED, save file and input, the game behaves identically,
+as long as it reads time only from src/game_clock.py and input only through
+the current InputSource (Game.input, or the functions of this module). The
+recording therefore contains the save file the session started with, and for
+each frame its duration, the events the player caused (keyboard, mouse,
+window...) and the position of the player after the frame. Replays warn when
+the player ends up elsewhere than during the recording.
+
+Events posted by the game itself (see src/events.py) are not recorded, only
+their position among the other events, as the replay posts them again.
+
+A recording is a text file with one JSON object per line, a header followed by
+one line per frame:
+
+    {"version": 1, "seed": <RANDOM_SEED>, "save": <save file>, "keybinds": ...}
+    {"dt": <milliseconds>, "events": [[<type>, <attributes>], null, ...],
+     "preload": true, "state": [<x>, <y>]}
+
+"events" is left out if there were none, "preload" once the assets are loaded,
+and "state" while there is no player yet.
+"""
+
+import atexit
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+from collections import deque
+
+import pygame
+
+from src import xplat
+from src.exceptions import ReplayWarning
+from src.preloader import Preloader
+from src.settings import RANDOM_SEED
+from src.support import load_data
+
+REPLAY_VERSION = 1
+
+type _RecordedEvent = list | None
+"""[type, attributes] of an event caused by the player, or None for an event
+posted by the game."""
+
+
+def _encode_event(event: pygame.event.Event) -> _RecordedEvent:
+    if event.type >= pygame.USEREVENT:
+        return None
+    # e.g. the window of keyboard events can't be recorded (nor is it used)
+    attributes = {
+        key: value
+        for key, value in event.dict.items()
+        if isinstance(value, (bool, int, float, str))
+        or (
+            isinstance(value, tuple)
+            and all(isinstance(item, (int, float)) for item in value)
+        )
+    }
+    return [event.type, attributes]
+
+
+def _decode_event(recorded: list) -> pygame.event.Event:
+    event_type, attributes = recorded
+    return pygame.event.Event(
+        event_type,
+        {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in attributes.items()
+        },
+    )
+
+
+def _load_keybinds() -> dict | None:
+    try:
+        return load_data("keybinds.json")
+    except FileNotFoundError:
+        return None
+
+
+class InputSource:
+    """
+    Input of the player as it happens, with frames taking as long as they
+    actually do.
+    """
+
+    @property
+    def finished(self) -> bool:
+        """
+        :return: Whether there is no more input (only when replaying)
+        """
+        return False
+
+    def is_preloading(self, preloader: Preloader) -> bool:
+        """
+        :return: Whether the next frame is shown while the assets are loaded
+        """
+        return not preloader.done
+
+    def tick(self, clock: pygame.time.Clock, preloading: bool) -> int:
+        """
+        Start a new frame.
+
+        :param preloading: Whether the assets are still being loaded
+        :return: Duration of the previous frame, in milliseconds
+        """
+        return clock.tick()
+
+    def get_events(self) -> list[pygame.event.Event]:
+        """
+        :return: Events of the current frame (see pygame.event.get)
+        """
+        return pygame.event.get()
+
+    def end_frame(self, state: list | None):
+        """
+        End the current frame.
+
+        :param state: Position of the player after the frame, or None if
+                      there is no player yet
+        """
+
+    def get_mouse_pos(self) -> tuple[int, int]:
+        return pygame.mouse.get_pos()
+
+    def get_mouse_buttons(self) -> tuple[bool, bool, bool]:
+        return pygame.mouse.get_pressed()
+
+    def is_key_pressed(self, key: int) -> bool:
+        return pygame.key.get_pressed()[key]
+
+    def close(self):
+        pass
+
+
+class InputRecorder(InputSource):
+    def __init__(self, path: str, save_path: str):
+        """
+        Records the input of the player into the given file.
+
+        :param path: Path of the recording
+        :param save_path: Path of the save file the session starts with
+        """
+        self._file = open(path, "w", encoding="utf-8")
+        try:
+            with open(save_path, encoding="utf-8") as file:
+                save = file.read()
+        except FileNotFoundError:
+            save = None
+        header = {
+            "version": REPLAY_VERSION,
+            "seed": RANDOM_SEED,
+            "save": save,
+            "keybinds": _load_keybinds(),
+        }
+        self._file.write(json.dumps(header) + "\n")
+        self._frame: dict | None = None
+        atexit.register(self.close)
+
+    def _write_frame(self):
+        if self._frame is not None:
+            self._file.write(json.dumps(self._frame, separators=(",", ":")) + "\n")
+            self._frame = None
+
+    def tick(self, clock: pygame.time.Clock, preloading: bool) -> int:
+        # frames are only written once they are complete (or the game quits)
+        self._write_frame()
+        milliseconds = clock.tick()
+        self._frame = {"dt": milliseconds}
+        if preloading:
+            self._frame["preload"] = True
+        return milliseconds
+
+    def get_events(self) -> list[pygame.event.Event]:
+        events = pygame.event.get()
+        if events:
+            self._frame["events"] = [_encode_event(event) for event in events]
+        return events
+
+    def end_frame(self, state: list | None):
+        if state is not None:
+            self._frame["state"] = state
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._write_frame()
+        self._file.close()
+
+
+class InputReplay(InputSource):
+    def __init__(self, path: str):
+        """
+        Replays the input recorded in the given file.
+
+        :param path: Path of the recording
+        :raise ValueError: If the recording has an unsupported version
+        """
+        with open(path, encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != REPLAY_VERSION:
+                raise ValueError(f"Unsupported recording version of {path}")
+            self._frames = deque(json.loads(line) for line in file)
+
+        if header["seed"] != RANDOM_SEED:
+            warnings.warn(
+                f"{path} was recorded with RANDOM_SEED {header['seed']}",
+                ReplayWarning,
+            )
+        if header["keybinds"] != _load_keybinds():
+            warnings.warn(
+                f"{path} was recorded with different key bindings", ReplayWarning
+            )
+        if sys.flags.hash_randomization:
+            warnings.warn(
+                "Set PYTHONHASHSEED to the same value when recording and replaying, "
+                "as the order of sets of strings may differ otherwise",
+                ReplayWarning,
+            )
+
+        # the game is saved to a copy of the recorded save file, so that the
+        # actual save file is never changed by replays
+        self.save_path: str | None = None
+        if header["save"] is not None:
+            descriptor, self.save_path = tempfile.mkstemp(".json", "replay_save_")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                file.write(header["save"])
+
+        self._frame: dict = {}
+        self.frames = 0
+        """Number of frames replayed so far."""
+        self.diverged_frame: int | None = None
+        """First frame after which the player wasn't where they were recorded."""
+        self._replayed_time = 0
+        self._start_time: float | None = None
+
+        # input state, as reconstructed from the events
+        self._mouse_pos = (0, 0)
+        self._mouse_buttons = [False, False, False]
+        self._keys: set[int] = set()
+
+        atexit.register(self.close)
+
+    @property
+    def finished(self) -> bool:
+        return not self._frames
+
+    def is_preloading(self, preloader: Preloader) -> bool:
+        # loading the assets takes a different number of frames every time, so
+        # the loading is stretched or cut short to match the recording
+        if self._frames and self._frames[0].get("preload", False):
+            return True
+        preloader.finish()
+        return False
+
+    def tick(self, clock: pygame.time.Clock, preloading: bool) -> int:
+        # still ticked, only for the FPS display
+        clock.tick()
+        if self._start_time is None:
+            self._start_time = time.perf_counter()
+        self._frame = self._frames.popleft()
+        self.frames += 1
+        self._replayed_time += self._frame["dt"]
+        return self._frame["dt"]
+
+    def get_events(self) -> list[pygame.event.Event]:
+        # events caused by the machine the replay runs on are ignored
+        game_events = deque(
+            event for event in pygame.event.get() if event.type >= pygame.USEREVENT
+        )
+        events = []
+        for recorded in self._frame.get("events", ()):
+            if recorded is None:
+                if game_events:
+                    events.append(game_events.popleft())
+                continue
+            event = _decode_event(recorded)
+            self._update_input_state(event)
+            events.append(event)
+        events.extend(game_events)
+        return events
+
+    def _update_input_state(self, event: pygame.event.Event):
+        if event.type in (
+            pygame.MOUSEMOTION,
+            pygame.MOUSEBUTTONDOWN,
+            pygame.MOUSEBUTTONUP,
+        ):
+            self._mouse_pos = event.pos
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            if 1 <= event.button <= 3:
+                self._mouse_buttons[event.button - 1] = (
+                    event.type == pygame.MOUSEBUTTONDOWN
+                )
+        elif event.type == pygame.KEYDOWN:
+            self._keys.add(event.key)
+        elif event.type == pygame.KEYUP:
+            self._keys.discard(event.key)
+
+    def end_frame(self, state: list | None):
+        if self.diverged_frame is None and self._frame.get("state") != state:
+            self.diverged_frame = self.frames
+            warnings.warn(
+                f"Replay diverged in frame {self.frames}: the player is at {state} "
+                f"instead of {self._frame.get('state')}",
+                ReplayWarning,
+            )
+
+    def get_mouse_pos(self) -> tuple[int, int]:
+        return self._mouse_pos
+
+    def get_mouse_buttons(self) -> tuple[bool, bool, bool]:
+        return tuple(self._mouse_buttons)
+
+    def is_key_pressed(self, key: int) -> bool:
+        return key in self._keys
+
+    def close(self):
+        if self._start_time is not None:
+            xplat.log(
+                f"Replayed {self.frames} frames ({self._replayed_time / 1000:.1f} s "
+                f"of play) in {time.perf_counter() - self._start_time:.1f} s"
+            )
+            self._start_time = None
+        if self.save_path is not None:
+            os.remove(self.save_path)
+            self.save_path = None
+
+
+_input: InputSource = InputSource()
+
+
+def set_input(source: InputSource):
+    """
+    Replace the source of the input of the player (e.g. with an InputReplay).
+    """
+    global _input
+    _input = source
+
+
+def get_mouse_buttons() -> tuple[bool, bool, bool]:
+    """
+    Replaces pygame.mouse.get_pressed, to support replays.
+    """
+    return _input.get_mouse_buttons()
@@ -1,5 +1,6 @@
 import json
 from itertools import chain
+from typing import ClassVar
 
 import pygame
 
@@ -87,12 +88,16 @@ def _decoder_object_hook(o):
     return processed
 
 
-def _load_internal():
-    with open(resource_path("data/save.json"), "r") as file:
+def _load_internal(path: str):
+    with open(path, "r") as file:
         return utils.json_loads(file.read(), object_hook=_decoder_object_hook)
 
 
 class SaveFile:
+    path: ClassVar[str] = resource_path("data/save.json")
+    """Where the game is saved (a copy of the recorded save file when replaying
+    a session, see src/replay.py)."""
+
     _has_goggles: GogglesStatus
     _has_hat: HatStatus
     _has_necklace: NecklaceStatus
@@ -147,7 +152,7 @@ class SaveFile:
 
     @classmethod
     def load(cls):
-        data = _load_internal()
+        data = _load_internal(cls.path)
         data.setdefault("group", StudyGroup.INGROUP)
         data.setdefault("goggles_status", None)
         data.setdefault("necklace_status", None)
@@ -162,7 +167,7 @@ class SaveFile:
         return [tile_info.__json__() for tile_info in self.soil_data.values()]
 
     def save(self):
-        with open(resource_path("data/save.json"), "w") as file:
+        with open(self.path, "w") as file:
             serialised_inventory = {
                 k.as_serialised_string(): self.inventory[k] for k in self.inventory
             }
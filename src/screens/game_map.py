@@ -1,9 +1,9 @@
 import warnings
-from collections.abc import Callable
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
 from typing import Any
 
 import pygame
-from pathfinding.core.grid import Grid  # type: ignore[import-untyped]
 from pytmx import (  # type: ignore[import-untyped]
     TiledElement,
     TiledMap,
@@ -25,7 +25,12 @@ from src.enums import (
     StudyGroup,
 )
 from src.exceptions import GameMapWarning, InvalidMapError
-from src.groups import AllSprites, PersistentSpriteGroup
+from src.groups import (
+    Y_SORTED_LAYERS,
+    AllSprites,
+    PersistentSpriteGroup,
+    SpatialSpriteGroup,
+)
 from src.gui.interface.emotes import NPCEmoteManager, PlayerEmoteManager
 from src.gui.scene_animation import SceneAnimation
 from src.map_objects import MapObjects, MapObjectType
@@ -43,9 +48,10 @@ from src.npc.behaviour.npc_behaviour_tree import NPCBehaviourTree
 from src.npc.chicken import Chicken
 from src.npc.cow import Cow
 from src.npc.npc import NPC
+from src.npc.path_finding import PathfindingGrid
 from src.npc.setup import AIData
 from src.npc.utils import pf_add_matrix_collision
-from src.overlay.soil import SoilManager
+from src.overlay.soil import SoilArea, SoilManager
 from src.savefile import SaveFile
 from src.settings import (
     DEFAULT_ANIMATION_NAME,
@@ -63,6 +69,9 @@ from src.sprites.objects.tree import Tree
 from src.sprites.setup import ENTITY_ASSETS
 from src.support import parse_crop_types
 
+STATIC_CHUNK_SIZE = 16
+"""Width and height (in tiles) of the surfaces static tile layers are merged into"""
+
 
 def _setup_tile_layer(
     layer: TiledTileLayer, func: Callable[[tuple[int, int], pygame.Surface], None]
@@ -127,8 +136,8 @@ def _setup_animal_ranges(
                 (rect.width / SCALE_FACTOR, rect.height / SCALE_FACTOR),
             )
 
-    CowIndividualContext.range_grid = Grid(matrix=range_matrix_cows)
-    ChickenIndividualContext.range_grid = Grid(matrix=range_matrix_chickens)
+    CowIndividualContext.range_grid = PathfindingGrid(range_matrix_cows)
+    ChickenIndividualContext.range_grid = PathfindingGrid(range_matrix_chickens)
 
 
 def _setup_camera_layer(layer: TiledObjectGroup):
@@ -256,6 +265,11 @@ class GameMap:
 
         npcs: list of all NPCs on the map
         animals: list of all Animals on the map
+
+        _soil_areas: soil areas located on the map
+
+        _detached_sprites: Sprites of the map while it is detached from the
+                           level's Sprite groups, by the group they belong to
     """
 
     _tilemap: TiledMap
@@ -278,6 +292,16 @@ class GameMap:
     npcs: list[NPC]
     animals: list[Animal]
 
+    # pre-rendered static tile layers
+    _static_chunks: dict[tuple[Layer, int, int], Sprite]
+    _scaled_tile_images: dict[pygame.Surface, pygame.Surface]
+
+    _soil_areas: list[SoilArea]
+
+    # map caching
+    _detached_sprites: dict[pygame.sprite.AbstractGroup, pygame.sprite.Group]
+    memory_size: int
+
     round_config: dict[str, Any]
 
     def __init__(
@@ -289,7 +313,7 @@ class GameMap:
         zoom_man: ZoomManager,
         # Sprite groups
         all_sprites: AllSprites,
-        collision_sprites: PersistentSpriteGroup,
+        collision_sprites: SpatialSpriteGroup,
         interaction_sprites: PersistentSpriteGroup,
         tree_sprites: PersistentSpriteGroup,
         bush_sprites: PersistentSpriteGroup,
@@ -358,6 +382,14 @@ class GameMap:
         self.npcs = []
         self.animals = []
 
+        self._static_chunks = {}
+        self._scaled_tile_images = {}
+
+        self._soil_areas = []
+
+        self._detached_sprites = {}
+        self.memory_size = 0
+
         self._setup_layers(save_file, selected_map, scene_ani, zoom_man)
 
         if selected_map == Map.MINIGAME and not self.round_config.get(
@@ -417,6 +449,57 @@ class GameMap:
         image = pygame.transform.scale_by(surf, SCALE_FACTOR)
         Sprite(pos, image, z=layer).add(groups)
 
+    def _get_static_chunk(self, pos: tuple[int, int], layer: Layer) -> Sprite:
+        """
+        :param pos: Position of a tile (x, y)
+        :param layer: z-Layer of the tile
+        :return: The chunk Sprite the tile should be rendered onto. If no chunk
+                 exists at the given position on the given layer yet, a new,
+                 transparent one will be created and added to all_sprites
+        """
+        chunk_px_size = STATIC_CHUNK_SIZE * SCALED_TILE_SIZE
+        chunk_x, chunk_y = pos[0] // chunk_px_size, pos[1] // chunk_px_size
+
+        chunk = self._static_chunks.get((layer, chunk_x, chunk_y))
+        if chunk is None:
+            chunk_pos = (chunk_x * chunk_px_size, chunk_y * chunk_px_size)
+            # chunks on the right and bottom edges of the map might be smaller
+            chunk_size = (
+                min(chunk_px_size, self._tilemap_scaled_size[0] - chunk_pos[0]),
+                min(chunk_px_size, self._tilemap_scaled_size[1] - chunk_pos[1]),
+            )
+            chunk = Sprite(
+                chunk_pos, pygame.Surface(chunk_size, pygame.SRCALPHA), z=layer
+            )
+            chunk.add(self.all_sprites)
+            self._static_chunks[(layer, chunk_x, chunk_y)] = chunk
+        return chunk
+
+    def _setup_static_tile(
+        self,
+        pos: tuple[int, int],
+        surf: pygame.Surface,
+        layer: Layer,
+    ):
+        """
+        Render a tile without any behaviour onto the static chunk of the given
+        layer it is positioned in, instead of creating a separate Sprite for it.
+        This way, only a few chunk surfaces have to be blitted each frame
+        instead of every single tile.
+        :param pos: Position of the tile (x, y)
+        :param surf: Surface that will be scaled up by SCALE_FACTOR and be
+                     rendered onto the chunk
+        :param layer: z-Layer on which the tile should be displayed
+        """
+        image = self._scaled_tile_images.get(surf)
+        if image is None:
+            # pytmx shares the same Surface between all tiles with the same gid
+            image = pygame.transform.scale_by(surf, SCALE_FACTOR)
+            self._scaled_tile_images[surf] = image
+
+        chunk = self._get_static_chunk(pos, layer)
+        chunk.image.blit(image, (pos[0] - chunk.rect.left, pos[1] - chunk.rect.top))
+
     def _setup_collideable_tile(
         self,
         pos: tuple[int, int],
@@ -805,6 +888,28 @@ class GameMap:
 
     # endregion
 
+    def _setup_camera_layers(self, scene_ani: SceneAnimation, zoom_man: ZoomManager):
+        """
+        Sets up the camera targets and zoom areas of the map. Has to be done
+        every time the map is entered, since they are shared between all maps.
+        """
+        # We clear the target data first so that the cutscene from the previous
+        # room doesn't play again if the current one
+        # doesn't have any camera targets
+        scene_ani.reset()
+        scene_ani.clear()
+
+        # Clearing the zoom manager in advance, in case no zoom areas exist for the current map
+        zoom_man.clear()
+
+        for tilemap_layer in self._tilemap.layers:
+            if not isinstance(tilemap_layer, TiledObjectGroup):
+                continue
+            if tilemap_layer.name == SpecialObjectLayer.CAMERA_TARGETS:
+                scene_ani.set_target_points(_setup_camera_layer(tilemap_layer))
+            elif tilemap_layer.name == SpecialObjectLayer.ZOOM_AREAS:
+                zoom_man.set_zoom_areas(_setup_zoom_layer(tilemap_layer))
+
     def _setup_layers(
         self,
         save_file: SaveFile,
@@ -817,14 +922,7 @@ class GameMap:
         all Sprites for the map.
         """
 
-        # We clear the target data first so that the cutscene from the previous
-        # room doesn't play again if the current one
-        # doesn't have any camera targets
-        scene_ani.reset()
-        scene_ani.clear()
-
-        # Clearing the zoom manager in advance, in case no zoom areas exist for the current map
-        zoom_man.clear()
+        self._setup_camera_layers(scene_ani, zoom_man)
 
         for tilemap_layer in self._tilemap.layers:
             if isinstance(tilemap_layer, TiledTileLayer):
@@ -833,11 +931,17 @@ class GameMap:
                     self.soil_manager.load_area(
                         StudyGroup.INGROUP, tilemap_layer, save_file.soil_data
                     )
+                    self._soil_areas.append(
+                        self.soil_manager.get_area(StudyGroup.INGROUP)
+                    )
                     continue
                 elif tilemap_layer.name == "farmable_outgroup":
                     self.soil_manager.load_area(
                         StudyGroup.OUTGROUP, tilemap_layer, save_file.soil_data
                     )
+                    self._soil_areas.append(
+                        self.soil_manager.get_area(StudyGroup.OUTGROUP)
+                    )
                     continue
                 elif tilemap_layer.name == "Border":
                     _setup_tile_layer(
@@ -869,8 +973,19 @@ class GameMap:
                         tilemap_layer,
                         lambda pos, _: self._setup_water_tile(pos, self.all_sprites),
                     )
+                elif layer not in Y_SORTED_LAYERS:
+                    # decorative and ground tiles which do not have to be sorted
+                    # with other Sprites will be pre-rendered onto static chunks
+                    _setup_tile_layer(
+                        tilemap_layer,
+                        lambda pos, image: self._setup_static_tile(
+                            pos,
+                            image,
+                            layer,  # noqa: B023 # TODO: Fix B023 to avoid potential UnboundLocalError
+                        ),
+                    )
                 else:
-                    # decorative and ground tiles will be created as base tile
+                    # decorative tiles on Y-sorted layers will be created as base tile
                     _setup_tile_layer(
                         tilemap_layer,
                         lambda pos, image: self._setup_base_tile(
@@ -927,10 +1042,12 @@ class GameMap:
                         self.animals = _setup_object_layer(
                             tilemap_layer, lambda pos, obj: self._setup_animal(pos, obj)
                         )
-                    case SpecialObjectLayer.CAMERA_TARGETS:
-                        scene_ani.set_target_points(_setup_camera_layer(tilemap_layer))
-                    case SpecialObjectLayer.ZOOM_AREAS:
-                        zoom_man.set_zoom_areas(_setup_zoom_layer(tilemap_layer))
+                    case (
+                        SpecialObjectLayer.CAMERA_TARGETS
+                        | SpecialObjectLayer.ZOOM_AREAS
+                    ):
+                        # already set up by _setup_camera_layers
+                        continue
                     case _:
                         # set layer if defined in the TileLayer properties
                         layer = _get_element_property(
@@ -1012,6 +1129,94 @@ class GameMap:
     def get_size(self):
         return self._tilemap_scaled_size
 
+    # region map caching
+    @property
+    def _sprite_groups(self) -> tuple[pygame.sprite.AbstractGroup, ...]:
+        return (
+            self.all_sprites,
+            self.collision_sprites,
+            self.interaction_sprites,
+            self.tree_sprites,
+            self.bush_sprites,
+            self.player_exit_warps,
+        )
+
+    def _estimate_memory_size(self) -> int:
+        """
+        :return: Estimated size (in bytes) of all images used by the Sprites of
+                 the map. Images shared with other maps are counted as well,
+                 so this errs on the larger side
+        """
+        images = {
+            id(image): image
+            for sprites in self._detached_sprites.values()
+            for sprite in sprites
+            if (image := getattr(sprite, "image", None)) is not None
+        }
+        images.update((id(image), image) for image in self._scaled_tile_images.values())
+        return sum(
+            image.get_width() * image.get_height() * image.get_bytesize()
+            for image in images.values()
+        )
+
+    def detach(self):
+        """
+        Removes all Sprites of the map from the level's Sprite groups.
+        The Sprites (and their state) are kept until the map is attached again,
+        except for Sprites that are killed in the meantime.
+        Sprites of soil areas are kept by the areas instead, since they can
+        also be created while another map is attached (e.g. when it rains).
+        """
+        for area in self.soil_manager.all_areas():
+            area.detach_sprites()
+
+        self._detached_sprites = {}
+        for group in self._sprite_groups:
+            if isinstance(group, PersistentSpriteGroup):
+                sprites = group.non_persistent_sprites()
+            else:
+                sprites = group.sprites()
+            # Sprite.kill also removes the Sprite from this Group
+            self._detached_sprites[group] = pygame.sprite.Group(sprites)
+            group.empty()
+        self.memory_size = self._estimate_memory_size()
+
+    def attach(
+        self,
+        scene_ani: SceneAnimation,
+        zoom_man: ZoomManager,
+        round_config: dict[str, Any],
+    ):
+        """
+        Adds all Sprites of a detached map back to the level's Sprite groups,
+        and sets up everything the map shares with other maps.
+        """
+        for group, sprites in self._detached_sprites.items():
+            group.add(*sprites)
+        self._detached_sprites = {}
+        for area in self._soil_areas:
+            area.attach_sprites()
+
+        self.round_config = round_config
+        self._setup_camera_layers(scene_ani, zoom_man)
+
+        if SETUP_PATHFINDING:
+            AIData.update(self._pf_matrix, self.player, [*self.npcs, *self.animals])
+
+            if ENABLE_NPCS:
+                self._setup_emote_interactions()
+
+    def get_detached_sprites(
+        self, group: pygame.sprite.AbstractGroup
+    ) -> pygame.sprite.Group:
+        """
+        :param group: One of the level's Sprite groups
+        :return: The Sprites of the detached map belonging to the given group
+        """
+        return self._detached_sprites.get(group, pygame.sprite.Group())
+
+    # endregion
+
     def exclude_hat_if_possible(self, npc: NPC):
         # in version 3 of the game we remove all hat and necklaces for npcs with special features added in the map
         if self.get_game_version() == 3:
@@ -1028,3 +1233,42 @@ class GameMap:
                 npc.has_hat = False
                 npc.has_necklace = False
                 self.number_of_hats_to_exclude -= 1
+
+
+class GameMapCache:
+    _maps: OrderedDict[Map, GameMap]
+
+    def __init__(self, max_size: int, max_memory: int):
+        """
+        Keeps the most recently left GameMaps, so that they (and the state of
+        their Sprites) don't have to be rebuilt when returning to them.
+        Maps should be detached before being added and attached after being
+        taken out of the cache.
+
+        :param max_size: Maximum number of cached maps
+        :param max_memory: Maximum estimated size (in bytes) of all cached maps.
+                           The least recently used maps are evicted first
+        """
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self._maps = OrderedDict()
+
+    def values(self) -> Iterator[GameMap]:
+        return iter(self._maps.values())
+
+    def add(self, map_name: Map, game_map: GameMap):
+        self._maps[map_name] = game_map
+        self._maps.move_to_end(map_name)
+
+        memory_size = sum(cached.memory_size for cached in self._maps.values())
+        while self._maps and (
+            len(self._maps) > self.max_size or memory_size > self.max_memory
+        ):
+            _, evicted = self._maps.popitem(last=False)
+            memory_size -= evicted.memory_size
+
+    def pop(self, map_name: Map) -> GameMap | None:
+        """
+        :return: The cached GameMap of the given map, if there is one
+        """
+        return self._maps.pop(map_name, None)
@@ -2,6 +2,7 @@ import pygame  # noqa
 
 from src.support import get_translated_string, parse_crop_types
 from src.events import SET_CURSOR, post_event
+from src.fblitter import FBLITTER
 from src.gui.menu.abstract_menu import AbstractMenu
 from src.enums import (
     FarmingTool,
@@ -302,8 +303,8 @@ class InventoryMenu(AbstractMenu):
             bg_rect = pygame.Rect(0, 0, text_rect.width + 40, 50)
             bg_rect.center = text_rect.center
 
-            pygame.draw.rect(self.display_surface, "white", bg_rect, 0, 4)
-            self.display_surface.blit(text_surf, text_rect)
+            FBLITTER.draw_rect("white", bg_rect, 0, 4)
+            FBLITTER.schedule_blit(text_surf, text_rect)
 
     def refresh_buttons_content(self):
         self.sections_titles_setup()
@@ -1,6 +1,5 @@
 import gc
 import random
-import time
 import warnings
 from collections.abc import Callable
 from functools import partial
@@ -8,6 +7,7 @@ from typing import Any, cast
 
 import pygame
 
+from src import game_clock
 from src.camera import Camera
 from src.camera.camera_target import CameraTarget
 from src.camera.quaker import Quaker
@@ -23,7 +23,7 @@ from src.events import (
 )
 from src.exceptions import GameMapWarning
 from src.fblitter import FBLITTER
-from src.groups import AllSprites, PersistentSpriteGroup
+from src.groups import AllSprites, PersistentSpriteGroup, SpatialSpriteGroup
 from src.gui.interface.dialog import DialogueManager
 from src.gui.interface.emotes import NPCEmoteManager, PlayerEmoteManager
 from src.gui.scene_animation import SceneAnimation
@@ -34,8 +34,9 @@ from src.overlay.overlay import Overlay
 from src.overlay.sky import Rain, Sky
 from src.overlay.soil import SoilManager
 from src.overlay.transition import Transition
+from src.position_trace import PositionTraceRecorder
 from src.savefile import SaveFile
-from src.screens.game_map import GameMap
+from src.screens.game_map import GameMap, GameMapCache
 from src.screens.minigames.base import Minigame
 from src.screens.minigames.cow_herding import CowHerding, CowHerdingState
 from src.settings import (
@@ -43,7 +44,10 @@ from src.settings import (
     DEFAULT_ANIMATION_NAME,
     EMOTES_LIST,
     GAME_MAP,
+    GAME_MAP_CACHE_MEMORY_LIMIT,
+    GAME_MAP_CACHE_SIZE,
     HEALTH_DECAY_VALUE,
+    RECORD_POSITION_TRACES,
     SCALED_TILE_SIZE,
     SCREEN_HEIGHT,
     SCREEN_WIDTH,
@@ -74,13 +78,14 @@ class Level:
     current_map: Map | None
     prev_map: Map | None
     game_map: GameMap | None
+    game_map_cache: GameMapCache
     save_file: SaveFile
 
     current_minigame: Minigame | None
 
     # sprite groups
     all_sprites: AllSprites
-    collision_sprites: PersistentSpriteGroup
+    collision_sprites: SpatialSpriteGroup
     tree_sprites: PersistentSpriteGroup
     bush_sprites: PersistentSpriteGroup
     interaction_sprites: PersistentSpriteGroup
@@ -157,9 +162,12 @@ class Level:
         self.current_map = None
         self.prev_map = None
         self.game_map = None
+        self.game_map_cache = GameMapCache(
+            GAME_MAP_CACHE_SIZE, GAME_MAP_CACHE_MEMORY_LIMIT * 1024 * 1024
+        )
 
         self.all_sprites = AllSprites()
-        self.collision_sprites = PersistentSpriteGroup()
+        self.collision_sprites = SpatialSpriteGroup()
         self.tree_sprites = PersistentSpriteGroup()
         self.bush_sprites = PersistentSpriteGroup()
         self.interaction_sprites = PersistentSpriteGroup()
@@ -169,6 +177,9 @@ class Level:
         self.camera = Camera(0, 0)
         self.quaker = Quaker(self.camera)
         self.tool_statistics = {t.name: 0 for t in FarmingTool}
+        self.position_trace = None
+        if RECORD_POSITION_TRACES:
+            self.position_trace = PositionTraceRecorder(resource_path("data/traces"))
 
         self.soil_manager = SoilManager(self.all_sprites, self.frames["level"])
 
@@ -283,9 +294,17 @@ class Level:
             self.get_game_version() == DEBUG_MODE_VERSION
         )
         self.game_map.round_config_changed(round_config)
+        if self.position_trace is not None:
+            self.position_trace.start_trace(f"round_{self.get_round():02d}")
 
     def load_map(self, game_map: Map, from_map: str = None):
         # prepare level state for new map
+        # keep the map that is left, so that it doesn't have to be rebuilt later on
+        # (the minigame map is changed by the minigame, and thus always rebuilt)
+        if self.game_map is not None and self.current_map != Map.MINIGAME:
+            self.game_map.detach()
+            self.game_map_cache.add(self.current_map, self.game_map)
+
         # clear all sprite groups
         self.all_sprites.empty()
         self.collision_sprites.empty()
@@ -298,31 +317,37 @@ class Level:
         # self.soil_layer.reset()
         self.quaker.reset()
 
-        # manual memory cleaning
-        gc.collect()
-
-        self.game_map = GameMap(
-            selected_map=game_map,
-            tilemap=self.tmx_maps[game_map],
-            scene_ani=self.cutscene_animation,
-            zoom_man=self.zoom_manager,
-            all_sprites=self.all_sprites,
-            collision_sprites=self.collision_sprites,
-            interaction_sprites=self.interaction_sprites,
-            tree_sprites=self.tree_sprites,
-            bush_sprites=self.bush_sprites,
-            player_exit_warps=self.player_exit_warps,
-            player=self.player,
-            player_emote_manager=self.player_emote_manager,
-            npc_emote_manager=self.npc_emote_manager,
-            soil_manager=self.soil_manager,
-            apply_tool=self.apply_tool,
-            plant_collision=self.plant_collision,
-            frames=self.frames,
-            save_file=self.save_file,
-            round_config=self.round_config,
-            get_game_version=self.get_game_version,
-        )
+        self.game_map = self.game_map_cache.pop(game_map)
+        if self.game_map is not None:
+            self.game_map.attach(
+                self.cutscene_animation, self.zoom_manager, self.round_config
+            )
+        else:
+            # manual memory cleaning
+            gc.collect()
+
+            self.game_map = GameMap(
+                selected_map=game_map,
+                tilemap=self.tmx_maps[game_map],
+                scene_ani=self.cutscene_animation,
+                zoom_man=self.zoom_manager,
+                all_sprites=self.all_sprites,
+                collision_sprites=self.collision_sprites,
+                interaction_sprites=self.interaction_sprites,
+                tree_sprites=self.tree_sprites,
+                bush_sprites=self.bush_sprites,
+                player_exit_warps=self.player_exit_warps,
+                player=self.player,
+                player_emote_manager=self.player_emote_manager,
+                npc_emote_manager=self.npc_emote_manager,
+                soil_manager=self.soil_manager,
+                apply_tool=self.apply_tool,
+                plant_collision=self.plant_collision,
+                frames=self.frames,
+                save_file=self.save_file,
+                round_config=self.round_config,
+                get_game_version=self.get_game_version,
+            )
 
         self.camera.change_size(*self.game_map.size)
 
@@ -439,7 +464,7 @@ class Level:
             ):
                 self.overlay.health_bar.apply_health(9999999)
                 self.player.bathstat = True
-                self.player.bath_time = time.time()
+                self.player.bath_time = game_clock.get_time()
                 self.player.emote_manager.show_emote(self.player, "sad_sick_ani")
                 self.load_map(self.current_map, from_map=map_name)
             elif map_name == "bathhouse":
@@ -559,7 +584,7 @@ class Level:
         # Starts timer for 60 seconds when player is in outgroup farm
         if collided_with_outgroup_farm:
             if not self.outgroup_farm_entered:
-                self.outgroup_farm_time_entered = pygame.time.get_ticks()
+                self.outgroup_farm_time_entered = game_clock.get_ticks()
                 self.outgroup_farm_entered = True
 
         # Resets the timer when player exits the farm
@@ -571,7 +596,7 @@ class Level:
         # If the player is in the farm and 60 seconds (currently 30s) have passed
         if (
             self.outgroup_farm_entered
-            and pygame.time.get_ticks() - self.outgroup_farm_time_entered >= 30_000
+            and game_clock.get_ticks() - self.outgroup_farm_time_entered >= 30_000
         ):
             # Checks if player has already received the message and is not part of the outgroup
             if (
@@ -588,11 +613,9 @@ class Level:
         # checks 60 seconds and 120 seconds after player joins outgroup to convert appearance
         if self.player.study_group == StudyGroup.OUTGROUP:
             # immediately player looses necklace
-            delta_time = pygame.time.get_ticks() - (
-                self.start_become_outgroup_time or 0
-            )
+            delta_time = game_clock.get_ticks() - (self.start_become_outgroup_time or 0)
             if not self.start_become_outgroup:
-                self.start_become_outgroup_time = pygame.time.get_ticks()
+                self.start_become_outgroup_time = game_clock.get_ticks()
                 self.start_become_outgroup = True
                 self.player.has_necklace = False
 
@@ -1035,24 +1058,34 @@ class Level:
         self.raining = random.randint(0, 10) > 7
         self.soil_manager.raining = self.raining
 
-        # apples on the trees
+        # apples on the trees, including the ones on maps that are kept in memory
+        self._reset_fruit(self.tree_sprites, self.bush_sprites)
+        for game_map in self.game_map_cache.values():
+            self._reset_fruit(
+                game_map.get_detached_sprites(self.tree_sprites),
+                game_map.get_detached_sprites(self.bush_sprites),
+            )
 
+        # sky
+        self.sky.start_color = [255, 255, 255]
+        self.game_time.set_time(6, 0)  # set to 0600 hours upon sleeping
+
+    @staticmethod
+    def _reset_fruit(
+        tree_sprites: pygame.sprite.Group, bush_sprites: pygame.sprite.Group
+    ):
         # No need to iterate using explicit sprites() call.
         # Iterating over a sprite group normally will do the same thing
-        for tree in self.tree_sprites:
+        for tree in tree_sprites:
             for fruit in tree.fruit_sprites:
                 fruit.kill()
             if tree.alive:
                 tree.create_fruit()
-        for bush in self.bush_sprites:
+        for bush in bush_sprites:
             for fruit in bush.fruit_sprites:
                 fruit.kill()
                 bush.create_fruit()
 
-        # sky
-        self.sky.start_color = [255, 255, 255]
-        self.game_time.set_time(6, 0)  # set to 0600 hours upon sleeping
-
     def start_map_transition(self):
         self.map_transition.activate()
         self.start_transition()
@@ -1170,6 +1203,27 @@ class Level:
                         #     self.display_surface, (0, 0, 0), start_pos, end_pos
                         # )
 
+            if AIData.PathCache is not None:
+                path_cache = AIData.PathCache
+                stats_surf = self.font.render(
+                    f"path cache: {path_cache.hit_rate:.0%} hits, "
+                    f"{path_cache.saved_time * 1000:.0f}ms saved",
+                    False,
+                    "Black",
+                )
+                FBLITTER.schedule_blit(stats_surf, (10, 10))
+
+            if AIData.PathScheduler is not None:
+                path_scheduler = AIData.PathScheduler
+                stats_surf = self.font.render(
+                    f"path requests: {path_scheduler.queue_depth} queued, "
+                    f"{path_scheduler.mean_latency:.0f}ms mean / "
+                    f"{path_scheduler.max_latency:.0f}ms max latency",
+                    False,
+                    "Black",
+                )
+                FBLITTER.schedule_blit(stats_surf, (10, 10 + self.font.get_height()))
+
     # endregion
 
     def draw_overlay(self):
@@ -1231,6 +1285,12 @@ class Level:
                 self.all_sprites.update_blocked(dt)
             else:
                 self.all_sprites.update(dt)
+            if AIData.PathScheduler is not None:
+                AIData.PathScheduler.update()
+            if self.position_trace is not None:
+                self.position_trace.record(
+                    dt, self.current_map, (self.player, *self.game_map.npcs)
+                )
             self.update_cutscene(dt)
             self.quaker.update_quake(dt)
 
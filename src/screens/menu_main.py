@@ -2,13 +2,13 @@ from collections.abc import Callable
 from typing import Any
 
 import pygame
-from pygame.mouse import get_pressed as mouse_buttons
 
-from src import client, xplat
+from src import client, game_clock, xplat
 from src.enums import CustomCursor, GameState
 from src.events import SET_CURSOR, post_event
 from src.fblitter import FBLITTER
 from src.gui.menu.general_menu import GeneralMenu
+from src.replay import get_mouse_buttons as mouse_buttons
 from src.settings import (
     SCREEN_HEIGHT,
     SCREEN_WIDTH,
@@ -55,7 +55,7 @@ class MainMenu(GeneralMenu):
 
         # Cursor blinking
         self.cursor_visible = True
-        self.cursor_timer = pygame.time.get_ticks()
+        self.cursor_timer = game_clock.get_ticks()
         self.cursor_interval = 500
 
     def reset_fields(self) -> None:
@@ -102,7 +102,7 @@ class MainMenu(GeneralMenu):
         FBLITTER.schedule_blit(text_surface, text_rect)
 
         if input_active:
-            current_time = pygame.time.get_ticks()
+            current_time = game_clock.get_ticks()
             if current_time - self.cursor_timer >= self.cursor_interval:
                 self.cursor_visible = not self.cursor_visible
                 self.cursor_timer = current_time
@@ -3,6 +3,7 @@ from collections.abc import Callable
 import pygame
 
 from src.enums import GameState
+from src.fblitter import FBLITTER
 from src.gui.menu.general_menu import GeneralMenu
 from src.settings import SCREEN_HEIGHT, SCREEN_WIDTH
 from src.support import get_translated_string
@@ -53,5 +54,5 @@ class NotificationMenu(GeneralMenu):
         bg_rect = pygame.Rect(0, 0, text_rect.width + 40, 50)
         bg_rect.center = text_rect.center
 
-        pygame.draw.rect(self.display_surface, "white", bg_rect, 0, 4)
-        self.display_surface.blit(text_surf, text_rect)
+        FBLITTER.draw_rect("white", bg_rect, 0, 4)
+        FBLITTER.schedule_blit(text_surf, text_rect)
@@ -7,14 +7,14 @@ from typing import Any, Type
 
 import pygame
 import pygame.gfxdraw
-from pathfinding.core.grid import Grid  # type: ignore[import-untyped]
 
 from src.controls import Controls
 from src.enums import Direction, StudyGroup
 from src.exceptions import MinigameSetupError
-from src.groups import PersistentSpriteGroup
+from src.groups import PersistentSpriteGroup, SpatialSpriteGroup
 from src.npc.cow import Cow
 from src.npc.npc import NPC
+from src.npc.path_finding import PathfindingGrid
 from src.npc.path_scripting import AIScriptedPath, Waypoint
 from src.npc.setup import AIData
 from src.npc.utils import pf_add_matrix_collision
@@ -94,7 +94,7 @@ class CowHerdingState(MinigameState):
     game_map: GameMap
     player: Player
     all_sprites: PersistentSpriteGroup
-    collision_sprites: PersistentSpriteGroup
+    collision_sprites: SpatialSpriteGroup
     overlay: Overlay
     sounds: SoundDict
 
@@ -167,7 +167,7 @@ class CowHerding(Minigame):
     _complete: bool
 
     # collision sprites for the minigame contestants (i.e. the Player and their opponent)
-    contestant_collision_sprites: PersistentSpriteGroup
+    contestant_collision_sprites: SpatialSpriteGroup
 
     def __init__(self, state: CowHerdingState, round_config: dict[str, Any]):
         super().__init__(state)
@@ -331,8 +331,8 @@ class CowHerding(Minigame):
             side.barn_entrance_collider.add(self.contestant_collision_sprites)
 
         CowHerdingContext.default_grid = AIData.Grid
-        CowHerdingContext.barn_grid = Grid(matrix=barn_matrix)
-        CowHerdingContext.range_grid = Grid(matrix=range_matrix)
+        CowHerdingContext.barn_grid = PathfindingGrid(barn_matrix)
+        CowHerdingContext.range_grid = PathfindingGrid(range_matrix)
 
     def start(self):
         super().start()
@@ -1,7 +1,5 @@
 from enum import Enum
 
-from pathfinding.core.grid import Grid
-
 from src.npc.behaviour.ai_behaviour_tree_base import (
     Action,
     Condition,
@@ -9,16 +7,21 @@ from src.npc.behaviour.ai_behaviour_tree_base import (
     Selector,
     Sequence,
 )
-from src.npc.behaviour.cow_behaviour_tree import CowIndividualContext, player_nearby
+from src.npc.behaviour.cow_behaviour_tree import (
+    FLEE_TICK_INTERVAL,
+    CowIndividualContext,
+    player_nearby,
+)
+from src.npc.path_finding import PathfindingGrid
 from src.npc.setup import AIData
 from src.npc.utils import pf_wander
 from src.settings import SCALED_TILE_SIZE
 
 
 class CowHerdingContext:
-    barn_grid: Grid = None
-    default_grid: Grid = None
-    range_grid: Grid = None
+    barn_grid: PathfindingGrid = None
+    default_grid: PathfindingGrid = None
+    range_grid: PathfindingGrid = None
 
 
 def wander_barn(context: CowIndividualContext) -> bool:
@@ -42,4 +45,7 @@ def flee_from_player(context: CowIndividualContext) -> bool:
 class CowHerdingBehaviourTree(NodeWrapper, Enum):
     WanderBarn = Selector(Action(wander_barn))
     WanderRange = Selector(Action(wander_range))
-    Flee = Selector(Sequence(Condition(player_nearby), Action(flee_from_player)))
+    Flee = (
+        Selector(Sequence(Condition(player_nearby), Action(flee_from_player))),
+        FLEE_TICK_INTERVAL,
+    )
@@ -28,6 +28,9 @@ TODO:
 class PlayerTask(AbstractMenu):
     """Run the item allocation task."""
 
+    # the arrow buttons are drawn directly onto the display surface
+    draws_on_display_surface = True
+
     def __init__(self, send_resource_allocation: Callable[[dict[str, Any]], None]):
         super().__init__(
             title=get_translated_string("Task"), size=(SCREEN_WIDTH, SCREEN_HEIGHT)
@@ -107,6 +107,9 @@ class SelfAssessmentMenu(AbstractMenu):
 
     font_title: pygame.Font
 
+    # the manikin buttons are drawn directly onto the display surface
+    draws_on_display_surface = True
+
     def __init__(
         self,
         return_func: Callable[[], None],
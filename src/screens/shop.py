@@ -18,6 +18,9 @@ class ShopMenu:
     SCROLL_AMOUNT = 10
     MAX_SCROLL = 0
 
+    # see AbstractMenu.draws_on_display_surface
+    draws_on_display_surface = True
+
     def __init__(
         self,
         player: Player,
@@ -109,6 +109,9 @@ class SocialIdentityAssessmentMenu(AbstractMenu):
 
     font_title: pygame.Font
 
+    # the scale buttons are drawn directly onto the display surface
+    draws_on_display_surface = True
+
     def __init__(
         self,
         return_func: Callable[[], None],
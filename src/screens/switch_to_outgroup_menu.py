@@ -3,6 +3,7 @@ from collections.abc import Callable
 import pygame
 
 from src.enums import GameState, StudyGroup
+from src.fblitter import FBLITTER
 from src.gui.menu.general_menu import GeneralMenu
 from src.settings import SCREEN_HEIGHT, SCREEN_WIDTH
 
@@ -42,5 +43,5 @@ class OutgroupMenu(GeneralMenu):
         bg_rect = pygame.Rect((0, 0), (600, 100))
         bg_rect.center = text_rect.center
 
-        pygame.draw.rect(self.display_surface, "White", bg_rect, 0, 4)
-        self.display_surface.blit(text_surf, text_rect)
+        FBLITTER.draw_rect("White", bg_rect, 0, 4)
+        FBLITTER.schedule_blit(text_surf, text_rect)
@@ -1,5 +1,6 @@
 import os
 import sys
+from collections.abc import Mapping
 
 import pygame  # noqa
 import pytmx  # type:ignore [import-untyped]
@@ -9,7 +10,7 @@ from src.import_checks import *  # noqa: F403
 
 type Coordinate = tuple[int | float, int | float]
 type SoundDict = dict[str, pygame.mixer.Sound]
-type MapDict = dict[str, pytmx.TiledMap]
+type MapDict = Mapping[str, pytmx.TiledMap]
 type AniFrames = dict[str, list[pygame.Surface]]
 type GogglesStatus = bool | None
 type NecklaceStatus = bool | None
@@ -73,8 +74,72 @@ if IS_WEB:
     SERVER_URL = WEB_SERVER_URL
 else:
     SERVER_URL = os.getenv("SERVER_URL", "http://127.0.0.0:8888")
+# maximum number of telemetry events waiting to be sent to the server (see
+# src/telemetry.py). When the server can't keep up, further events are dropped
+TELEMETRY_QUEUE_SIZE = 256
+# telemetry events are sent to the server together in compressed batches of up
+# to this many events, once the oldest one has waited for the interval (in
+# seconds). Set the size to 1 to send each event on its own
+TELEMETRY_BATCH_SIZE = 32
+TELEMETRY_BATCH_INTERVAL = 10
+
+# record the input of the session into the given file, or replay the session
+# recorded in it (see src/replay.py), e.g. for benchmarks and regression tests.
+# Sessions are recorded and replayed without the server. Not available in the
+# web version. Can be set locally via environment variable.
+INPUT_RECORD = ""
+INPUT_REPLAY = ""
+if not IS_WEB:
+    INPUT_RECORD = os.getenv("INPUT_RECORD", "")
+    INPUT_REPLAY = os.getenv("INPUT_REPLAY", "")
+    if INPUT_RECORD or INPUT_REPLAY:
+        USE_SERVER = False
+
+# only present the changed parts of the screen while the game is paused
+# (menus, questionnaires...). Mostly useful for the web version, where presenting
+# a full frame is expensive. Can be enabled locally via environment variable.
+USE_DIRTY_RECTS = False
+if os.getenv("USE_DIRTY_RECTS") == "true":
+    USE_DIRTY_RECTS = True
+
+# number of previously visited maps which are kept in memory (including the state
+# of their trees, NPCs...), so that they don't have to be rebuilt when returning.
+# Cached maps are evicted earlier when their estimated size exceeds the limit (in MB)
+GAME_MAP_CACHE_SIZE = 3
+GAME_MAP_CACHE_MEMORY_LIMIT = 512
 
 SETUP_PATHFINDING = any((ENABLE_NPCS, TEST_ANIMALS))
+# record calls, success rates and time spent for the conditions and actions of
+# all behaviour trees, and print them when the game exits (see
+# src/npc/behaviour/ai_behaviour_tree_base.py). Can be enabled locally via
+# environment variable.
+PROFILE_BEHAVIOUR_TREES = False
+if os.getenv("PROFILE_BEHAVIOUR_TREES") == "true":
+    PROFILE_BEHAVIOUR_TREES = True
+# record the position, facing direction and state of the player and NPCs every
+# frame into one binary trace per round in data/traces (see
+# src/position_trace.py and tools/read_position_trace.py). Not available in the
+# web version. Can be enabled locally via environment variable.
+RECORD_POSITION_TRACES = False
+if not IS_WEB and os.getenv("RECORD_POSITION_TRACES") == "true":
+    RECORD_POSITION_TRACES = True
+# number of paths between two tiles which are kept, so that NPCs repeatedly
+# walking the same ways don't have to search them every time
+PATH_CACHE_SIZE = 256
+# search long NPC paths on large maps hierarchically (see
+# src/npc/hierarchical_path_finding.py), which is faster but finds slightly
+# longer paths
+HIERARCHICAL_PATHFINDING = True
+# number of tiles expanded by path searches requested by NPCs per frame (about
+# 2ms on a typical desktop). Searches that take longer are continued in the next
+# frame (see src/npc/path_scheduler.py)
+PATH_SEARCH_BUDGET = 640
+# number of processes searching the paths requested by NPCs instead of the main
+# thread (see src/npc/process_path_scheduler.py), 0 to disable them. Not
+# available in the web version. Can be set locally via environment variable.
+PATH_WORKERS = 0
+if not IS_WEB and os.getenv("PATH_WORKERS"):
+    PATH_WORKERS = int(os.getenv("PATH_WORKERS"))
 
 EMOTE_SIZE = 48
 
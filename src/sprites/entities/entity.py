@@ -4,6 +4,7 @@ import pygame
 
 from src import settings
 from src.enums import Direction, EntityState, Layer
+from src.groups import SpatialSpriteGroup
 from src.gui.interface import indicators
 from src.settings import SCALED_TILE_SIZE
 from src.sprites.base import CollideableSprite, Sprite
@@ -87,6 +88,16 @@ class Entity(CollideableSprite, ABC):
     def update_hitbox(self):
         self._current_hitbox = self._current_ani.get_hitbox()
 
+    def _move_hitbox_to_rect(self):
+        """Place the hitbox of the current animation at the Entity's rect."""
+        self.hitbox_rect.update(
+            (
+                self.rect.x + self._current_hitbox.x,
+                self.rect.y + self._current_hitbox.y,
+            ),
+            self._current_hitbox.size,
+        )
+
     def update_frame(self):
         self._current_frame = self._current_ani.get_frame(self.frame_index)
 
@@ -162,11 +173,30 @@ class Entity(CollideableSprite, ABC):
             (pos[0] - self.rect.width / 2, pos[1] - self.rect.height / 2),
             self.rect.size,
         )
+        self._move_hitbox_to_rect()
+        self._update_spatial_groups()
 
     @abstractmethod
     def move(self, dt: float):
         pass
 
+    def _get_collision_candidates(
+        self, after: pygame.sprite.Sprite | None = None
+    ) -> list[pygame.sprite.Sprite]:
+        """
+        :param after: [Optional] Only return Sprites that come after this Sprite
+                      in the order of self.collision_sprites
+        :return: Sprites in self.collision_sprites that could collide with the
+                 Entity, in the order of the group
+        """
+        if isinstance(self.collision_sprites, SpatialSpriteGroup):
+            return self.collision_sprites.sprites_near(self.hitbox_rect, after)
+
+        sprites = self.collision_sprites.sprites()
+        if after is not None:
+            return sprites[sprites.index(after) + 1 :]
+        return sprites
+
     def check_collision(self):
         """
         :return: true: Entity collides with a sprite in self.collision_sprites,
@@ -174,7 +204,11 @@ class Entity(CollideableSprite, ABC):
         """
         colliding_rect = None
 
-        for sprite in self.collision_sprites:
+        candidates = self._get_collision_candidates()
+        i = 0
+        while i < len(candidates):
+            sprite = candidates[i]
+            i += 1
             if sprite is not self:
                 if sprite.hitbox_rect.colliderect(self.hitbox_rect):
                     colliding_rect = sprite.hitbox_rect
@@ -205,8 +239,22 @@ class Entity(CollideableSprite, ABC):
                     elif shortest_distance == distances[3]:
                         self.hitbox_rect.top = colliding_rect.bottom
 
+                    # The hitbox has been moved, so the remaining sprites have
+                    # to be searched for near its new position
+                    candidates = self._get_collision_candidates(sprite)
+                    i = 0
+
         self.is_colliding = bool(colliding_rect)
 
+    def _update_spatial_groups(self):
+        """
+        Re-register the Entity's hitbox in all spatially indexed groups.
+        Has to be called whenever the hitbox moved outside of Entity.update.
+        """
+        for group in self.groups():
+            if isinstance(group, SpatialSpriteGroup):
+                group.update_sprite(self)
+
     @abstractmethod
     def animate(self, dt: float):
         """
@@ -236,6 +284,7 @@ class Entity(CollideableSprite, ABC):
     def update(self, dt: float):
         self._do_common_update_ops()
         self.move(dt)
+        self._update_spatial_groups()
         self.animate(dt)
         self.image = self._current_frame
 
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import time
 from typing import Any, Callable, Type
 
 import pygame  # noqa
 
+from src import game_clock
 from src.controls import Controls
 from src.enums import FarmingTool, InventoryResource, ItemToUse, StudyGroup
 from src.events import OPEN_INVENTORY, START_QUAKE, post_event
@@ -110,7 +110,7 @@ class Player(Character):
         self.sounds = sounds
 
         self.hp = hp
-        self.created_time = time.time()
+        self.created_time = game_clock.get_time()
         self.delay_time_speed = 0.25
 
         # check if the zoom is allowed
@@ -291,13 +291,7 @@ class Player(Character):
             self.has_necklace = False
 
     def move(self, dt: float):
-        self.hitbox_rect.update(
-            (
-                self.rect.x + self._current_hitbox.x,
-                self.rect.y + self._current_hitbox.y,
-            ),
-            self._current_hitbox.size,
-        )
+        self._move_hitbox_to_rect()
 
         self.hitbox_rect.x += self.direction.x * self.speed * dt
         self.hitbox_rect.y += self.direction.y * self.speed * dt
@@ -330,7 +324,7 @@ class Player(Character):
     # sets the player's transparency and speed according to their health
 
     def set_speed_asper_health(self):
-        current_time = time.time()
+        current_time = game_clock.get_time()
         if current_time - self.created_time >= self.delay_time_speed:
             self.speed = self.original_speed * (self.hp / 100)
 
@@ -339,7 +333,7 @@ class Player(Character):
         self.image.set_alpha(alpha_value)
 
     def check_bath_bool(self):
-        if (round(time.time() - self.bath_time)) == BATH_STATUS_TIMEOUT:
+        if (round(game_clock.get_time() - self.bath_time)) == BATH_STATUS_TIMEOUT:
             self.bathstat = False
 
     def teleport(self, pos: tuple[float, float]):
@@ -351,6 +345,8 @@ class Player(Character):
             (pos[0] - self.rect.width / 2, pos[1] - self.rect.height / 2),
             self.rect.size,
         )
+        self._move_hitbox_to_rect()
+        self._update_spatial_groups()
 
     def get_current_tool_string(self):
         return self.current_tool.as_serialised_string()
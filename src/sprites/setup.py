@@ -5,6 +5,7 @@ from weakref import WeakValueDictionary
 
 import pygame
 
+from src.atlas import AssetAtlas
 from src.enums import Direction, EntityState
 from src.settings import CHAR_TILE_SIZE, SCALE_FACTOR
 from src.support import resource_path
@@ -112,18 +113,15 @@ class _Hitbox:
                 )
 
 
-def state_importer(
-    path: str,
-    size: int,
-    state: EntityState,
-    directions: list[Direction],
-    hitbox: _Hitbox,
-) -> dict[Direction, _AniFrames]:
-    directions_dict = {}
+def frame_importer(path: str, size: int, rows: int) -> list[list[pygame.Surface]]:
+    """
+    :return: The scaled frames of the first rows of the given spritesheet, row by row
+    """
+    frame_rows = []
     full_path = os.path.join(path)
     surf = pygame.image.load(full_path).convert_alpha()
 
-    for row, direction in enumerate(directions):
+    for row in range(rows):
         frames = []
 
         for col in range(surf.get_width() // size):
@@ -131,6 +129,25 @@ def state_importer(
             subsurface = pygame.transform.scale_by(subsurface, SCALE_FACTOR)
             frames.append(subsurface)
 
+        frame_rows.append(frames)
+    return frame_rows
+
+
+def state_importer(
+    path: str,
+    size: int,
+    state: EntityState,
+    directions: list[Direction],
+    hitbox: _Hitbox,
+    atlas: AssetAtlas | None = None,
+) -> dict[Direction, _AniFrames]:
+    directions_dict = {}
+    if atlas:
+        frame_rows = atlas.cached(frame_importer, path, size, len(directions))
+    else:
+        frame_rows = frame_importer(path, size, len(directions))
+
+    for direction, frames in zip(directions, frame_rows, strict=True):
         current_hitbox = hitbox.get_hitbox(state, direction)
         directions_dict[direction] = _AniFrames(frames, current_hitbox)
 
@@ -154,7 +171,11 @@ def state_importer(
 
 
 def entity_importer(
-    path: str, size: int, directions: list[Direction], hitbox: _Hitbox
+    path: str,
+    size: int,
+    directions: list[Direction],
+    hitbox: _Hitbox,
+    atlas: AssetAtlas | None = None,
 ) -> dict[EntityState, dict[Direction, _AniFrames]]:
     hitbox.scale_hitboxes(SCALE_FACTOR)
     states = {}
@@ -167,6 +188,7 @@ def entity_importer(
                 state=current_state,
                 directions=directions,
                 hitbox=hitbox,
+                atlas=atlas,
             )
     return states
 
@@ -178,7 +200,7 @@ ENTITY_ASSETS.COW: EntityAsset | None = None  # type: ignore
 ENTITY_ASSETS.RABBIT: EntityAsset | None = None  # type: ignore
 
 
-def setup_entity_assets():
+def setup_entity_assets(atlas: AssetAtlas | None = None):
     chicken_hitbox = _Hitbox(pygame.Rect(1, 11, 11, 3))
     chicken_hitbox.set_direction_exception(Direction.LEFT, pygame.Rect(4, 11, 11, 3))
 
@@ -187,6 +209,7 @@ def setup_entity_assets():
         size=16,
         directions=[Direction.RIGHT],
         hitbox=chicken_hitbox,
+        atlas=atlas,
     )
 
     ENTITY_ASSETS.CHICKEN = chicken_asset
@@ -199,6 +222,7 @@ def setup_entity_assets():
         size=32,
         directions=[Direction.RIGHT],
         hitbox=cow_hitbox,
+        atlas=atlas,
     )
 
     ENTITY_ASSETS.COW = cow_asset
@@ -218,6 +242,7 @@ def setup_entity_assets():
         size=CHAR_TILE_SIZE,
         directions=[Direction.DOWN, Direction.UP, Direction.LEFT],
         hitbox=rabbit_hitbox,
+        atlas=atlas,
     )
 
     ENTITY_ASSETS.RABBIT = rabbit_asset
@@ -2,7 +2,7 @@ import random
 
 import pygame
 
-from src import timer
+from src import game_clock, timer
 from src.sprites.base import Sprite
 
 
@@ -14,7 +14,7 @@ class WaterDrop(Sprite):
             autostart=True,
             func=self.kill,
         )
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = game_clock.get_ticks()
         self.moving = moving
 
         if moving:
@@ -5,13 +5,14 @@ import random
 import sys
 from collections.abc import Generator
 from dataclasses import dataclass
+from functools import lru_cache
 
 import pygame
 import pygame.gfxdraw
-import pytmx  # type:ignore [import-untyped]
 
 from src import settings
 from src.enums import Direction
+from src.map_cache import MapCache
 from src.settings import (
     BASE_ALLOWED_CROPS,
     GAME_LANGUAGE,
@@ -117,14 +118,18 @@ def import_font(size: int, font_path: str) -> pygame.font.Font:
     return pygame.font.Font(resource_path(font_path), size)
 
 
-def import_image(img_path: str, alpha: bool = True) -> pygame.Surface:
+def import_image(
+    img_path: str, alpha: bool = True, scale_factor: float = SCALE_FACTOR
+) -> pygame.Surface:
     full_path = resource_path(img_path)
     surf = (
         pygame.image.load(full_path).convert_alpha()
         if alpha
         else pygame.image.load(full_path).convert()
     )
-    return pygame.transform.scale_by(surf, SCALE_FACTOR)
+    if scale_factor == 1:
+        return surf
+    return pygame.transform.scale_by(surf, scale_factor)
 
 
 def import_folder(fold_path: str) -> list[pygame.Surface]:
@@ -151,13 +156,15 @@ def import_folder_dict(fold_path: str) -> dict[str, pygame.Surface]:
     return frames
 
 
-def tmx_importer(tmx_path: str) -> settings.MapDict:
-    files = {}
-    for folder_path, _, file_names in os.walk(resource_path(tmx_path)):
-        for file_name in file_names:
-            full_path = os.path.join(folder_path, file_name)
-            files[file_name.split(".")[0]] = pytmx.util_pygame.load_pygame(full_path)
-    return files
+def tmx_importer(tmx_path: str, cache_path: str | None = None) -> settings.MapDict:
+    """
+    :param tmx_path: Folder containing the .tmx files
+    :param cache_path: Folder parsed maps are cached in (see src/map_cache.py)
+    :return: Mapping of all maps, which are only loaded when accessed
+    """
+    if cache_path is not None:
+        cache_path = resource_path(cache_path)
+    return MapCache(resource_path(tmx_path), cache_path)
 
 
 def animation_importer(
@@ -305,18 +312,64 @@ def get_flight_matrix(
     return matrix
 
 
-def get_sorted_flight_vectors(
+_FLIGHT_VECTOR_CACHE_SIZE = 256
+"""Number of positions fled from, whose sorted flight vectors are kept."""
+
+
+@lru_cache
+def _get_flight_angles(radius: int) -> tuple[float, ...]:
+    """
+    :return: Angles from the centre of a flight matrix to each of its positions,
+             row by row (see get_flight_matrix)
+    """
+    diameter = radius * 2 + 1
+    return tuple(
+        math.atan2((radius - x), (radius - y))
+        for y in range(diameter)
+        for x in range(diameter)
+    )
+
+
+@lru_cache(maxsize=_FLIGHT_VECTOR_CACHE_SIZE)
+def _get_sorted_flight_vectors(
     pos: tuple[int, int], radius: int
-) -> Generator[WeightedCoordinate, None, None]:
-    flight_matrix = get_flight_matrix(pos, radius)
+) -> tuple[tuple[int, int, float], ...]:
+    """
+    :return: (x, y, weight) of the positions of the flight matrix, sorted by
+             ascending weight, with the same weights and order that sorting
+             the result of get_flight_matrix gives
+    """
+    diameter = radius * 2 + 1
+    p2 = (pos[0] + radius, pos[1] + radius)
+    dangerous_angle = math.atan2((radius - p2[0]), (radius - p2[1]))
+
+    vectors = []
+    for index, current_angle in enumerate(_get_flight_angles(radius)):
+        x, y = index % diameter, index // diameter
+        distance_ = dangerous_angle - current_angle
+        if distance_ > math.pi:
+            distance_ = distance_ - (math.pi * 2)
+        elif distance_ < -math.pi:
+            distance_ = distance_ + (math.pi * 2)
+
+        weight = distance(p2, (x, y))
+        weight *= abs(distance_ / math.pi)
+        vectors.append((x, y, weight))
 
-    x = []
-    for row in flight_matrix:
-        for col in row:
-            x.append(col)
+    vectors[radius * diameter + radius] = (radius, radius, float("inf"))
+    return tuple(sorted(vectors, key=lambda vector: vector[2]))
 
-    for coord in sorted(x, key=lambda i: i.weight):
-        yield coord
+
+def get_sorted_flight_vectors(
+    pos: tuple[int, int], radius: int
+) -> Generator[WeightedCoordinate, None, None]:
+    """
+    Positions of the flight matrix (see get_flight_matrix), from the most to
+    the least preferred one. The angles of the positions are only calculated
+    once per radius, and the order once per position fled from.
+    """
+    for x, y, weight in _get_sorted_flight_vectors(tuple(pos), radius):
+        yield WeightedCoordinate(x, y, weight)
 
 
 def draw_aa_line(
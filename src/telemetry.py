@@ -0,0 +1,503 @@
+"""Non-blocking and durable transport of telemetry to the backend.
+
+Sending telemetry must neither stall the game nor lose events when the network
+is unreliable. Events are put into a bounded queue, from which a worker thread
+appends them to a spool of segment files on disk (syncing once per batch of
+queued events, not per event). The worker uploads the segments, and only
+deletes a segment once the server acknowledged it. Segments which can't be
+uploaded are retried with exponential backoff, and segments left over from
+previous sessions are uploaded when the next session starts. If the queue is
+full, new events are dropped instead of waiting for the worker.
+
+Each segment is a batch of events: a text file containing the HTTP headers of
+its request, and then one JSON-encoded event per line. The credentials of its
+events (which identify the participant) are stored next to it, in a file only
+the user can read. A segment is only ever uploaded with its own credentials, so
+that events left over from another participant's session stay theirs. It is
+sealed once it contains enough events, its oldest event is old enough, or an
+event with different headers is sent. A segment with only one event is sent as the event
+itself (exactly like without batching), larger ones gzip-compressed as a single
+event of the type "batch":
+
+    {"event": "batch", "payload": {"events": [<event>, ...]}}
+
+Each event is numbered (as "seq") in the order it was sent during the session,
+so that the server can restore their order and detect dropped events. As
+segments of previous sessions are uploaded as well, and the numbers start at 0
+in every session, events also carry the random id of their session (as
+"session_id").
+
+Not available in the web version, which has no threads (see client.py).
+"""
+
+import atexit
+import gzip
+import http.client
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import count
+from typing import TextIO
+from urllib.parse import urlsplit
+
+from src import xplat
+
+_LATENCY_SAMPLES = 100
+"""Number of recently sent events the latency statistics include."""
+
+_COMPRESSION_LEVEL = 6
+"""gzip compression level of batches."""
+
+_MIN_BACKOFF = 1
+"""Seconds after which uploading a segment is retried the first time."""
+
+_MAX_BACKOFF = 60
+"""Maximum number of seconds between retries of uploading a segment."""
+
+_SEGMENT_SUFFIX = ".jsonl"
+_OPEN_SEGMENT_SUFFIX = ".open"
+"""Suffix of the segment events are currently appended to."""
+_AUTH_SUFFIX = ".auth"
+"""Suffix of the file containing the credentials of a segment's events."""
+
+_STOP = object()
+"""Put into the queue to make the worker thread exit."""
+
+_AUTH_HEADERS = ("Authorization",)
+"""Headers which are stored next to segments instead of in them."""
+
+_RETRY_STATUSES = (408, 429)
+"""Client errors after which the upload is retried, like server errors."""
+
+_HOLD_STATUSES = (401, 403)
+"""Responses to credentials the server doesn't accept (anymore), e.g. when the
+token has expired. The segment is kept for the next session, but the segments
+after it are uploaded meanwhile."""
+
+
+class TelemetryTransport:
+    def __init__(
+        self,
+        url: str,
+        queue_size: int,
+        spool_dir: str,
+        batch_size: int = 1,
+        batch_interval: float = 0,
+        timeout: float = 5,
+    ):
+        """
+        Posts events to the given URL from a worker thread, spooling them in
+        the given directory until they are acknowledged.
+
+        :param url: URL events are posted to (http or https)
+        :param queue_size: Maximum number of events waiting to be spooled
+        :param spool_dir: Directory the spooled segments are stored in
+        :param batch_size: Maximum number of events sent in one request
+                           (1 to send each event on its own)
+        :param batch_interval: Maximum number of seconds an event waits for
+                               further events to be sent with
+        :param timeout: Seconds after which connecting to or waiting for the
+                        server is given up (and retried later)
+        :raise ValueError: If the URL is neither http nor https
+        """
+        parts = urlsplit(url)
+        if parts.scheme == "https":
+            self._connection_type = http.client.HTTPSConnection
+        elif parts.scheme == "http":
+            self._connection_type = http.client.HTTPConnection
+        else:
+            raise ValueError(f"Unsupported telemetry URL {url}")
+        self._host = parts.netloc
+        self._path = parts.path or "/"
+        if parts.query:
+            self._path += f"?{parts.query}"
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+
+        self.session_id = uuid.uuid4().hex
+        """Random id of this session, which every event is sent with."""
+        self._sequence = count()
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._connection: http.client.HTTPConnection | None = None
+
+        # spool, only used by the worker thread
+        self.spool_dir = spool_dir
+        self._segment: TextIO | None = None
+        self._segment_headers: dict = {}
+        self._segment_auth_headers: dict = {}
+        self._segment_size = 0
+        self._segment_deadline = 0
+        self._next_segment = 0
+        self._sealed: deque[str] = deque()
+        """Paths of the segments waiting to be uploaded, oldest first."""
+        self._backoff = 0
+        self._retry_time = 0
+        # separate from the random module, which must stay deterministic
+        self._random = random.Random()
+
+        # statistics, for profiling (in events, not requests)
+        self.sent = 0
+        self.failed = 0
+        """Events which the server rejected, or which couldn't be spooled."""
+        self.dropped = 0
+        self.pending = 0
+        """Events which are spooled, but haven't been acknowledged yet."""
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        :return: Number of events waiting to be spooled
+        """
+        return self._queue.qsize()
+
+    @property
+    def mean_latency(self) -> float:
+        """
+        :return: Mean time (in milliseconds) the recent requests took, from
+                 sending the request to receiving the response
+        """
+        if not self._latencies:
+            return 0
+        return sum(self._latencies) / len(self._latencies) * 1000
+
+    @property
+    def max_latency(self) -> float:
+        """
+        :return: Longest time (in milliseconds) one of the recent requests
+                 took
+        """
+        return max(self._latencies, default=0) * 1000
+
+    def send(self, headers: dict, payload: dict) -> bool:
+        """
+        Queue an event to be spooled and posted to the backend, without
+        waiting for it.
+
+        :param headers: HTTP headers of the request. Events are only sent in
+                        the same batch if their headers are equal. Stored in
+                        the spool in plain text, except for the Authorization,
+                        which is only readable by the user
+        :param payload: Event, which is sent JSON-encoded together with its
+                        session id and sequence number
+        :return: Whether the event was queued (False if the queue is full or
+                 the transport has been closed, in which case it is dropped)
+        """
+        # dropped events are numbered as well, so that the server notices them
+        sequence = next(self._sequence)
+        if not self._thread.is_alive():
+            self.dropped += 1
+            return False
+        # encoded right away, as the caller may change the payload afterwards
+        event = json.dumps({**payload, "session_id": self.session_id, "seq": sequence})
+        auth_headers = {
+            key: value for key, value in headers.items() if key in _AUTH_HEADERS
+        }
+        headers = {
+            key: value for key, value in headers.items() if key not in _AUTH_HEADERS
+        }
+        try:
+            self._queue.put_nowait((headers, event, auth_headers))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self, timeout: float | None = None):
+        """
+        Spool the remaining queued events, try to upload all segments once,
+        and stop the worker thread. Segments which could not be uploaded are
+        uploaded in the next session.
+
+        :param timeout: Seconds to wait for the worker thread (defaults to the
+                        timeout of the transport)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    # region spool
+    def _get_segment_path(self, number: int, suffix: str) -> str:
+        return os.path.join(self.spool_dir, f"{number:010d}{suffix}")
+
+    def _get_auth_path(self, segment_path: str) -> str:
+        return os.path.splitext(segment_path)[0] + _AUTH_SUFFIX
+
+    def _recover_spool(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        numbers = []
+        auth_numbers = []
+        for name in os.listdir(self.spool_dir):
+            number, suffix = os.path.splitext(name)
+            if number.isdigit() and suffix == _AUTH_SUFFIX:
+                auth_numbers.append(int(number))
+            elif number.isdigit() and suffix in (_SEGMENT_SUFFIX, _OPEN_SEGMENT_SUFFIX):
+                numbers.append(int(number))
+                if suffix == _OPEN_SEGMENT_SUFFIX:
+                    # events are never appended to segments of previous sessions
+                    os.replace(
+                        os.path.join(self.spool_dir, name),
+                        self._get_segment_path(int(number), _SEGMENT_SUFFIX),
+                    )
+        for number in sorted(numbers):
+            path = self._get_segment_path(number, _SEGMENT_SUFFIX)
+            self._sealed.append(path)
+            with open(path, encoding="utf-8") as file:
+                # all lines but the headers (and a cut off last line)
+                self.pending += max(file.read().count("\n") - 1, 0)
+        # credentials of segments which were deleted, but not the credentials
+        for number in set(auth_numbers) - set(numbers):
+            os.remove(self._get_segment_path(number, _AUTH_SUFFIX))
+        self._next_segment = max(numbers + auth_numbers, default=-1) + 1
+
+    def _spool(self, items: list[tuple[dict, str, dict]]):
+        for headers, event, auth_headers in items:
+            if self._segment is not None and (
+                headers != self._segment_headers
+                or auth_headers != self._segment_auth_headers
+            ):
+                self._seal_segment()
+            if self._segment is None:
+                number = self._next_segment
+                self._next_segment += 1
+                if auth_headers:
+                    self._write_auth(number, auth_headers)
+                self._segment = open(
+                    self._get_segment_path(number, _OPEN_SEGMENT_SUFFIX),
+                    "w",
+                    encoding="utf-8",
+                )
+                self._segment.write(json.dumps(headers) + "\n")
+                self._segment_headers = headers
+                self._segment_auth_headers = auth_headers
+                self._segment_size = 0
+                self._segment_deadline = time.monotonic() + self.batch_interval
+
+            self._segment.write(event + "\n")
+            self._segment_size += 1
+            self.pending += 1
+            if self._segment_size >= self.batch_size:
+                self._seal_segment()
+
+        if self._segment is not None:
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+
+    def _write_auth(self, number: int, auth_headers: dict):
+        # only readable by the user, as it contains the participant's token
+        descriptor = os.open(
+            self._get_segment_path(number, _AUTH_SUFFIX),
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+            0o600,
+        )
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            file.write(json.dumps(auth_headers))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _seal_segment(self):
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self._segment.close()
+        path = self._segment.name
+        sealed_path = path.removesuffix(_OPEN_SEGMENT_SUFFIX) + _SEGMENT_SUFFIX
+        os.replace(path, sealed_path)
+        self._sealed.append(sealed_path)
+        self._segment = None
+
+    def _read_segment(self, path: str) -> tuple[dict, dict, list[str]]:
+        """
+        :return: Headers, credentials and events of the segment
+        """
+        with open(path, encoding="utf-8") as file:
+            lines = file.read().split("\n")
+        # the last line is either empty, or was cut off when the game crashed
+        lines.pop()
+        if not lines:
+            return {}, {}, []
+        headers = json.loads(lines[0])
+        try:
+            with open(self._get_auth_path(path), encoding="utf-8") as file:
+                auth_headers = json.load(file)
+        except FileNotFoundError:
+            # segments spooled by older versions contain their credentials
+            auth_headers = {
+                key: headers.pop(key) for key in _AUTH_HEADERS if key in headers
+            }
+        return headers, auth_headers, lines[1:]
+
+    def _remove_segment(self, path: str):
+        for removed_path in (path, self._get_auth_path(path)):
+            try:
+                os.remove(removed_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                xplat.log(f"Removing telemetry segment {removed_path} failed: {e!r}")
+
+    # endregion
+
+    def _get_wait_time(self) -> float | None:
+        # seconds until the worker has something to do, if no events are sent
+        times = []
+        if self._segment is not None:
+            times.append(self._segment_deadline)
+        if self._sealed:
+            times.append(self._retry_time)
+        if not times:
+            return None
+        return max(min(times) - time.monotonic(), 0)
+
+    def _run(self):
+        try:
+            self._recover_spool()
+        except OSError as e:
+            xplat.log(f"Telemetry spool unavailable: {e!r}")
+            return
+
+        stopping = False
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=self._get_wait_time())]
+            except queue.Empty:
+                items = []
+            # everything queued meanwhile is spooled at once, and synced once
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in items:
+                stopping = True
+                items.remove(_STOP)
+
+            pending = self.pending
+            try:
+                self._spool(items)
+                if self._segment is not None and (
+                    stopping or time.monotonic() >= self._segment_deadline
+                ):
+                    self._seal_segment()
+            except OSError as e:
+                xplat.log(f"Spooling telemetry failed: {e!r}")
+                # the events written until then are recovered in the next session
+                self.failed += len(items) - (self.pending - pending)
+                if self._segment is not None:
+                    self._segment.close()
+                    self._segment = None
+
+            if stopping:
+                while self._sealed and self._upload_segment():
+                    pass
+            elif self._sealed and time.monotonic() >= self._retry_time:
+                # only one segment at a time, to keep spooling queued events
+                self._upload_segment()
+
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _upload_segment(self) -> bool:
+        """
+        Upload the oldest sealed segment, and delete it if the server
+        acknowledged (or rejected) it.
+
+        :return: Whether the next segment can be uploaded right away
+        """
+        path = self._sealed[0]
+        try:
+            headers, auth_headers, batch = self._read_segment(path)
+        except (OSError, ValueError) as e:
+            xplat.log(f"Skipping damaged telemetry segment {path}: {e!r}")
+            headers, auth_headers, batch = {}, {}, []
+
+        status = self._post_batch(headers, auth_headers, batch) if batch else 200
+        if status in _HOLD_STATUSES:
+            # never uploaded with other credentials, which might be those of
+            # another participant
+            xplat.log(f"Keeping telemetry segment {path} for later: HTTP {status}")
+            self._sealed.popleft()
+            return True
+
+        if status is None or status >= 500 or status in _RETRY_STATUSES:
+            # the server may accept the segment later
+            self._backoff = min(max(self._backoff * 2, _MIN_BACKOFF), _MAX_BACKOFF)
+            # randomised, so that games which lost their connection at the same
+            # time don't retry at the same time
+            self._retry_time = time.monotonic() + self._random.uniform(
+                self._backoff / 2, self._backoff
+            )
+            return False
+
+        if status >= 400:
+            xplat.log(f"Sending telemetry failed: HTTP {status}")
+            self.failed += len(batch)
+        else:
+            self.sent += len(batch)
+        self.pending = max(self.pending - len(batch), 0)
+        self._backoff = 0
+        self._retry_time = 0
+        self._sealed.popleft()
+        self._remove_segment(path)
+        return True
+
+    def _post_batch(
+        self, headers: dict, auth_headers: dict, batch: list[str]
+    ) -> int | None:
+        headers = {"Content-Type": "application/json", **headers, **auth_headers}
+        if len(batch) == 1:
+            body = batch[0].encode("utf-8")
+        else:
+            # the events are already encoded, so the envelope is built as text
+            events = ", ".join(batch)
+            envelope = f'{{"event": "batch", "payload": {{"events": [{events}]}}}}'
+            body = gzip.compress(envelope.encode("utf-8"), _COMPRESSION_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+        return self._post(headers, body)
+
+    def _post(self, headers: dict, body: bytes) -> int | None:
+        start_time = time.perf_counter()
+        # a kept-alive connection may have been closed by the server meanwhile,
+        # which is only noticed when using it. Only fresh connections are
+        # trusted to report actual failures
+        for retry in (True, False):
+            is_new_connection = self._connection is None
+            if is_new_connection:
+                self._connection = self._connection_type(
+                    self._host, timeout=self.timeout
+                )
+            try:
+                self._connection.request("POST", self._path, body, headers)
+                response = self._connection.getresponse()
+                # the response has to be read completely to reuse the connection
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._connection.close()
+                self._connection = None
+                if retry and not is_new_connection:
+                    continue
+                xplat.log(f"Sending telemetry failed: {e!r}")
+                return None
+            break
+
+        self._latencies.append(time.perf_counter() - start_time)
+        if response.will_close:
+            self._connection.close()
+            self._connection = None
+        return response.status
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+import pygame
+
+from src.enums import Direction, EntityState
+from src.position_trace import PositionTraceRecorder, read_position_trace
+
+
+class _Entity:
+    def __init__(self, x: float, y: float):
+        self.hitbox_rect = pygame.FRect(0, 0, 10, 10)
+        self.hitbox_rect.center = (x, y)
+        self.facing_direction = Direction.DOWN
+        self.state = EntityState.IDLE
+
+
+class TestPositionTrace(unittest.TestCase):
+    def test_round_trip(self):
+        walking, standing = _Entity(100, 100), _Entity(5, 7)
+
+        with tempfile.TemporaryDirectory() as trace_dir:
+            # small enough to be flushed while recording
+            recorder = PositionTraceRecorder(trace_dir, buffer_size=3)
+            recorder.start_trace("round_01")
+            for dx, dy in ((3, 0), (0, 0), (-250, 4.4)):
+                walking.hitbox_rect.move_ip(dx, dy)
+                walking.state = EntityState.WALK if dx else EntityState.IDLE
+                recorder.record(0.5, "farm", (walking, standing))
+            recorder.record(0.5, "farm", (walking, standing))
+            recorder.record(0.5, "town", (standing,))
+            recorder.close()
+
+            (trace,) = os.listdir(trace_dir)
+            samples = list(read_position_trace(os.path.join(trace_dir, trace)))
+
+        # entities are only sampled when they changed, or the map changed
+        self.assertEqual(
+            [(s.frame, s.time, s.map, s.x, s.y, s.state) for s in samples],
+            [
+                (1, 0.5, "farm", 103, 100, "walk"),
+                (1, 0.5, "farm", 5, 7, "idle"),
+                (2, 1.0, "farm", 103, 100, "idle"),
+                (3, 1.5, "farm", -147, 104, "walk"),
+                (5, 2.5, "town", 5, 7, "idle"),
+            ],
+        )
+        self.assertEqual(samples[0].entity, "_entity")
+        self.assertEqual(samples[0].facing, Direction.DOWN)
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import pygame
+
+from src.exceptions import ReplayWarning
+from src.replay import InputRecorder, InputReplay
+
+pygame.init()
+
+GAME_EVENT = pygame.event.custom_type()
+
+
+class _Clock:
+    def tick(self) -> int:
+        return 16
+
+
+class _Preloader:
+    def __init__(self):
+        self.done = False
+
+    def finish(self):
+        self.done = True
+
+
+class TestReplay(unittest.TestCase):
+    def test_round_trip(self):
+        clock = _Clock()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "session.jsonl")
+            save_path = os.path.join(tmp_dir, "save.json")
+            with open(save_path, "w") as file:
+                file.write('{"money": 5}')
+
+            pygame.event.clear()
+            recorder = InputRecorder(path, save_path)
+            recorder.tick(clock, True)
+            recorder.get_events()
+            recorder.end_frame(None)
+            recorder.tick(clock, False)
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_d))
+            pygame.event.post(pygame.event.Event(GAME_EVENT))
+            pygame.event.post(
+                pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(3, 4))
+            )
+            recorder.get_events()
+            recorder.end_frame([1, 2])
+            recorder.close()
+
+            with warnings.catch_warnings():
+                # the hash seed is irrelevant here
+                warnings.simplefilter("ignore", ReplayWarning)
+                replay = InputReplay(path)
+            preloader = _Preloader()
+            self.assertTrue(replay.is_preloading(preloader))
+            self.assertEqual(replay.tick(clock, True), 16)
+            replay.end_frame(None)
+            self.assertFalse(replay.is_preloading(preloader))
+            self.assertTrue(preloader.done)
+
+            # the game posts its own events again while replaying
+            pygame.event.post(pygame.event.Event(GAME_EVENT))
+            replay.tick(clock, False)
+            events = [
+                event.type
+                for event in replay.get_events()
+                if event.type in (pygame.KEYDOWN, GAME_EVENT, pygame.MOUSEBUTTONDOWN)
+            ]
+            self.assertEqual(
+                events, [pygame.KEYDOWN, GAME_EVENT, pygame.MOUSEBUTTONDOWN]
+            )
+            self.assertTrue(replay.is_key_pressed(pygame.K_d))
+            self.assertEqual(replay.get_mouse_buttons(), (True, False, False))
+            self.assertEqual(replay.get_mouse_pos(), (3, 4))
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", ReplayWarning)
+                replay.end_frame([1, 2])
+            self.assertTrue(replay.finished)
+
+            # the recorded save file is replayed from a copy
+            with open(replay.save_path) as file:
+                self.assertEqual(file.read(), '{"money": 5}')
+            replay_save_path = replay.save_path
+            replay.close()
+            self.assertFalse(os.path.exists(replay_save_path))
@@ -23,3 +23,17 @@ class TestLoadTranslations(unittest.TestCase):
     def test_german(self):
         tr = support.load_translations()
         self.assertEqual(tr["enter_play_token"], "Bitte Token eingeben:")
+
+
+class TestSortedFlightVectors(unittest.TestCase):
+    def test_matches_flight_matrix(self):
+        for radius in range(4):
+            for pos in [(0, 0), (2, -3), (-7, 1), (radius, radius)]:
+                matrix = support.get_flight_matrix(pos, radius)
+                expected = sorted(
+                    (coord for row in matrix for coord in row),
+                    key=lambda coord: coord.weight,
+                )
+                self.assertEqual(
+                    list(support.get_sorted_flight_vectors(pos, radius)), expected
+                )
@@ -0,0 +1,230 @@
+import gzip
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.telemetry import TelemetryTransport
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server
+        server.release.wait()
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server.requests += 1
+        server.connections.add(self.client_address)
+        server.authorizations.append(self.headers["Authorization"])
+        status = server.statuses.pop(0) if server.statuses else 200
+        if status == 200:
+            if self.headers["Content-Encoding"] == "gzip":
+                body = gzip.decompress(body)
+            event = json.loads(body)
+            if event["event"] == "batch":
+                server.events.extend(event["payload"]["events"])
+            else:
+                server.events.append(event)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        if server.close_connections:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTelemetryTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.events = []
+        self.server.statuses = []
+        self.server.requests = 0
+        self.server.connections = set()
+        self.server.authorizations = []
+        self.server.close_connections = False
+        self.server.release = threading.Event()
+        self.server.release.set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/telemetry"
+        self.spool = tempfile.TemporaryDirectory()
+        self.spool_dir = self.spool.name
+
+    def tearDown(self):
+        self.server.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.spool.cleanup()
+
+    def test_reuses_connection(self):
+        transport = TelemetryTransport(self.url, 16, self.spool_dir)
+        for i in range(10):
+            self.assertTrue(transport.send({}, {"event": i}))
+        transport.close()
+
+        session_id = transport.session_id
+        self.assertEqual(
+            self.server.events,
+            [{"event": i, "session_id": session_id, "seq": i} for i in range(10)],
+        )
+        self.assertEqual(self.server.requests, 10)
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(transport.sent, 10)
+        self.assertEqual(transport.failed, 0)
+
+    def test_reconnects_when_closed_by_server(self):
+        self.server.close_connections = True
+        transport = TelemetryTransport(self.url, 16, self.spool_dir)
+        for i in range(3):
+            transport.send({}, {"event": i})
+        transport.close()
+
+        self.assertEqual(len(self.server.events), 3)
+        self.assertEqual(len(self.server.connections), 3)
+        self.assertEqual(transport.sent, 3)
+
+    def test_drops_events_when_queue_is_full(self):
+        self.server.release.clear()
+        transport = TelemetryTransport(self.url, 2, self.spool_dir)
+        # the first event is taken by the worker, which then waits for the
+        # server, so only two more fit into the queue
+        transport.send({}, {"event": 0})
+        while transport.queue_depth:
+            time.sleep(0.001)
+        results = [transport.send({}, {"event": i}) for i in range(1, 5)]
+        self.server.release.set()
+        transport.close()
+
+        self.assertEqual(results, [True, True, False, False])
+        self.assertEqual(transport.dropped, 2)
+        self.assertEqual([event["seq"] for event in self.server.events], [0, 1, 2])
+
+    def test_sends_batches(self):
+        transport = TelemetryTransport(
+            self.url, 16, self.spool_dir, batch_size=4, batch_interval=60
+        )
+        payload = {"uses": 0}
+        for i in range(10):
+            payload["uses"] = i
+            transport.send({}, payload)
+        transport.close()
+
+        # events are sent as they were when they were sent, in batches of 4, 4
+        # and the remaining 2 when closing
+        session_id = transport.session_id
+        self.assertEqual(
+            self.server.events,
+            [{"uses": i, "session_id": session_id, "seq": i} for i in range(10)],
+        )
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(transport.sent, 10)
+
+    def test_sends_batches_after_interval(self):
+        transport = TelemetryTransport(
+            self.url, 16, self.spool_dir, batch_size=4, batch_interval=0
+        )
+        transport.send({}, {"event": 0})
+        while not self.server.requests:
+            time.sleep(0.001)
+        transport.send({"X-Round": "1"}, {"event": 1})
+        transport.send({"X-Round": "2"}, {"event": 2})
+        transport.close()
+
+        # events with different headers are never sent together
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(self.server.events), 3)
+
+    def test_retries_failed_uploads(self):
+        self.server.statuses = [503]
+        transport = TelemetryTransport(self.url, 16, self.spool_dir)
+        transport.send({}, {"event": 0})
+        while self.server.requests < 2:
+            time.sleep(0.01)
+        transport.close()
+
+        self.assertEqual(
+            self.server.events,
+            [{"event": 0, "session_id": transport.session_id, "seq": 0}],
+        )
+        self.assertEqual(transport.sent, 1)
+        self.assertEqual(transport.pending, 0)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_uploads_segments_with_their_own_authorization(self):
+        # e.g. the token of the first participant expired
+        self.server.statuses = [401]
+        transport = TelemetryTransport(self.url, 16, self.spool_dir)
+        transport.send({"Authorization": "Bearer a"}, {"event": 0})
+        while not self.server.requests:
+            time.sleep(0.001)
+        # the token is only stored next to the segment, readable by the user
+        for name in os.listdir(self.spool_dir):
+            path = os.path.join(self.spool_dir, name)
+            with open(path) as file:
+                if name.endswith(".auth"):
+                    self.assertIn("Bearer a", file.read())
+                    if os.name == "posix":
+                        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+                else:
+                    self.assertNotIn("Bearer a", file.read())
+        # the rejected segment doesn't hold up those of other participants
+        transport.send({"Authorization": "Bearer b"}, {"event": 1})
+        transport.close()
+        self.assertEqual(self.server.events[0]["event"], 1)
+        self.assertEqual(transport.pending, 1)
+
+        transport = TelemetryTransport(self.url, 16, self.spool_dir)
+        transport.close()
+
+        self.assertEqual([event["event"] for event in self.server.events], [1, 0])
+        self.assertEqual(
+            self.server.authorizations, ["Bearer a", "Bearer b", "Bearer a"]
+        )
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_uploads_events_of_previous_sessions(self):
+        # a port nobody listens on
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            unreachable_url = f"http://127.0.0.1:{sock.getsockname()[1]}/telemetry"
+        transport = TelemetryTransport(
+            unreachable_url, 16, self.spool_dir, batch_size=2, batch_interval=60
+        )
+        for i in range(3):
+            transport.send({}, {"event": i})
+        transport.close()
+        self.assertEqual(transport.sent, 0)
+        self.assertEqual(transport.pending, 3)
+        previous_session_id = transport.session_id
+
+        transport = TelemetryTransport(self.url, 16, self.spool_dir)
+        self.assertTrue(transport.send({}, {"event": 3}))
+        transport.close()
+
+        # the sequence numbers restart, but the sessions can be told apart
+        self.assertEqual(
+            [
+                (event["session_id"], event["seq"], event["event"])
+                for event in self.server.events
+            ],
+            [
+                (previous_session_id, 0, 0),
+                (previous_session_id, 1, 1),
+                (previous_session_id, 2, 2),
+                (transport.session_id, 0, 3),
+            ],
+        )
+        self.assertNotEqual(previous_session_id, transport.session_id)
+        self.assertEqual(transport.sent, 4)
+        self.assertEqual(os.listdir(self.spool_dir), [])
@@ -1,4 +1,4 @@
-import pygame
+from src import game_clock
 
 
 class Timer:
@@ -19,7 +19,7 @@ class Timer:
     def activate(self):
         self.active = True
         self.finished = False
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = game_clock.get_ticks()
 
     def deactivate(self):
         self.active = False
@@ -31,12 +31,12 @@ class Timer:
     def get_progress(self) -> float:
         """returns a value between 0 and 1 that shows the timers progress
         1 means duration finshed"""
-        curr = pygame.time.get_ticks()
+        curr = game_clock.get_ticks()
         return (curr - self.start_time) / self.duration if self.active else 0
 
     def update(self):
         if self.active:
-            if pygame.time.get_ticks() - self.start_time >= self.duration:
+            if game_clock.get_ticks() - self.start_time >= self.duration:
                 if self.func and self.start_time != 0:
                     self.func()
                 self.deactivate()
@@ -0,0 +1,36 @@
+"""Converts the asset atlas built by the game into PNG pages, for the web version.
+
+The web version can't build the atlas by itself (nothing it writes is kept),
+so start the game once on desktop to build the atlas, then run
+`python -m tools.build_asset_atlas` before building the web version.
+"""
+
+import os
+
+# this is needed to prevent ruff sorting imports
+if True:
+    # this is needed to prevent pygame message in console
+    os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    from src.atlas import AssetAtlas
+
+
+def main():
+    pygame.init()
+    # pages can only be converted once a display mode is set
+    pygame.display.set_mode((1, 1))
+
+    atlas = AssetAtlas("data/atlas", "images")
+    if not atlas.load():
+        print("No up-to-date asset atlas found in data/atlas.")
+        print("Start the game once to build it, then run this script again.")
+        exit(1)
+
+    atlas.save(page_format="png")
+    print("Saved the asset atlas with PNG pages to data/atlas.")
+
+
+if __name__ == "__main__":
+    main()
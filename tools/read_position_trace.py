@@ -0,0 +1,42 @@
+"""Converts position traces recorded by the game into CSV files.
+
+Start the game with RECORD_POSITION_TRACES=true to record one trace per round
+in data/traces, then run
+`python -m tools.read_position_trace data/traces/<trace>.ptrace` to convert it.
+"""
+
+import csv
+import os
+import sys
+
+# this is needed to prevent ruff sorting imports
+if True:
+    # this is needed to prevent pygame message in console
+    os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "hide"
+
+    from src.position_trace import TraceSample, read_position_trace
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python -m tools.read_position_trace <trace> [<output csv>]")
+        exit(1)
+
+    trace_path = sys.argv[1]
+    if len(sys.argv) > 2:
+        csv_path = sys.argv[2]
+    else:
+        csv_path = os.path.splitext(trace_path)[0] + ".csv"
+
+    samples = 0
+    with open(csv_path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(TraceSample._fields)
+        for sample in read_position_trace(trace_path):
+            writer.writerow(sample)
+            samples += 1
+    print(f"Wrote {samples} samples to {csv_path}.")
+
+
+if __name__ == "__main__":
+    main()